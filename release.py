@@ -136,6 +136,14 @@ def copy_py_sourcefile(source, dest, pyver):
             raise RuntimeError('Missing copyright')
         else:
             open(dest, 'w').write(content)
+    elif source.endswith('.c'):
+        print('Source File %s' % source)
+        content = open(source).read()
+        content = parse_macros(content, pyver)
+        if not check_copyright(content, b'/\\*'):
+            raise RuntimeError('Missing copyright')
+        else:
+            open(dest, 'w').write(content)
     else:
         print('Skipping    %s' % source)
 
@@ -18,8 +18,12 @@
 # License along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from distutils.core import setup
+from distutils.command.build_ext import build_ext
+from distutils.core import setup, Extension
+from distutils.errors import CCompilerError, DistutilsExecError
+from distutils.errors import DistutilsPlatformError
 import os
+import platform
 
 
 # Release number
@@ -87,6 +91,35 @@ for dirpath, dirs, files in os.walk('versile'):
     if '__init__.py' in files:
         packages.append(dirpath.replace(os.path.sep, '.'))
 
+# Optional native codec primitives, the extension is skipped if it
+# cannot be built and the pure-python implementations are used instead
+ext_modules = []
+if platform.python_implementation() == 'CPython':
+    ext_modules.append(Extension('versile._speedups',
+                                 sources=['versile/_speedups.c']))
+
+_build_errors = (CCompilerError, DistutilsExecError, DistutilsPlatformError,
+                 IOError)
+
+class optional_build_ext(build_ext):
+    """Builds extensions, skipping any extension which fails to build."""
+
+    def run(self):
+        try:
+            build_ext.run(self)
+        except _build_errors as e:
+            self._skip('all extensions', e)
+
+    def build_extension(self, ext):
+        try:
+            build_ext.build_extension(self, ext)
+        except _build_errors as e:
+            self._skip(ext.name, e)
+
+    def _skip(self, name, error):
+        print('WARNING: could not build %s (%s), using pure-python code'
+              % (name, error))
+
 
 if __name__ == '__main__':
     setup(name=name,
@@ -100,6 +133,8 @@ if __name__ == '__main__':
           maintainer_email=author_email,
           url=url,
           packages=packages,
+          ext_modules=ext_modules,
+          cmdclass={'build_ext': optional_build_ext},
           keywords=['versile'],
           classifiers=cf,
           license=lic
@@ -0,0 +1,87 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Helpers for running checks with and without the native codec.
+
+Whether :mod:`versile._speedups` is loaded is decided when
+:mod:`versile.internal` is imported, so checks for each codec backend
+are run in a separate interpreter process. A check script is run with
+:func:`run_backend` and prints a JSON report with :func:`report`\ .
+
+"""
+from __future__ import print_function, unicode_literals
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Top directory of the source tree, which holds the 'versile' package
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_backend(script, args=(), speedups=True):
+    """Runs a check script with or without the native codec.
+
+    :param script:   path of check script
+    :type  script:   unicode
+    :param args:     script arguments
+    :type  args:     list of unicode
+    :param speedups: if True run with the native codec, otherwise without
+    :type  speedups: bool
+    :returns:        the script's report
+    :raises:         :exc:`unittest.SkipTest`\ , :exc:`RuntimeError`
+
+    Raises :exc:`unittest.SkipTest` if *speedups* is True and the
+    native extension could not be loaded.
+
+    """
+    env = dict(os.environ)
+    env.pop(str('VERSILE_NO_SPEEDUPS'), None)
+    if not speedups:
+        env[str('VERSILE_NO_SPEEDUPS')] = str('1')
+    path = env.get(str('PYTHONPATH'))
+    if path:
+        env[str('PYTHONPATH')] = str(os.pathsep.join((TOP_DIR, path)))
+    else:
+        env[str('PYTHONPATH')] = str(TOP_DIR)
+    if script.endswith(('.pyc', '.pyo')):
+        script = script[:-1]
+    cmd = [sys.executable, script] + [str(arg) for arg in args]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE)
+    out = proc.communicate()[0]
+    if proc.returncode:
+        raise RuntimeError('Check process failed')
+    result = json.loads(out.decode('utf8'))
+    if result['speedups'] != speedups:
+        if speedups:
+            raise unittest.SkipTest('Native extension could not be loaded')
+        raise RuntimeError('Native extension was not disabled')
+    return result['report']
+
+
+def report(data):
+    """Prints a check script's report.
+
+    :param data: report data, must be JSON serializable
+
+    """
+    from versile.internal import _vspeedups
+    result = dict(speedups=(_vspeedups is not None), report=data)
+    print(json.dumps(result))
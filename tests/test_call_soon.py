@@ -0,0 +1,78 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""Tests of calls queued with call_soon()."""
+from __future__ import print_function, unicode_literals
+
+import threading
+import unittest
+
+from versile.reactor.quick import VReactor
+
+
+class _Target(object):
+    """Records calls; all instances compare equal and are unhashable."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __eq__(self, other):
+        return isinstance(other, _Target)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def trigger(self):
+        self.calls.append(self)
+
+
+class TestCallSoon(unittest.TestCase):
+    """Checks coalescing of calls queued without arguments."""
+
+    def setUp(self):
+        self.reactor = VReactor(daemon=True)
+        self.reactor.start()
+
+    def tearDown(self):
+        self.reactor.stop()
+        self.reactor.join(5.0)
+
+    def test_coalescing(self):
+        calls = []
+        target1, target2 = _Target(calls), _Target(calls)
+        self._queue(target1.trigger, target1.trigger, target2.trigger)
+        self.assertEqual(len(calls), 2)
+        self.assertIs(calls[0], target1)
+        self.assertIs(calls[1], target2)
+
+    def _queue(self, *callbacks):
+        """Queues callbacks from one reactor iteration and waits."""
+        done = threading.Event()
+        def _queue():
+            for callback in callbacks:
+                self.reactor.call_soon(callback)
+            self.reactor.call_soon(done.set)
+        self.reactor.execute(_queue)
+        self.assertTrue(done.wait(5.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
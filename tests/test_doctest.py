@@ -0,0 +1,88 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Runs module doctests with and without the native codec.
+
+Doctest output is compared without 'u' and 'b' string prefixes, so
+examples can be checked with both python 2 and python 3.
+
+"""
+from __future__ import print_function, unicode_literals
+
+import doctest
+import re
+import sys
+import unittest
+
+from backend import report, run_backend
+
+MODULES = ('versile.common.util', 'versile.orb.entity', 'versile.orb.validate')
+
+
+class TestDoctest(unittest.TestCase):
+
+    def test_native(self):
+        self._check(speedups=True)
+
+    def test_pure(self):
+        self._check(speedups=False)
+
+    def _check(self, speedups):
+        results = run_backend(__file__, ('--results',), speedups=speedups)
+        for name in MODULES:
+            failed, attempted, output = results[name]
+            self.assertTrue(attempted, 'No doctests in %s' % name)
+            self.assertFalse(failed, output)
+
+
+class _Checker(doctest.OutputChecker):
+    """Output checker which ignores string literal prefixes."""
+
+    __prefix = re.compile(r"\b[ub](?=['\"])")
+
+    def check_output(self, want, got, optionflags):
+        want, got = self.__prefix.sub('', want), self.__prefix.sub('', got)
+        return doctest.OutputChecker.check_output(self, want, got,
+                                                  optionflags)
+
+
+def doctest_results():
+    """Runs doctests of :data:`MODULES`\ .
+
+    :returns: results as {module: (failed, attempted, output)}
+    :rtype:   dict
+
+    """
+    results = dict()
+    finder = doctest.DocTestFinder()
+    for name in MODULES:
+        __import__(name)
+        module = sys.modules[name]
+        runner = doctest.DocTestRunner(checker=_Checker(), verbose=False)
+        output = []
+        for test in finder.find(module):
+            runner.run(test, out=output.append)
+        results[name] = (runner.failures, runner.tries, ''.join(output))
+    return results
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--results']:
+        report(doctest_results())
+    else:
+        unittest.main()
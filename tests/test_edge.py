@@ -0,0 +1,113 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""Tests of end-of-input detection with an edge-triggered reactor."""
+from __future__ import print_function, unicode_literals
+
+import os
+import socket
+import time
+import unittest
+
+try:
+    from versile.reactor.epollr import VEpollReactor
+except ImportError:
+    VEpollReactor = None
+from versile.reactor.io import VByteConsumer
+from versile.reactor.io.pipe import VPipeAgent
+from versile.reactor.io.sock import VClientSocketAgent
+
+
+class _Consumer(VByteConsumer):
+    """Consumer which counts received bytes and records end-of-data."""
+
+    def __init__(self, reactor):
+        super(_Consumer, self).__init__(reactor)
+        self.received = 0
+        self.ended = None
+
+    def _data_received(self, data):
+        self.received += len(data)
+
+    def _data_ended(self, clean):
+        self.ended = clean
+
+
+@unittest.skipIf(VEpollReactor is None, 'epoll is not available')
+class TestEdgeTriggeredEOF(unittest.TestCase):
+    """Peer sends data and closes while the reader is not reading.
+
+    When reading resumes, the data and end-of-input are both pending
+    on the descriptor, and the edge-triggered reactor does not report
+    another edge after the data is read. The reader must still detect
+    end-of-input.
+
+    """
+
+    DATA = b'x'*100
+    TIMEOUT = 5.0
+
+    def setUp(self):
+        self.reactor = VEpollReactor(daemon=True, edge_triggered=True)
+        self.reactor.start()
+
+    def tearDown(self):
+        self.reactor.stop()
+        self.reactor.join(5.0)
+
+    def test_socket(self):
+        sock, peer = socket.socketpair()
+        sock.setblocking(False)
+        agent = VClientSocketAgent(reactor=self.reactor, sock=sock,
+                                   connected=True)
+        self._check(agent, agent, peer.sendall, peer.close)
+        self.assertTrue(agent._sock_in_closed)
+
+    def test_pipe(self):
+        read_fd, peer_fd = os.pipe()
+        out_fd, out_peer_fd = os.pipe()
+        try:
+            agent = VPipeAgent(self.reactor, read_fd, out_fd)
+            self._check(agent, agent._reader, lambda data:
+                        os.write(peer_fd, data), lambda: os.close(peer_fd))
+            self.assertTrue(agent._reader._in_closed)
+        finally:
+            os.close(out_peer_fd)
+
+    def _check(self, agent, reader, send, close):
+        reactor = self.reactor
+        consumer = _Consumer(reactor)
+        reactor.execute(consumer.byte_consume.attach, agent.byte_produce)
+        time.sleep(0.2)
+        reactor.execute(reader.stop_reading)
+        time.sleep(0.1)
+        send(self.DATA)
+        close()
+        time.sleep(0.1)
+        reactor.execute(reader.start_reading)
+
+        end_time = time.time() + self.TIMEOUT
+        while consumer.ended is None and time.time() < end_time:
+            time.sleep(0.01)
+        self.assertEqual(consumer.received, len(self.DATA))
+        self.assertTrue(consumer.ended)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Tests of link calls executed by a process pool processor."""
+from __future__ import print_function, unicode_literals
+
+import os
+import time
+import unittest
+
+from versile.orb.entity import VObject
+from versile.orb.external import VExternal, publish
+from versile.orb.pool import VProcessPoolProcessor
+from versile.reactor.io.link import VLinkAgent
+from versile.reactor.io.sock import VClientSocketAgent
+
+
+class _PoolGateway(VExternal):
+    """Gateway with methods which are executed in worker processes."""
+
+    @classmethod
+    @publish(show=True, process=True)
+    def sleep(cls, duration):
+        time.sleep(duration)
+        return os.getpid()
+
+    @classmethod
+    @publish(show=True, process=True)
+    def exit(cls):
+        raise SystemExit(1)
+
+
+class TestProcessPool(unittest.TestCase):
+    """Calls methods published with *process* set over a link.
+
+    The gateway's methods are served by a
+    :class:`versile.orb.pool.VProcessPoolProcessor` with one worker
+    thread and :attr:`CALLS` worker processes, which is set either on
+    the gateway or on the link.
+
+    """
+
+    CALLS = 4
+    DURATION = 1.0
+
+    def test_gateway_processor(self):
+        self._check(link_processor=False)
+
+    def test_link_processor(self):
+        self._check(link_processor=True)
+
+    def _check(self, link_processor):
+        calls, duration = self.CALLS, self.DURATION
+        proc = VProcessPoolProcessor(workers=1, processes=calls)
+        proc.start_pool()
+        sock1, sock2 = VClientSocketAgent.create_native_pair()
+        if link_processor:
+            link1 = VLinkAgent.from_socket(sock1, gw=_PoolGateway(),
+                                           processor=proc)
+        else:
+            link1 = VLinkAgent.from_socket(sock1,
+                                           gw=_PoolGateway(processor=proc))
+        link2 = VLinkAgent.from_socket(sock2, gw=VObject())
+        try:
+            gw = link2.async_gw().result(10)
+
+            # Concurrent calls complete in about the time of one call
+            start_time = time.time()
+            results = [gw.sleep(duration, nowait=True) for i in range(calls)]
+            pids = [result.result(10 + calls*duration) for result in results]
+            elapsed = time.time() - start_time
+            self.assertTrue(elapsed <= 1.5*duration,
+                            '%s calls took %.2fs' % (calls, elapsed))
+            self.assertNotIn(os.getpid(), pids)
+
+            # SystemExit in a worker process fails the call
+            self.assertRaises(Exception, gw.exit(nowait=True).result, 10)
+
+            # Stopping the processor with purge fails an ongoing call
+            result = gw.sleep(60, nowait=True)
+            time.sleep(0.5)
+            proc.stop(purge=True)
+            self.assertRaises(Exception, result.result, 10)
+        finally:
+            link1.shutdown()
+            link2.shutdown()
+            proc.stop(purge=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
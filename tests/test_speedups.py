@@ -0,0 +1,247 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Equivalence check of native and pure-python codec implementations.
+
+Encodes and decodes randomly generated entities and malformed data
+with and without the :mod:`versile._speedups` extension, and checks
+the results are the same.
+
+"""
+from __future__ import print_function, unicode_literals
+
+import random
+import sys
+import unittest
+
+from versile.internal import _pyver
+
+from backend import report, run_backend
+
+
+class TestSpeedups(unittest.TestCase):
+
+    SEED = 0
+    COUNT = 500
+
+    def test_equivalence(self):
+        args = ('--results', self.SEED, self.COUNT)
+        native = run_backend(__file__, args, speedups=True)
+        pure = run_backend(__file__, args, speedups=False)
+        self.assertEqual(len(native), len(pure))
+        mismatches = [(n, p) for n, p in zip(native, pure) if n != p]
+        msg = '\n'.join(['native:      %s\npure-python: %s' % m
+                         for m in mismatches[:10]])
+        self.assertFalse(mismatches, msg)
+
+
+def speedups_results(seed=0, count=500):
+    """Returns codec results for randomly generated input.
+
+    :param seed:  seed for generating input
+    :type  seed:  int
+    :param count: number of generated entities
+    :type  count: int
+    :returns:     list of result descriptions
+    :rtype:       list of unicode
+
+    Generates *count* random entities of types with a native codec
+    implementation, and random malformed data. Results are recorded
+    for encoding with :meth:`versile.orb.entity.VEntity._v_write`\ ,
+    decoding with :meth:`versile.orb.entity.VEntity._v_decode_bytes`
+    and decoding with a :class:`versile.orb.entity.VEntityReader`
+    which receives data in random sized chunks. Integer conversions
+    in :mod:`versile.common.util` are also checked.
+
+    Input is generated deterministically from *seed*\ , so results
+    of the same arguments can be compared between processes which
+    do and do not load the native extension.
+
+    """
+    from versile.common.util import posint_to_netbytes, netbytes_to_posint
+    from versile.common.util import signedint_to_netbytes
+    from versile.common.util import netbytes_to_signedint
+    from versile.orb.entity import VEntity, VIOContext
+
+    rand = random.Random(seed)
+    results = []
+    for i in range(count):
+        entity = _random_entity(rand, 4)
+        ctx = _context(rand)
+        data = entity._v_write(ctx)
+        results.append('encode %s' % _hex(data))
+        results.append('decode %s' % _decode(data, ctx))
+        results.append('reader %s' % _read(data, ctx, rand))
+
+        # Truncated and corrupted data
+        cut = data[:rand.randrange(len(data))]
+        results.append('decode-cut %s' % _decode(cut, ctx))
+        results.append('reader-cut %s' % _read(cut, ctx, rand))
+        bad = bytearray(data)
+        bad[rand.randrange(len(bad))] = rand.randrange(256)
+        bad = bytes(bad)
+        results.append('decode-bad %s' % _decode(bad, _context(rand)))
+        results.append('reader-bad %s' % _read(bad, _context(rand), rand))
+
+        # Random data
+        noise = _random_bytes(rand, rand.randrange(1, 40))
+        results.append('decode-noise %s' % _decode(noise, VIOContext()))
+        results.append('reader-noise %s' % _read(noise, VIOContext(), rand))
+
+        # Integer conversions
+        number = _random_int(rand)
+        results.append('netbytes %s' % _call(signedint_to_netbytes, number))
+        results.append('netbytes %s' % _call(posint_to_netbytes, abs(number)))
+        results.append('netbytes %s' % _call(netbytes_to_signedint, noise))
+        results.append('netbytes %s' % _call(netbytes_to_posint, noise))
+    return results
+
+
+def _random_entity(rand, depth):
+    from versile.orb.entity import VInteger, VBoolean, VNone, VBytes
+    from versile.orb.entity import VString, VTuple
+
+    kind = rand.randrange(6 if depth > 0 else 5)
+    if kind == 0:
+        return VInteger(_random_int(rand))
+    elif kind == 1:
+        return VBytes(_random_bytes(rand, _random_len(rand)))
+    elif kind == 2:
+        return VString(_random_unicode(rand, _random_len(rand)))
+    elif kind == 3:
+        return VBoolean(rand.random() < 0.5)
+    elif kind == 4:
+        return VNone()
+    else:
+        size = rand.choice((0, 1, 2, 5, 20, 300))
+        if size > 5:
+            depth = 1
+        return VTuple([_random_entity(rand, depth - 1) for i in range(size)])
+
+def _random_int(rand):
+    bits = rand.choice((3, 7, 8, 16, 31, 32, 63, 64, 65, 200))
+    value = rand.getrandbits(bits)
+    if rand.random() < 0.5:
+        value = -value
+    return value
+
+def _random_len(rand):
+    return rand.choice((0, 1, 10, 246, 247, 300, 5000))
+
+def _random_bytes(rand, num):
+    return bytes(bytearray([rand.randrange(256) for i in range(num)]))
+
+def _random_unicode(rand, num):
+    if _pyver == 2:
+        _chr = unichr
+    else:
+        _chr = chr
+    chars = []
+    for i in range(num):
+        char_range = rand.choice((0x80, 0x800, 0xd800))
+        chars.append(_chr(rand.randrange(char_range)))
+    return ''.join(chars)
+
+def _context(rand):
+    from versile.orb.entity import VIOContext
+
+    ctx = VIOContext()
+    ctx.str_encoding = ctx.str_decoding = rand.choice((b'utf8', b'utf-16'))
+    if rand.random() < 0.2:
+        ctx.bytes_threshold = rand.choice((0, 10, 300))
+        if rand.random() < 0.5:
+            ctx.bytes_sink = _sized_sink
+    return ctx
+
+def _sized_sink(length):
+    """Returns a bytes sink which is falsy until data is written."""
+    from versile.orb.entity import VBytesSink
+
+    class _SizedSink(VBytesSink):
+        def __init__(self, length):
+            super(_SizedSink, self).__init__(length)
+            self._written = 0
+
+        def __len__(self):
+            return self._written
+
+        def write(self, data):
+            super(_SizedSink, self).write(data)
+            self._written += len(data)
+    return _SizedSink(length)
+
+def _decode(data, ctx):
+    from versile.orb.entity import VEntity
+
+    try:
+        entity, num_read = VEntity._v_decode_bytes(data, ctx)
+    except Exception as e:
+        return _exc(e)
+    return '%s %s' % (_describe(entity), num_read)
+
+def _read(data, ctx, rand):
+    from versile.orb.entity import VEntity
+
+    reader = VEntity._v_reader(ctx)
+    num_read, pos = 0, 0
+    try:
+        while pos < len(data) and not reader.done():
+            chunk = data[pos:(pos + rand.choice((1, 3, 64, len(data))))]
+            num_read += reader.read(chunk)
+            pos += len(chunk)
+        if not reader.done():
+            return 'incomplete %s' % num_read
+        return '%s %s' % (_describe(reader.result()), num_read)
+    except Exception as e:
+        return _exc(e)
+
+def _call(func, arg):
+    try:
+        result = func(arg)
+    except Exception as e:
+        return _exc(e)
+    if isinstance(result, bytes):
+        return _hex(result)
+    return '%r' % (result,)
+
+def _describe(entity):
+    from versile.orb.entity import VTuple, VStreamedBytes
+
+    if entity is None:
+        return 'None'
+    elif isinstance(entity, VTuple):
+        items = ', '.join([_describe(e) for e in entity._v_value])
+        return 'VTuple(%s)' % items
+    elif isinstance(entity, VStreamedBytes):
+        return 'VStreamedBytes(%s)' % _hex(entity.payload[:])
+    value = getattr(entity, '_v_value', entity)
+    return '%s(%r)' % (type(entity).__name__, value)
+
+def _exc(e):
+    return 'raised %s' % type(e).__name__
+
+def _hex(data):
+    return ''.join(['%02x' % b for b in bytearray(data)])
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--results']:
+        seed, count = [int(arg) for arg in sys.argv[2:4]]
+        report(speedups_results(seed, count))
+    else:
+        unittest.main()
@@ -0,0 +1,1681 @@
+/* Copyright (C) 2011-2013 Versile AS
+ *
+ * This file is part of Versile Python.
+ *
+ * Versile Python is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+/* Optional native implementation of entity codec primitives.
+ *
+ * Functions have the same signatures and results as the pure-python
+ * implementations in versile.common.util and versile.orb.entity,
+ * which are replaced by the functions of this module when it is
+ * available. The serialized format is not affected.
+ *
+ * The module also implements the decoders for VInteger, VBytes,
+ * VTuple and VString data. They are used as base classes for the
+ * decoder classes of versile.orb.entity, which registers its entity
+ * types with set_entity_types().
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#if PY_MAJOR_VERSION >= 3
+#define VS_INT_CHECK(o)       PyLong_Check(o)
+#define VS_BYTES_FROM(s, n)   PyBytes_FromStringAndSize(s, n)
+#define VS_BYTES_AS(o)        PyBytes_AS_STRING(o)
+#define VS_BYTES_SIZE(o)      PyBytes_GET_SIZE(o)
+#define VS_BYTES_CHECK(o)     PyBytes_Check(o)
+#define VS_INT_FROM_LONG(v)   PyLong_FromLong(v)
+#define VS_INT_FROM_SSIZE(v)  PyLong_FromSsize_t(v)
+#define VS_INTERN(s)          PyUnicode_InternFromString(s)
+#else
+#define VS_INT_CHECK(o)       (PyInt_Check(o) || PyLong_Check(o))
+#define VS_BYTES_FROM(s, n)   PyString_FromStringAndSize(s, n)
+#define VS_BYTES_AS(o)        PyString_AS_STRING(o)
+#define VS_BYTES_SIZE(o)      PyString_GET_SIZE(o)
+#define VS_BYTES_CHECK(o)     PyString_Check(o)
+#define VS_INT_FROM_LONG(v)   PyInt_FromLong(v)
+#define VS_INT_FROM_SSIZE(v)  PyInt_FromSsize_t(v)
+#define VS_INTERN(s)          PyString_InternFromString(s)
+#endif
+
+#if PY_VERSION_HEX >= 0x030D0000
+#define VS_LONG_AS_BYTES(v, b, n) _PyLong_AsByteArray(            \
+        (PyLongObject *)(v), b, n, 0, 0, 1)
+#else
+#define VS_LONG_AS_BYTES(v, b, n) _PyLong_AsByteArray(            \
+        (PyLongObject *)(v), b, n, 0, 0)
+#endif
+
+/* Largest netbytes encoding of an unsigned 64-bit integer */
+#define VS_MAX_SMALL 9
+
+static PyObject *vs_zero = NULL;
+static PyObject *vs_offset = NULL;
+static PyObject *vs_nine = NULL;
+static PyObject *vs_one = NULL;
+static PyObject *vs_two = NULL;
+
+
+/* Returns an integer object for a non-negative value */
+static PyObject *
+vs_from_ull(unsigned PY_LONG_LONG value)
+{
+#if PY_MAJOR_VERSION < 3
+    if (value <= (unsigned PY_LONG_LONG)LONG_MAX)
+        return PyInt_FromLong((long)value);
+#endif
+    return PyLong_FromUnsignedLongLong(value);
+}
+
+/* Returns (number + 247) for the big-endian representation of number */
+static PyObject *
+vs_from_bytes(const unsigned char *buf, Py_ssize_t num_bytes)
+{
+    unsigned PY_LONG_LONG value = 0;
+    PyObject *number, *result;
+    Py_ssize_t i;
+
+    if (num_bytes <= 8) {
+        for (i = 0; i < num_bytes; i++)
+            value = (value << 8) | buf[i];
+        if (value <= ((unsigned PY_LONG_LONG)-1) - 247)
+            return vs_from_ull(value + 247);
+    }
+    number = _PyLong_FromByteArray(buf, (size_t)num_bytes, 0, 0);
+    if (number == NULL)
+        return NULL;
+    result = PyNumber_Add(number, vs_offset);
+    Py_DECREF(number);
+    return result;
+}
+
+/* Writes the netbytes encoding of value to buf, returns bytes written */
+static Py_ssize_t
+vs_encode_small(unsigned PY_LONG_LONG value, unsigned char *buf)
+{
+    unsigned char data[8];
+    Py_ssize_t num_bytes = 0, i;
+
+    if (value <= 246) {
+        buf[0] = (unsigned char)value;
+        return 1;
+    }
+    value -= 247;
+    do {
+        data[num_bytes++] = (unsigned char)(value & 0xff);
+        value >>= 8;
+    } while (value);
+    buf[0] = (unsigned char)(246 + num_bytes);
+    for (i = 0; i < num_bytes; i++)
+        buf[1 + i] = data[num_bytes - 1 - i];
+    return num_bytes + 1;
+}
+
+/* Returns netbytes encoding with a one-byte prefix (if code >= 0) of a
+ * non-negative integer which does not fit in an unsigned 64-bit
+ * integer */
+static PyObject *
+vs_encode_long(int code, PyObject *number)
+{
+    unsigned char head[1 + 2*VS_MAX_SMALL];
+    PyObject *value, *result = NULL;
+    Py_ssize_t head_len = 0, num_bytes;
+    size_t num_bits;
+
+    if (code >= 0)
+        head[head_len++] = (unsigned char)code;
+
+    value = PyNumber_Subtract(number, vs_offset);
+    if (value == NULL)
+        return NULL;
+#if PY_MAJOR_VERSION < 3
+    if (!PyLong_Check(value)) {
+        PyObject *tmp = PyNumber_Long(value);
+        Py_DECREF(value);
+        if (tmp == NULL)
+            return NULL;
+        value = tmp;
+    }
+#endif
+    num_bits = _PyLong_NumBits(value);
+    if (num_bits == (size_t)-1 && PyErr_Occurred())
+        goto done;
+    num_bytes = (Py_ssize_t)((num_bits + 7) / 8);
+    if (num_bytes == 0)
+        num_bytes = 1;
+    if (num_bytes <= 8) {
+        head[head_len++] = (unsigned char)(246 + num_bytes);
+    }
+    else {
+        head[head_len++] = 0xff;
+        head_len += vs_encode_small((unsigned PY_LONG_LONG)(num_bytes - 9),
+                                    head + head_len);
+    }
+
+    result = VS_BYTES_FROM(NULL, head_len + num_bytes);
+    if (result == NULL)
+        goto done;
+    memcpy(VS_BYTES_AS(result), head, head_len);
+    if (VS_LONG_AS_BYTES(value, (unsigned char *)VS_BYTES_AS(result)
+                         + head_len, (size_t)num_bytes) < 0) {
+        Py_CLEAR(result);
+    }
+
+done:
+    Py_DECREF(value);
+    return result;
+}
+
+/* Returns netbytes encoding with a one-byte prefix (if code >= 0) of a
+ * non-negative integer object, sets TypeError on invalid number */
+static PyObject *
+vs_encode(int code, PyObject *number)
+{
+    unsigned char buf[1 + VS_MAX_SMALL];
+    unsigned PY_LONG_LONG value;
+    Py_ssize_t pos = 0;
+    int negative;
+
+    if (!VS_INT_CHECK(number))
+        goto type_error;
+#if PY_MAJOR_VERSION < 3
+    if (PyInt_Check(number)) {
+        long _val = PyInt_AS_LONG(number);
+        if (_val < 0)
+            goto type_error;
+        value = (unsigned PY_LONG_LONG)_val;
+    }
+    else
+#endif
+    {
+        value = PyLong_AsUnsignedLongLong(number);
+        if (value == (unsigned PY_LONG_LONG)-1 && PyErr_Occurred()) {
+            if (!PyErr_ExceptionMatches(PyExc_OverflowError))
+                return NULL;
+            PyErr_Clear();
+            negative = PyObject_RichCompareBool(number, vs_zero, Py_LT);
+            if (negative < 0)
+                return NULL;
+            else if (negative)
+                goto type_error;
+            return vs_encode_long(code, number);
+        }
+    }
+
+    if (code >= 0)
+        buf[pos++] = (unsigned char)code;
+    pos += vs_encode_small(value, buf + pos);
+    return VS_BYTES_FROM((const char *)buf, pos);
+
+type_error:
+    PyErr_SetString(PyExc_TypeError,
+                    "Number must be a non-negative integer");
+    return NULL;
+}
+
+/* Returns the netbytes unsigned representation of a signed integer */
+static PyObject *
+vs_encode_signed(PyObject *number)
+{
+    PY_LONG_LONG value;
+    PyObject *unsigned_num, *result;
+    int overflow;
+
+    if (!VS_INT_CHECK(number)) {
+        PyErr_SetString(PyExc_TypeError, "Number must be an integer");
+        return NULL;
+    }
+    value = PyLong_AsLongLongAndOverflow(number, &overflow);
+    if (value == -1 && PyErr_Occurred())
+        return NULL;
+    if (!overflow && value >= 0) {
+        unsigned char buf[VS_MAX_SMALL];
+        Py_ssize_t num_bytes;
+        num_bytes = vs_encode_small(2*(unsigned PY_LONG_LONG)value, buf);
+        return VS_BYTES_FROM((const char *)buf, num_bytes);
+    }
+    else if (!overflow && value >= -PY_LLONG_MAX) {
+        unsigned char buf[VS_MAX_SMALL];
+        Py_ssize_t num_bytes;
+        num_bytes = vs_encode_small(2*(unsigned PY_LONG_LONG)(-value) + 1,
+                                    buf);
+        return VS_BYTES_FROM((const char *)buf, num_bytes);
+    }
+
+    /* Slow path, (2*number) or (-2*number + 1) */
+    if (overflow > 0) {
+        unsigned_num = PyNumber_Add(number, number);
+    }
+    else {
+        PyObject *tmp = PyNumber_Negative(number);
+        if (tmp == NULL)
+            return NULL;
+        unsigned_num = PyNumber_Add(tmp, tmp);
+        Py_DECREF(tmp);
+        if (unsigned_num != NULL) {
+            tmp = PyNumber_Add(unsigned_num, vs_one);
+            Py_DECREF(unsigned_num);
+            unsigned_num = tmp;
+        }
+    }
+    if (unsigned_num == NULL)
+        return NULL;
+    result = vs_encode(-1, unsigned_num);
+    Py_DECREF(unsigned_num);
+    return result;
+}
+
+/* Decodes netbytes at buf[pos:end]. Returns 1 and sets *number and
+ * *new_pos if complete, 0 if incomplete, or -1 on error */
+static int
+vs_decode(const unsigned char *buf, Py_ssize_t pos, Py_ssize_t end,
+          PyObject **number, Py_ssize_t *new_pos)
+{
+    Py_ssize_t num_bytes, start;
+    unsigned char first_byte;
+
+    if (pos >= end)
+        return 0;
+    first_byte = buf[pos];
+    if (first_byte <= 246) {
+        *number = vs_from_ull(first_byte);
+        *new_pos = pos + 1;
+        return (*number == NULL) ? -1 : 1;
+    }
+    if (first_byte < 255) {
+        num_bytes = first_byte - 246;
+        start = pos + 1;
+    }
+    else {
+        PyObject *len_obj;
+        int status = vs_decode(buf, pos + 1, end, &len_obj, &start);
+        if (status <= 0)
+            return status;
+        num_bytes = PyNumber_AsSsize_t(len_obj, NULL);
+        Py_DECREF(len_obj);
+        if (num_bytes == -1 && PyErr_Occurred())
+            return -1;
+        if (num_bytes > end - start - 9)
+            return 0;
+        num_bytes += 9;
+    }
+    if (num_bytes > end - start)
+        return 0;
+    *number = vs_from_bytes(buf + start, num_bytes);
+    *new_pos = start + num_bytes;
+    return (*number == NULL) ? -1 : 1;
+}
+
+/* Implements netbytes_to_posint for a buffer */
+static PyObject *
+vs_decode_info(const unsigned char *buf, Py_ssize_t len)
+{
+    PyObject *inner, *len_obj, *info, *number, *result;
+    Py_ssize_t num_bytes, bytes_read;
+    unsigned char first_byte;
+
+    if (len <= 0)
+        return Py_BuildValue("(O(OO))", Py_None, Py_None, Py_None);
+
+    first_byte = buf[0];
+    if (first_byte <= 246)
+        return Py_BuildValue("(Nn)", vs_from_ull(first_byte),
+                             (Py_ssize_t)1);
+
+    if (first_byte < 255) {
+        num_bytes = first_byte - 246;
+        if (len >= num_bytes + 1) {
+            number = vs_from_bytes(buf + 1, num_bytes);
+            if (number == NULL)
+                return NULL;
+            return Py_BuildValue("(Nn)", number, num_bytes + 1);
+        }
+        return Py_BuildValue("(O(nn))", Py_None, num_bytes, num_bytes);
+    }
+
+    inner = vs_decode_info(buf + 1, len - 1);
+    if (inner == NULL)
+        return NULL;
+    len_obj = PyTuple_GET_ITEM(inner, 0);
+    info = PyTuple_GET_ITEM(inner, 1);
+    if (len_obj != Py_None) {
+        len_obj = PyNumber_Add(len_obj, vs_nine);
+        bytes_read = PyNumber_AsSsize_t(info, NULL);
+        Py_DECREF(inner);
+        if (len_obj == NULL)
+            return NULL;
+        num_bytes = PyNumber_AsSsize_t(len_obj, NULL);
+        if (num_bytes == -1 && PyErr_Occurred()) {
+            Py_DECREF(len_obj);
+            return NULL;
+        }
+        if (num_bytes <= len - bytes_read - 1) {
+            Py_DECREF(len_obj);
+            number = vs_from_bytes(buf + 1 + bytes_read, num_bytes);
+            if (number == NULL)
+                return NULL;
+            return Py_BuildValue("(Nn)", number,
+                                 1 + bytes_read + num_bytes);
+        }
+        return Py_BuildValue("(O(NO))", Py_None, len_obj, len_obj);
+    }
+    else {
+        PyObject *min_bytes = PyTuple_GET_ITEM(info, 0);
+        PyObject *max_bytes = PyTuple_GET_ITEM(info, 1);
+        if (min_bytes == Py_None)
+            min_bytes = vs_nine;
+        result = Py_BuildValue("(O(OO))", Py_None, min_bytes, max_bytes);
+        Py_DECREF(inner);
+        return result;
+    }
+}
+
+/* Returns the signed integer for a netbytes unsigned representation */
+static PyObject *
+vs_signed(PyObject *unsigned_num)
+{
+    PyObject *shifted, *low_bit, *number;
+    int odd;
+
+#if PY_MAJOR_VERSION < 3
+    if (PyInt_Check(unsigned_num)) {
+        long value = PyInt_AS_LONG(unsigned_num);
+        odd = (int)(value & 0x1);
+        value >>= 1;
+        return PyInt_FromLong(odd ? -value : value);
+    }
+#endif
+    low_bit = PyNumber_And(unsigned_num, vs_one);
+    if (low_bit == NULL)
+        return NULL;
+    odd = PyObject_IsTrue(low_bit);
+    Py_DECREF(low_bit);
+    shifted = PyNumber_Rshift(unsigned_num, vs_one);
+    if (shifted == NULL || !odd)
+        return shifted;
+    number = PyNumber_Negative(shifted);
+    Py_DECREF(shifted);
+    return number;
+}
+
+
+PyDoc_STRVAR(posint_to_netbytes__doc__,
+"posint_to_netbytes(number) -> bytes\n\n"
+"Converts a non-negative integer to a VP byte representation.");
+
+static PyObject *
+posint_to_netbytes(PyObject *self, PyObject *number)
+{
+    return vs_encode(-1, number);
+}
+
+PyDoc_STRVAR(signedint_to_netbytes__doc__,
+"signedint_to_netbytes(number) -> bytes\n\n"
+"Converts an integer to a VP byte representation.");
+
+static PyObject *
+signedint_to_netbytes(PyObject *self, PyObject *number)
+{
+    return vs_encode_signed(number);
+}
+
+PyDoc_STRVAR(netbytes_to_posint__doc__,
+"netbytes_to_posint(data) -> (number, bytes_read)"
+" or (None, (min_bytes, max_bytes))\n\n"
+"Converts non-negative integer from a VP bytes representation.");
+
+static PyObject *
+netbytes_to_posint(PyObject *self, PyObject *data)
+{
+    Py_buffer view;
+    PyObject *result;
+
+    if (PyObject_GetBuffer(data, &view, PyBUF_SIMPLE) < 0)
+        return NULL;
+    result = vs_decode_info((const unsigned char *)view.buf, view.len);
+    PyBuffer_Release(&view);
+    return result;
+}
+
+PyDoc_STRVAR(netbytes_to_signedint__doc__,
+"netbytes_to_signedint(data) -> (number, bytes_read)"
+" or (None, (min_bytes, max_bytes))\n\n"
+"Converts signed integer from network suitable byte representation.");
+
+static PyObject *
+netbytes_to_signedint(PyObject *self, PyObject *data)
+{
+    PyObject *result, *unsigned_num, *number;
+
+    result = netbytes_to_posint(self, data);
+    if (result == NULL)
+        return NULL;
+    unsigned_num = PyTuple_GET_ITEM(result, 0);
+    if (unsigned_num == Py_None)
+        return result;
+    number = vs_signed(unsigned_num);
+    if (number == NULL) {
+        Py_DECREF(result);
+        return NULL;
+    }
+    PyTuple_SET_ITEM(result, 0, number);
+    Py_DECREF(unsigned_num);
+    return result;
+}
+
+PyDoc_STRVAR(bulk_posint__doc__,
+"bulk_posint(data, pos, end) -> (number, new_pos) or (None, pos)\n\n"
+"Decodes a netbytes integer at data[pos:end].");
+
+static PyObject *
+bulk_posint(PyObject *self, PyObject *args)
+{
+    Py_buffer view;
+    PyObject *data, *number;
+    Py_ssize_t pos, end, new_pos;
+    int status;
+
+    if (!PyArg_ParseTuple(args, "Onn:bulk_posint", &data, &pos, &end))
+        return NULL;
+    if (PyObject_GetBuffer(data, &view, PyBUF_SIMPLE) < 0)
+        return NULL;
+    if (end > view.len)
+        end = view.len;
+    if (pos < 0)
+        status = 0;
+    else
+        status = vs_decode((const unsigned char *)view.buf, pos, end,
+                           &number, &new_pos);
+    PyBuffer_Release(&view);
+    if (status < 0)
+        return NULL;
+    else if (status == 0)
+        return Py_BuildValue("(On)", Py_None, pos);
+    return Py_BuildValue("(Nn)", number, new_pos);
+}
+
+PyDoc_STRVAR(entity_header__doc__,
+"entity_header(code, number) -> bytes\n\n"
+"Returns an entity code byte followed by netbytes encoding of number.");
+
+static PyObject *
+entity_header(PyObject *self, PyObject *args)
+{
+    PyObject *number;
+    int code;
+
+    if (!PyArg_ParseTuple(args, "iO:entity_header", &code, &number))
+        return NULL;
+    if (code < 0 || code > 0xff) {
+        PyErr_SetString(PyExc_ValueError, "Invalid entity code");
+        return NULL;
+    }
+    return vs_encode(code, number);
+}
+
+
+/* Native entity decoders
+ *
+ * The types implement the decoder interface of
+ * versile.orb.entity.VEntityDecoderBase for VInteger, VBytes, VTuple
+ * and VString, and are used as base classes of the decoder classes of
+ * versile.orb.entity. Entity classes and other objects the decoders
+ * depend on are registered with set_entity_types().
+ */
+
+#define VS_CODE_START        0xef
+#define VS_CODE_VINT_POS     0xef
+#define VS_CODE_VINT_NEG     0xf0
+#define VS_CODE_VBYTES       0xf3
+#define VS_CODE_VSTRING      0xf4
+#define VS_CODE_VSTRING_ENC  0xf5
+#define VS_CODE_VTUPLE       0xf6
+
+/* Bytes peeked for decoding a header, which holds any header with a
+ * netbytes encoded number of up to 64 bits */
+#define VS_PEEK_LEN 16
+
+enum { VS_INT, VS_BYTES, VS_TUPLE, VS_STRING };
+
+static PyObject *vs_vinteger = NULL;
+static PyObject *vs_vbytes = NULL;
+static PyObject *vs_vtuple = NULL;
+static PyObject *vs_vstring = NULL;
+static PyObject *vs_bytes_sink = NULL;
+static PyObject *vs_entity_decoder = NULL;
+static PyObject *vs_bytes_decoder = NULL;
+static PyObject *vs_int_interned = NULL;
+static PyObject *vs_reader_error = NULL;
+
+static PyObject *vs_empty = NULL;
+static PyObject *vs_s_v_value = NULL;
+static PyObject *vs_s_peek = NULL;
+static PyObject *vs_s_pop_list = NULL;
+static PyObject *vs_s_remove = NULL;
+static PyObject *vs_s_write = NULL;
+static PyObject *vs_s_result = NULL;
+static PyObject *vs_s_bytes_threshold = NULL;
+static PyObject *vs_s_bytes_sink = NULL;
+static PyObject *vs_s_str_decoding = NULL;
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *context;
+    PyObject *header;       /* partial header data, or NULL */
+    PyObject *min_est;      /* min_obj or min_payload header estimate */
+    PyObject *result;       /* decoded entity, or NULL */
+    PyObject *payload;      /* list of payload chunks, or NULL */
+    PyObject *sink;         /* sink for streamed payload, or NULL */
+    Py_ssize_t elements;    /* tuple elements or bytes payload length */
+    Py_ssize_t payload_read;
+    int kind;
+    int explicit;
+    int have_code;
+    int header_done;
+    int flag;               /* negative VInteger or VString with codec */
+} vs_decoder;
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *factory;
+    PyObject *args;
+    Py_ssize_t remaining;
+} vs_decoder_iter;
+
+static PyTypeObject vs_decoder_iter_type;
+
+
+/* Returns a new instance of an entity type holding value, bypassing
+ * the type's constructor */
+static PyObject *
+vs_new_entity(PyObject *type, PyObject *value)
+{
+    PyObject *entity;
+
+    entity = ((PyTypeObject *)type)->tp_alloc((PyTypeObject *)type, 0);
+    if (entity == NULL)
+        return NULL;
+    if (PyObject_GenericSetAttr(entity, vs_s_v_value, value) < 0) {
+        Py_DECREF(entity);
+        return NULL;
+    }
+    return entity;
+}
+
+/* Returns a VInteger for a number, using interned instances */
+static PyObject *
+vs_new_integer(PyObject *number)
+{
+    PyObject *entity;
+
+#if PY_MAJOR_VERSION >= 3
+    if (PyLong_CheckExact(number)) {
+#else
+    if (PyInt_CheckExact(number)) {
+#endif
+        entity = PyDict_GetItem(vs_int_interned, number);
+        if (entity != NULL) {
+            Py_INCREF(entity);
+            return entity;
+        }
+    }
+    return vs_new_entity(vs_vinteger, number);
+}
+
+static PyObject *
+vs_reader_err(const char *msg)
+{
+    PyErr_SetString(vs_reader_error, msg);
+    return NULL;
+}
+
+/* Returns (num_read, done, min_obj, min_payload) decoder status */
+static PyObject *
+vs_header_status(vs_decoder *self, Py_ssize_t num_read, int done)
+{
+    PyObject *min_obj, *min_payload, *flag;
+
+    if (self->kind == VS_BYTES) {
+        min_obj = vs_one;
+        min_payload = self->min_est;
+    }
+    else {
+        min_obj = self->min_est;
+        min_payload = vs_zero;
+    }
+    flag = done ? Py_True : Py_False;
+    return Py_BuildValue("(nOOO)", num_read, flag, min_obj, min_payload);
+}
+
+static void
+vs_set_min_est(vs_decoder *self, PyObject *min_est)
+{
+    Py_XDECREF(self->min_est);
+    self->min_est = min_est;
+}
+
+static int
+vs_set_min_est_size(vs_decoder *self, Py_ssize_t value)
+{
+    PyObject *min_est = VS_INT_FROM_SSIZE(value);
+    if (min_est == NULL)
+        return -1;
+    vs_set_min_est(self, min_est);
+    return 0;
+}
+
+static int
+vs_remove(PyObject *data, Py_ssize_t num_bytes)
+{
+    PyObject *num, *result;
+
+    num = VS_INT_FROM_SSIZE(num_bytes);
+    if (num == NULL)
+        return -1;
+    result = PyObject_CallMethodObjArgs(data, vs_s_remove, num, NULL);
+    Py_DECREF(num);
+    if (result == NULL)
+        return -1;
+    Py_DECREF(result);
+    return 0;
+}
+
+static PyObject *
+vs_call_num(PyObject *data, PyObject *method, Py_ssize_t num_bytes)
+{
+    PyObject *num, *result;
+
+    num = VS_INT_FROM_SSIZE(num_bytes);
+    if (num == NULL)
+        return NULL;
+    result = PyObject_CallMethodObjArgs(data, method, num, NULL);
+    Py_DECREF(num);
+    return result;
+}
+
+/* Sets the decoded number of a VInteger, VBytes or VTuple header */
+static int
+vs_header_number(vs_decoder *self, PyObject *number)
+{
+    PyObject *value, *tmp;
+
+    if (self->kind == VS_INT) {
+        if (!self->explicit) {
+            value = vs_signed(number);
+        }
+        else if (self->flag) {
+            tmp = PyNumber_Add(number, vs_two);
+            if (tmp == NULL)
+                return -1;
+            value = PyNumber_Negative(tmp);
+            Py_DECREF(tmp);
+        }
+        else {
+            tmp = vs_from_ull(VS_CODE_START - 1);
+            if (tmp == NULL)
+                return -1;
+            value = PyNumber_Add(number, tmp);
+            Py_DECREF(tmp);
+        }
+        if (value == NULL)
+            return -1;
+        self->result = vs_new_integer(value);
+        Py_DECREF(value);
+        return (self->result == NULL) ? -1 : 0;
+    }
+
+    self->elements = PyNumber_AsSsize_t(number, NULL);
+    if (self->elements == -1 && PyErr_Occurred()) {
+        PyErr_Clear();
+        vs_reader_err("Header length exceeds limits");
+        return -1;
+    }
+    if (self->kind == VS_TUPLE)
+        return vs_set_min_est_size(self, self->elements + 1);
+    return vs_set_min_est_size(self, self->elements);
+}
+
+/* Sets header estimate from (min_bytes, max_bytes) of incomplete data */
+static int
+vs_header_estimate(vs_decoder *self, PyObject *info)
+{
+    PyObject *min_bytes, *shift, *min_est;
+
+    if (self->kind == VS_INT)
+        return 0;
+    min_bytes = PyTuple_GET_ITEM(info, 0);
+    if (min_bytes == Py_None) {
+        Py_INCREF(self->kind == VS_TUPLE ? vs_one : vs_zero);
+        vs_set_min_est(self, self->kind == VS_TUPLE ? vs_one : vs_zero);
+        return 0;
+    }
+    if (self->kind == VS_TUPLE) {
+        Py_INCREF(min_bytes);
+        shift = min_bytes;
+    }
+    else {
+        shift = PyNumber_Subtract(min_bytes, vs_one);
+        if (shift == NULL)
+            return -1;
+    }
+    min_est = PyNumber_Lshift(vs_one, shift);
+    Py_DECREF(shift);
+    if (min_est == NULL)
+        return -1;
+    vs_set_min_est(self, min_est);
+    return 0;
+}
+
+/* Checks an entity code, returns 1 if header was completed */
+static int
+vs_header_code(vs_decoder *self, unsigned char code)
+{
+    switch (self->kind) {
+    case VS_INT:
+        if (code < VS_CODE_START) {
+            PyObject *number = VS_INT_FROM_LONG((long)code - 1);
+            if (number == NULL)
+                return -1;
+            self->result = vs_new_integer(number);
+            Py_DECREF(number);
+            return (self->result == NULL) ? -1 : 1;
+        }
+        else if (code == VS_CODE_VINT_POS || code == VS_CODE_VINT_NEG) {
+            self->flag = (code == VS_CODE_VINT_NEG);
+            return 0;
+        }
+        vs_reader_err("Invalid VInteger code");
+        return -1;
+    case VS_BYTES:
+        if (code == VS_CODE_VBYTES)
+            return 0;
+        vs_reader_err("Invalid VBytes code");
+        return -1;
+    case VS_TUPLE:
+        if (code == VS_CODE_VTUPLE)
+            return 0;
+        vs_reader_err("Invalid VTuple code");
+        return -1;
+    default:
+        if (code == VS_CODE_VSTRING || code == VS_CODE_VSTRING_ENC) {
+            self->flag = (code == VS_CODE_VSTRING_ENC);
+            if (vs_set_min_est_size(self, self->flag ? 3 : 2) < 0)
+                return -1;
+            return 1;
+        }
+        vs_reader_err("Invalid VString code");
+        return -1;
+    }
+}
+
+/* Decodes header from a window of peeked data. Returns bytes read and
+ * sets *done, or returns -1 on error. Sets *done to -1 if the window
+ * was too short to decide whether the header is complete. */
+static Py_ssize_t
+vs_decode_window(vs_decoder *self, const unsigned char *buf,
+                 Py_ssize_t len, int truncated, int *done)
+{
+    PyObject *header = NULL, *info, *number;
+    const unsigned char *num_buf;
+    Py_ssize_t pos = 0, num_len, old_len = 0, used;
+    int status;
+
+    *done = 0;
+    if (!self->have_code) {
+        if (self->explicit || self->kind == VS_STRING) {
+            status = vs_header_code(self, buf[0]);
+            if (status < 0)
+                return -1;
+            pos = 1;
+            if (status) {
+                *done = 1;
+                return pos;
+            }
+        }
+        self->have_code = 1;
+    }
+    if (pos == len)
+        return pos;
+
+    if (self->header != NULL) {
+        old_len = VS_BYTES_SIZE(self->header);
+        header = VS_BYTES_FROM(NULL, old_len + len - pos);
+        if (header == NULL)
+            return -1;
+        memcpy(VS_BYTES_AS(header), VS_BYTES_AS(self->header), old_len);
+        memcpy(VS_BYTES_AS(header) + old_len, buf + pos, len - pos);
+        num_buf = (const unsigned char *)VS_BYTES_AS(header);
+        num_len = old_len + len - pos;
+    }
+    else {
+        num_buf = buf + pos;
+        num_len = len - pos;
+    }
+
+    info = vs_decode_info(num_buf, num_len);
+    if (info == NULL)
+        goto fail;
+    number = PyTuple_GET_ITEM(info, 0);
+    if (number != Py_None) {
+        used = PyNumber_AsSsize_t(PyTuple_GET_ITEM(info, 1), NULL);
+        if ((used == -1 && PyErr_Occurred())
+            || vs_header_number(self, number) < 0) {
+            Py_DECREF(info);
+            goto fail;
+        }
+        Py_DECREF(info);
+        Py_XDECREF(header);
+        Py_CLEAR(self->header);
+        *done = 1;
+        return pos + used - old_len;
+    }
+    else if (truncated) {
+        Py_DECREF(info);
+        Py_XDECREF(header);
+        *done = -1;
+        return pos;
+    }
+    if (vs_header_estimate(self, PyTuple_GET_ITEM(info, 1)) < 0) {
+        Py_DECREF(info);
+        goto fail;
+    }
+    Py_DECREF(info);
+    if (header == NULL) {
+        header = VS_BYTES_FROM((const char *)num_buf, num_len);
+        if (header == NULL)
+            return -1;
+    }
+    Py_XDECREF(self->header);
+    self->header = header;
+    return len;
+
+fail:
+    Py_XDECREF(header);
+    return -1;
+}
+
+PyDoc_STRVAR(vs_decode_header__doc__,
+"decode_header(data) -> (num_read, done, min_obj, min_payload)\n\n"
+"Decodes header data, see VEntityDecoderBase.decode_header.");
+
+static PyObject *
+vs_decode_header(vs_decoder *self, PyObject *data)
+{
+    PyObject *window;
+    Py_buffer view;
+    Py_ssize_t peek_len = VS_PEEK_LEN, num_read = 0, num_bytes;
+    int done = 0;
+
+    if (self->header_done)
+        return vs_header_status(self, 0, 1);
+
+    while (1) {
+        window = vs_call_num(data, vs_s_peek, peek_len);
+        if (window == NULL)
+            return NULL;
+        if (PyObject_GetBuffer(window, &view, PyBUF_SIMPLE) < 0) {
+            Py_DECREF(window);
+            return NULL;
+        }
+        if (view.len <= num_read) {
+            num_bytes = 0;
+            done = 0;
+        }
+        else {
+            num_bytes = vs_decode_window(
+                self, (const unsigned char *)view.buf + num_read,
+                view.len - num_read, (peek_len == view.len), &done);
+        }
+        PyBuffer_Release(&view);
+        Py_DECREF(window);
+        if (num_bytes < 0)
+            return NULL;
+        num_read += num_bytes;
+        if (done >= 0)
+            break;
+        /* Header did not fit in peeked data, retry with all data */
+        peek_len = -1;
+    }
+    if (num_read > 0 && vs_remove(data, num_read) < 0)
+        return NULL;
+    self->header_done = done;
+    return vs_header_status(self, num_read, done);
+}
+
+PyDoc_STRVAR(vs_get_payload_len__doc__,
+"get_payload_len() -> int\n\n"
+"Returns payload length as defined by the header.");
+
+static PyObject *
+vs_get_payload_len(vs_decoder *self)
+{
+    if (self->kind == VS_BYTES)
+        return VS_INT_FROM_SSIZE(self->elements);
+    Py_INCREF(vs_zero);
+    return vs_zero;
+}
+
+/* Returns (iter(decoder), num) for num decoders factory(*args) */
+static PyObject *
+vs_decoders(PyObject *factory, PyObject *args, Py_ssize_t num)
+{
+    vs_decoder_iter *it;
+
+    it = PyObject_New(vs_decoder_iter, &vs_decoder_iter_type);
+    if (it == NULL) {
+        Py_DECREF(args);
+        return NULL;
+    }
+    Py_INCREF(factory);
+    it->factory = factory;
+    it->args = args;
+    it->remaining = num;
+    return Py_BuildValue("(Nn)", (PyObject *)it, num);
+}
+
+PyDoc_STRVAR(vs_get_embedded_decoders__doc__,
+"get_embedded_decoders() -> (iter(decoder), num_decoders) or None\n\n"
+"Returns an iterator which generates decoders for embedded entities.");
+
+static PyObject *
+vs_get_embedded_decoders(vs_decoder *self)
+{
+    PyObject *args;
+
+    if (self->kind == VS_TUPLE) {
+        if (self->elements == 0) {
+            PyObject *value = PyTuple_New(0);
+            if (value == NULL)
+                return NULL;
+            Py_XDECREF(self->result);
+            self->result = vs_new_entity(vs_vtuple, value);
+            Py_DECREF(value);
+            if (self->result == NULL)
+                return NULL;
+            Py_RETURN_NONE;
+        }
+        args = Py_BuildValue("(O)", self->context);
+        if (args == NULL)
+            return NULL;
+        return vs_decoders(vs_entity_decoder, args, self->elements);
+    }
+    else if (self->kind == VS_STRING) {
+        args = Py_BuildValue("(OO)", self->context, Py_False);
+        if (args == NULL)
+            return NULL;
+        return vs_decoders(vs_bytes_decoder, args, self->flag ? 2 : 1);
+    }
+    Py_RETURN_NONE;
+}
+
+/* Returns payload data of a decoded VBytes as a buffer object */
+static PyObject *
+vs_bytes_value(PyObject *entity)
+{
+    PyObject *value, *data;
+
+    value = PyObject_GetAttr(entity, vs_s_v_value);
+    if (value == NULL || VS_BYTES_CHECK(value))
+        return value;
+    /* Streamed payload */
+    data = PySequence_GetSlice(value, 0, PY_SSIZE_T_MAX);
+    Py_DECREF(value);
+    return data;
+}
+
+/* Sets VString result from embedded (codec, data) results */
+static int
+vs_string_result(vs_decoder *self, PyObject *result)
+{
+    PyObject *codec = NULL, *raw = NULL, *name = NULL, *value = NULL;
+    Py_ssize_t num = PySequence_Length(result);
+    int status = -1;
+
+    if (num < 0)
+        return -1;
+    if (num != (self->flag ? 2 : 1)) {
+        vs_reader_err("Invalid number of embedded results");
+        return -1;
+    }
+    if (self->flag) {
+        PyObject *item = PySequence_GetItem(result, 0);
+        if (item == NULL)
+            return -1;
+        codec = vs_bytes_value(item);
+        Py_DECREF(item);
+    }
+    else if (self->context != Py_None) {
+        codec = PyObject_GetAttr(self->context, vs_s_str_decoding);
+    }
+    else {
+        Py_INCREF(Py_None);
+        codec = Py_None;
+    }
+    if (codec == NULL)
+        return -1;
+    if (codec == Py_None) {
+        vs_reader_err("Cannot decode, no codec defined");
+        goto done;
+    }
+    if (PyUnicode_Check(codec)) {
+        name = PyUnicode_AsASCIIString(codec);
+        if (name == NULL)
+            goto invalid;
+    }
+    else if (VS_BYTES_CHECK(codec)) {
+        Py_INCREF(codec);
+        name = codec;
+    }
+    else {
+        goto invalid;
+    }
+
+    {
+        PyObject *item = PySequence_GetItem(result, self->flag ? 1 : 0);
+        if (item == NULL)
+            goto done;
+        raw = vs_bytes_value(item);
+        Py_DECREF(item);
+        if (raw == NULL)
+            goto done;
+    }
+    if (!VS_BYTES_CHECK(raw))
+        goto invalid;
+    value = PyUnicode_Decode(VS_BYTES_AS(raw), VS_BYTES_SIZE(raw),
+                             VS_BYTES_AS(name), NULL);
+    if (value == NULL)
+        goto invalid;
+    Py_XDECREF(self->result);
+    self->result = vs_new_entity(vs_vstring, value);
+    if (self->result != NULL)
+        status = 0;
+    goto done;
+
+invalid:
+    PyErr_Clear();
+    vs_reader_err("Invalid encoding name or encoding");
+done:
+    Py_XDECREF(codec);
+    Py_XDECREF(name);
+    Py_XDECREF(raw);
+    Py_XDECREF(value);
+    return status;
+}
+
+PyDoc_STRVAR(vs_put_embedded_results__doc__,
+"put_embedded_results(result)\n\n"
+"Feeds result of decoders for embedded entity data.");
+
+static PyObject *
+vs_put_embedded_results(vs_decoder *self, PyObject *result)
+{
+    if (self->kind == VS_TUPLE) {
+        PyObject *value = PySequence_Tuple(result);
+        if (value == NULL)
+            return NULL;
+        Py_XDECREF(self->result);
+        self->result = vs_new_entity(vs_vtuple, value);
+        Py_DECREF(value);
+        if (self->result == NULL)
+            return NULL;
+    }
+    else if (self->kind == VS_STRING) {
+        if (vs_string_result(self, result) < 0)
+            return NULL;
+    }
+    else if (self->kind == VS_BYTES) {
+        PyErr_SetNone(PyExc_NotImplementedError);
+        return NULL;
+    }
+    else {
+        return vs_reader_err("Not applicable");
+    }
+    Py_RETURN_NONE;
+}
+
+/* Creates a sink if the payload should be streamed */
+static int
+vs_bytes_start(vs_decoder *self)
+{
+    PyObject *threshold, *factory;
+    Py_ssize_t limit;
+
+    if (self->context == Py_None)
+        return 0;
+    threshold = PyObject_GetAttr(self->context, vs_s_bytes_threshold);
+    if (threshold == NULL)
+        return -1;
+    if (threshold == Py_None) {
+        Py_DECREF(threshold);
+        return 0;
+    }
+    limit = PyNumber_AsSsize_t(threshold, PyExc_OverflowError);
+    Py_DECREF(threshold);
+    if (limit == -1 && PyErr_Occurred())
+        return -1;
+    if (limit <= 0 || limit > self->elements)
+        return 0;
+
+    factory = PyObject_GetAttr(self->context, vs_s_bytes_sink);
+    if (factory == NULL)
+        return -1;
+    if (factory == Py_None) {
+        Py_DECREF(factory);
+        Py_INCREF(vs_bytes_sink);
+        factory = vs_bytes_sink;
+    }
+    self->sink = PyObject_CallFunction(factory, "n", self->elements);
+    Py_DECREF(factory);
+    return (self->sink == NULL) ? -1 : 0;
+}
+
+/* Passes payload data to sink, returns bytes read or -1 */
+static Py_ssize_t
+vs_bytes_to_sink(vs_decoder *self, PyObject *data, Py_ssize_t max_read)
+{
+    PyObject *chunks, *iter, *chunk, *result;
+    Py_ssize_t num_read = 0, len;
+
+    chunks = vs_call_num(data, vs_s_pop_list, max_read);
+    if (chunks == NULL)
+        return -1;
+    iter = PyObject_GetIter(chunks);
+    Py_DECREF(chunks);
+    if (iter == NULL)
+        return -1;
+    while ((chunk = PyIter_Next(iter)) != NULL) {
+        len = PyObject_Length(chunk);
+        result = NULL;
+        if (len >= 0)
+            result = PyObject_CallMethodObjArgs(self->sink, vs_s_write,
+                                                chunk, NULL);
+        Py_DECREF(chunk);
+        if (result == NULL) {
+            Py_DECREF(iter);
+            return -1;
+        }
+        Py_DECREF(result);
+        num_read += len;
+    }
+    Py_DECREF(iter);
+    if (PyErr_Occurred())
+        return -1;
+    return num_read;
+}
+
+/* Passes payload chunks to payload list, returns bytes read or -1 */
+static Py_ssize_t
+vs_bytes_to_list(vs_decoder *self, PyObject *data, Py_ssize_t max_read)
+{
+    PyObject *chunks, *chunk;
+    Py_ssize_t num_read = 0, len, i;
+
+    chunks = vs_call_num(data, vs_s_pop_list, max_read);
+    if (chunks == NULL)
+        return -1;
+    if (!PyList_Check(chunks)) {
+        Py_DECREF(chunks);
+        PyErr_SetString(PyExc_TypeError, "pop_list() must return a list");
+        return -1;
+    }
+    for (i = 0; i < PyList_GET_SIZE(chunks); i++) {
+        chunk = PyList_GET_ITEM(chunks, i);
+        len = PyObject_Length(chunk);
+        if (len < 0 || PyList_Append(self->payload, chunk) < 0) {
+            Py_DECREF(chunks);
+            return -1;
+        }
+        num_read += len;
+    }
+    Py_DECREF(chunks);
+    return num_read;
+}
+
+/* Joins bytes or memoryview chunks, returns new bytes or NULL */
+static PyObject *
+vs_join_chunks(PyObject *chunks)
+{
+    PyObject *result;
+    Py_buffer view;
+    Py_ssize_t total = 0, i;
+    char *pos;
+
+    for (i = 0; i < PyList_GET_SIZE(chunks); i++) {
+        if (PyObject_GetBuffer(PyList_GET_ITEM(chunks, i), &view,
+                               PyBUF_SIMPLE) < 0)
+            return NULL;
+        total += view.len;
+        PyBuffer_Release(&view);
+    }
+    result = VS_BYTES_FROM(NULL, total);
+    if (result == NULL)
+        return NULL;
+    pos = VS_BYTES_AS(result);
+    for (i = 0; i < PyList_GET_SIZE(chunks); i++) {
+        if (PyObject_GetBuffer(PyList_GET_ITEM(chunks, i), &view,
+                               PyBUF_SIMPLE) < 0) {
+            Py_DECREF(result);
+            return NULL;
+        }
+        memcpy(pos, view.buf, view.len);
+        pos += view.len;
+        PyBuffer_Release(&view);
+    }
+    return result;
+}
+
+/* Sets VBytes result after all payload data was read */
+static int
+vs_bytes_result(vs_decoder *self)
+{
+    PyObject *value, *result;
+
+    if (self->sink != NULL) {
+        result = PyObject_CallMethodObjArgs(self->sink, vs_s_result, NULL);
+        Py_CLEAR(self->sink);
+        if (result == NULL)
+            return -1;
+        switch (PyObject_IsInstance(result, vs_vbytes)) {
+        case 1:
+            if (PyObject_Length(result) == self->elements)
+                break;
+            PyErr_Clear();
+            /* fall through */
+        case 0:
+            Py_DECREF(result);
+            vs_reader_err("Invalid VBytes sink result");
+            return -1;
+        default:
+            Py_DECREF(result);
+            return -1;
+        }
+        self->result = result;
+        return 0;
+    }
+
+    if (PyList_GET_SIZE(self->payload) == 1
+        && VS_BYTES_CHECK(PyList_GET_ITEM(self->payload, 0))) {
+        value = PyList_GET_ITEM(self->payload, 0);
+        Py_INCREF(value);
+    }
+    else {
+        value = vs_join_chunks(self->payload);
+        if (value == NULL)
+            return -1;
+    }
+    Py_CLEAR(self->payload);
+    self->result = vs_new_entity(vs_vbytes, value);
+    Py_DECREF(value);
+    return (self->result == NULL) ? -1 : 0;
+}
+
+PyDoc_STRVAR(vs_decode_payload__doc__,
+"decode_payload(data) -> (num_read, done)\n\n"
+"Decodes the payload component of the entity's encoding.");
+
+static PyObject *
+vs_decode_payload(vs_decoder *self, PyObject *data)
+{
+    Py_ssize_t num_read;
+
+    if (self->kind != VS_BYTES || self->result != NULL)
+        return Py_BuildValue("(nO)", (Py_ssize_t)0, Py_True);
+
+    if (self->elements == 0) {
+        self->result = vs_new_entity(vs_vbytes, vs_empty);
+        if (self->result == NULL)
+            return NULL;
+        return Py_BuildValue("(nO)", (Py_ssize_t)0, Py_True);
+    }
+    if (self->payload == NULL && self->sink == NULL) {
+        if (vs_bytes_start(self) < 0)
+            return NULL;
+        if (self->sink == NULL && (self->payload = PyList_New(0)) == NULL)
+            return NULL;
+    }
+    if (self->sink != NULL)
+        num_read = vs_bytes_to_sink(self, data,
+                                    self->elements - self->payload_read);
+    else
+        num_read = vs_bytes_to_list(self, data,
+                                    self->elements - self->payload_read);
+    if (num_read < 0)
+        return NULL;
+    self->payload_read += num_read;
+    if (self->payload_read < self->elements)
+        return Py_BuildValue("(nO)", num_read, Py_False);
+    if (vs_bytes_result(self) < 0)
+        return NULL;
+    return Py_BuildValue("(nO)", num_read, Py_True);
+}
+
+PyDoc_STRVAR(vs_result__doc__,
+"result() -> entity\n\n"
+"Returns the decoded entity.");
+
+static PyObject *
+vs_result(vs_decoder *self)
+{
+    if (self->result == NULL)
+        return vs_reader_err("Result not ready");
+    Py_INCREF(self->result);
+    return self->result;
+}
+
+static PyObject *
+vs_get_context(vs_decoder *self, void *closure)
+{
+    PyObject *context = self->context ? self->context : Py_None;
+    Py_INCREF(context);
+    return context;
+}
+
+static int
+vs_decoder_init(vs_decoder *self, PyObject *args, PyObject *kwds,
+                int kind)
+{
+    static char *kwlist[] = {"context", "explicit", NULL};
+    PyObject *context, *explicit = Py_True;
+    int is_explicit;
+
+    if (vs_vinteger == NULL) {
+        PyErr_SetString(PyExc_RuntimeError, "Entity types not set");
+        return -1;
+    }
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O:decoder", kwlist,
+                                     &context, &explicit))
+        return -1;
+    is_explicit = PyObject_IsTrue(explicit);
+    if (is_explicit < 0)
+        return -1;
+    Py_INCREF(context);
+    Py_XDECREF(self->context);
+    self->context = context;
+    self->kind = kind;
+    self->explicit = is_explicit;
+    if (kind == VS_STRING)
+        return vs_set_min_est_size(self, 2);
+    Py_INCREF(kind == VS_BYTES ? vs_zero : vs_one);
+    vs_set_min_est(self, kind == VS_BYTES ? vs_zero : vs_one);
+    return 0;
+}
+
+#define VS_DECODER_INIT(name, kind)                                     \
+    static int                                                          \
+    name(vs_decoder *self, PyObject *args, PyObject *kwds)              \
+    {                                                                   \
+        return vs_decoder_init(self, args, kwds, kind);                 \
+    }
+
+VS_DECODER_INIT(vs_int_init, VS_INT)
+VS_DECODER_INIT(vs_bytes_init, VS_BYTES)
+VS_DECODER_INIT(vs_tuple_init, VS_TUPLE)
+VS_DECODER_INIT(vs_string_init, VS_STRING)
+
+static int
+vs_decoder_traverse(vs_decoder *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->context);
+    Py_VISIT(self->result);
+    Py_VISIT(self->payload);
+    Py_VISIT(self->sink);
+    return 0;
+}
+
+static int
+vs_decoder_clear(vs_decoder *self)
+{
+    Py_CLEAR(self->context);
+    Py_CLEAR(self->header);
+    Py_CLEAR(self->min_est);
+    Py_CLEAR(self->result);
+    Py_CLEAR(self->payload);
+    Py_CLEAR(self->sink);
+    return 0;
+}
+
+static void
+vs_decoder_dealloc(vs_decoder *self)
+{
+    PyObject_GC_UnTrack(self);
+    vs_decoder_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyMethodDef vs_decoder_methods[] = {
+    {"decode_header", (PyCFunction)vs_decode_header, METH_O,
+     vs_decode_header__doc__},
+    {"get_payload_len", (PyCFunction)vs_get_payload_len, METH_NOARGS,
+     vs_get_payload_len__doc__},
+    {"get_embedded_decoders", (PyCFunction)vs_get_embedded_decoders,
+     METH_NOARGS, vs_get_embedded_decoders__doc__},
+    {"put_embedded_results", (PyCFunction)vs_put_embedded_results, METH_O,
+     vs_put_embedded_results__doc__},
+    {"decode_payload", (PyCFunction)vs_decode_payload, METH_O,
+     vs_decode_payload__doc__},
+    {"result", (PyCFunction)vs_result, METH_NOARGS, vs_result__doc__},
+    {NULL, NULL, 0, NULL}
+};
+
+static PyGetSetDef vs_decoder_getset[] = {
+    {"context", (getter)vs_get_context, NULL,
+     "Holds the VIOContext which is set on the object.", NULL},
+    {NULL, NULL, NULL, NULL, NULL}
+};
+
+#define VS_DECODER_TYPE(var, name, init, doc)                           \
+    static PyTypeObject var = {                                         \
+        PyVarObject_HEAD_INIT(NULL, 0)                                  \
+        "versile._speedups." name,              /* tp_name */           \
+        sizeof(vs_decoder),                     /* tp_basicsize */      \
+        0,                                      /* tp_itemsize */       \
+        (destructor)vs_decoder_dealloc,         /* tp_dealloc */        \
+        0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,                       \
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,  \
+        doc,                                    /* tp_doc */            \
+        (traverseproc)vs_decoder_traverse,      /* tp_traverse */       \
+        (inquiry)vs_decoder_clear,              /* tp_clear */          \
+        0, 0, 0, 0,                                                     \
+        vs_decoder_methods,                     /* tp_methods */        \
+        0,                                                              \
+        vs_decoder_getset,                      /* tp_getset */         \
+        0, 0, 0, 0, 0,                                                  \
+        (initproc)init,                         /* tp_init */           \
+        0,                                                              \
+        PyType_GenericNew,                      /* tp_new */            \
+    };
+
+VS_DECODER_TYPE(vs_int_type, "IntegerDecoder", vs_int_init,
+                "Native decoder for a VInteger.")
+VS_DECODER_TYPE(vs_bytes_type, "BytesDecoder", vs_bytes_init,
+                "Native decoder for a VBytes.")
+VS_DECODER_TYPE(vs_tuple_type, "TupleDecoder", vs_tuple_init,
+                "Native decoder for a VTuple.")
+VS_DECODER_TYPE(vs_string_type, "StringDecoder", vs_string_init,
+                "Native decoder for a VString.")
+
+static PyObject *
+vs_decoder_iter_next(vs_decoder_iter *self)
+{
+    if (self->remaining <= 0)
+        return NULL;
+    self->remaining--;
+    return PyObject_Call(self->factory, self->args, NULL);
+}
+
+static void
+vs_decoder_iter_dealloc(vs_decoder_iter *self)
+{
+    Py_XDECREF(self->factory);
+    Py_XDECREF(self->args);
+    PyObject_Del(self);
+}
+
+static PyTypeObject vs_decoder_iter_type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "versile._speedups.DecoderIterator",    /* tp_name */
+    sizeof(vs_decoder_iter),                /* tp_basicsize */
+    0,                                      /* tp_itemsize */
+    (destructor)vs_decoder_iter_dealloc,    /* tp_dealloc */
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    Py_TPFLAGS_DEFAULT,                     /* tp_flags */
+    "Iterator which generates decoders.",   /* tp_doc */
+    0, 0, 0, 0,
+    PyObject_SelfIter,                      /* tp_iter */
+    (iternextfunc)vs_decoder_iter_next,     /* tp_iternext */
+};
+
+PyDoc_STRVAR(set_entity_types__doc__,
+"set_entity_types(vinteger, vbytes, vtuple, vstring, bytes_sink,\n"
+"                 entity_decoder, bytes_decoder, int_interned,\n"
+"                 reader_error)\n\n"
+"Registers entity types and other objects used by native decoders.");
+
+static PyObject *
+set_entity_types(PyObject *self, PyObject *args)
+{
+    PyObject *objs[9];
+    PyObject **targets[9] = {&vs_vinteger, &vs_vbytes, &vs_vtuple,
+                             &vs_vstring, &vs_bytes_sink,
+                             &vs_entity_decoder, &vs_bytes_decoder,
+                             &vs_int_interned, &vs_reader_error};
+    int i;
+
+    if (!PyArg_ParseTuple(args, "O!O!O!O!OOOO!O:set_entity_types",
+                          &PyType_Type, &objs[0], &PyType_Type, &objs[1],
+                          &PyType_Type, &objs[2], &PyType_Type, &objs[3],
+                          &objs[4], &objs[5], &objs[6],
+                          &PyDict_Type, &objs[7], &objs[8]))
+        return NULL;
+    for (i = 0; i < 9; i++) {
+        Py_INCREF(objs[i]);
+        Py_XDECREF(*targets[i]);
+        *targets[i] = objs[i];
+    }
+    Py_RETURN_NONE;
+}
+
+
+static PyMethodDef vs_methods[] = {
+    {"posint_to_netbytes", (PyCFunction)posint_to_netbytes, METH_O,
+     posint_to_netbytes__doc__},
+    {"signedint_to_netbytes", (PyCFunction)signedint_to_netbytes, METH_O,
+     signedint_to_netbytes__doc__},
+    {"netbytes_to_posint", (PyCFunction)netbytes_to_posint, METH_O,
+     netbytes_to_posint__doc__},
+    {"netbytes_to_signedint", (PyCFunction)netbytes_to_signedint, METH_O,
+     netbytes_to_signedint__doc__},
+    {"bulk_posint", (PyCFunction)bulk_posint, METH_VARARGS,
+     bulk_posint__doc__},
+    {"entity_header", (PyCFunction)entity_header, METH_VARARGS,
+     entity_header__doc__},
+    {"set_entity_types", (PyCFunction)set_entity_types, METH_VARARGS,
+     set_entity_types__doc__},
+    {NULL, NULL, 0, NULL}
+};
+
+PyDoc_STRVAR(vs_doc,
+"Native implementation of Versile Python entity codec primitives.");
+
+static int
+vs_init_constants(void)
+{
+    vs_zero = vs_from_ull(0);
+    vs_offset = vs_from_ull(247);
+    vs_nine = vs_from_ull(9);
+    vs_one = vs_from_ull(1);
+    vs_two = vs_from_ull(2);
+    vs_empty = VS_BYTES_FROM(NULL, 0);
+    if (vs_zero == NULL || vs_offset == NULL || vs_nine == NULL
+        || vs_one == NULL || vs_two == NULL || vs_empty == NULL)
+        return -1;
+
+    if ((vs_s_v_value = VS_INTERN("_v_value")) == NULL
+        || (vs_s_peek = VS_INTERN("peek")) == NULL
+        || (vs_s_pop_list = VS_INTERN("pop_list")) == NULL
+        || (vs_s_remove = VS_INTERN("remove")) == NULL
+        || (vs_s_write = VS_INTERN("write")) == NULL
+        || (vs_s_result = VS_INTERN("result")) == NULL
+        || (vs_s_bytes_threshold = VS_INTERN("bytes_threshold")) == NULL
+        || (vs_s_bytes_sink = VS_INTERN("bytes_sink")) == NULL
+        || (vs_s_str_decoding = VS_INTERN("str_decoding")) == NULL)
+        return -1;
+
+    if (PyType_Ready(&vs_int_type) < 0
+        || PyType_Ready(&vs_bytes_type) < 0
+        || PyType_Ready(&vs_tuple_type) < 0
+        || PyType_Ready(&vs_string_type) < 0
+        || PyType_Ready(&vs_decoder_iter_type) < 0)
+        return -1;
+    return 0;
+}
+
+static int
+vs_add_types(PyObject *module)
+{
+    PyTypeObject *types[] = {&vs_int_type, &vs_bytes_type, &vs_tuple_type,
+                             &vs_string_type};
+    const char *names[] = {"IntegerDecoder", "BytesDecoder",
+                           "TupleDecoder", "StringDecoder"};
+    int i;
+
+    if (module == NULL)
+        return -1;
+    for (i = 0; i < 4; i++) {
+        Py_INCREF(types[i]);
+        if (PyModule_AddObject(module, names[i], (PyObject *)types[i]) < 0)
+            return -1;
+    }
+    return 0;
+}
+
+#if PY_MAJOR_VERSION >= 3
+
+static struct PyModuleDef vs_module = {
+    PyModuleDef_HEAD_INIT,
+    "_speedups",
+    vs_doc,
+    -1,
+    vs_methods
+};
+
+PyMODINIT_FUNC
+PyInit__speedups(void)
+{
+    PyObject *module;
+
+    if (vs_init_constants() < 0)
+        return NULL;
+    module = PyModule_Create(&vs_module);
+    if (vs_add_types(module) < 0) {
+        Py_XDECREF(module);
+        return NULL;
+    }
+    return module;
+}
+
+#else
+
+PyMODINIT_FUNC
+init_speedups(void)
+{
+    if (vs_init_constants() < 0)
+        return;
+    vs_add_types(Py_InitModule3("_speedups", vs_methods, vs_doc));
+}
+
+#endif
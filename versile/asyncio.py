@@ -0,0 +1,244 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Integration of asynchronous results with :mod:`asyncio`\ .
+
+Provides awaitable wrappers for :class:`versile.common.util.VResult`
+derived results such as :class:`versile.orb.entity.VObjectCall` and
+:class:`versile.orb.entity.VReferenceCall`\ , and for
+:class:`versile.common.pending.VPending`\ . Results are passed to an
+:mod:`asyncio` event loop without blocking a thread per waiter.
+
+Only available on python versions that support :mod:`asyncio`\ .
+
+"""
+from __future__ import print_function, unicode_literals, absolute_import
+
+import asyncio # Raises ImportError if no asyncio
+
+from versile.internal import _vexport
+from versile.common.pending import VPending
+from versile.common.util import VResult
+from versile.orb.entity import VObject, VProxy
+
+__all__ = ['VAsyncResult', 'VAsyncProxy', 'as_future']
+__all__ = _vexport(__all__)
+
+
+def as_future(result, loop=None):
+    """Returns an :mod:`asyncio` future for an asynchronous result.
+
+    :param result: the result to wrap
+    :type  result: :class:`versile.common.util.VResult`\ ,
+                   :class:`versile.common.pending.VPending`
+    :param loop:   event loop for the future (if None use current loop)
+    :type  loop:   :class:`asyncio.AbstractEventLoop`
+    :returns:      future for the result
+    :rtype:        :class:`asyncio.Future`
+
+    The future is resolved on *loop* when *result* has a value or an
+    exception. Results are pushed to the loop in a thread-safe way,
+    so *result* can be resolved by a reactor or processor
+    thread. Cancelling the future also cancels *result*\ .
+
+    If *result* is not a :class:`versile.common.util.VResult` or
+    :class:`versile.common.pending.VPending` then a future which has
+    *result* as its value is returned.
+
+    """
+    loop = _get_loop(loop)
+    future = loop.create_future()
+
+    def _set_result(value):
+        if not future.done():
+            future.set_result(value)
+    def _set_exception(exc):
+        if not future.done():
+            future.set_exception(exc)
+
+    if isinstance(result, VResult):
+        def callback(value):
+            loop.call_soon_threadsafe(_set_result, value)
+        def failback(exc):
+            loop.call_soon_threadsafe(_set_exception, exc)
+        result.add_callpair(callback, failback)
+    elif isinstance(result, VPending):
+        def callback(value):
+            loop.call_soon_threadsafe(_set_result, value)
+            return value
+        def failback(failure):
+            loop.call_soon_threadsafe(_set_exception, failure.value)
+            return failure
+        result.add_callpair(callback, failback)
+    else:
+        future.set_result(result)
+        return future
+
+    def _done(future):
+        if future.cancelled():
+            result.cancel()
+    future.add_done_callback(_done)
+    return future
+
+
+class VAsyncResult(object):
+    """Awaitable wrapper for an asynchronous result.
+
+    :param result: the result to wrap
+    :type  result: :class:`versile.common.util.VResult`\ ,
+                   :class:`versile.common.pending.VPending`
+    :param loop:   event loop for the result (if None use current loop)
+    :type  loop:   :class:`asyncio.AbstractEventLoop`
+
+    Awaiting the object returns the value of *result*\ , or raises its
+    exception. See :func:`as_future` for how *result* is passed to
+    the event loop.
+
+    .. automethod:: __await__
+
+    """
+
+    def __init__(self, result, loop=None):
+        self.__future = as_future(result, loop=loop)
+
+    def __await__(self):
+        """Returns an iterator for awaiting the result."""
+        return self.__future.__await__()
+
+    __iter__ = __await__
+
+    def cancel(self):
+        """Cancels the result.
+
+        :returns: True if the result was cancelled
+        :rtype:   bool
+
+        """
+        return self.__future.cancel()
+
+    def done(self):
+        """Returns True if the result is available.
+
+        :returns: True if done
+        :rtype:   bool
+
+        """
+        return self.__future.done()
+
+    @property
+    def future(self):
+        """The :class:`asyncio.Future` which holds the result."""
+        return self.__future
+
+
+class VAsyncProxy(object):
+    """Proxy which performs remote method calls as awaitables.
+
+    :param obj:  object to proxy
+    :type  obj:  :class:`versile.orb.entity.VObject`\ ,
+                 :class:`versile.orb.entity.VProxy`
+    :param loop: event loop for results (if None use current loop)
+    :type  loop: :class:`asyncio.AbstractEventLoop`
+
+    Similar to :class:`versile.orb.entity.VProxy`\ , except calling a
+    method makes a non-blocking call and returns a
+    :class:`VAsyncResult`\ . Below is an example of use in a
+    coroutine::
+
+        proxy = VAsyncProxy(gw)
+        result = await proxy.echo('hello')
+
+    Keyword arguments are passed to
+    :meth:`versile.orb.entity.VObject._v_call`\ . A call with
+    'oneway' set returns an awaitable which resolves as None.
+
+    Similar to :class:`versile.orb.entity.VProxy`\ , the attribute
+    'meta' returns an object for making meta calls, and attributes
+    which start with '_v_' are resolved on the proxied object.
+
+    .. automethod:: __call__
+    .. automethod:: __getattr__
+
+    """
+
+    def __init__(self, obj, loop=None):
+        if isinstance(obj, VProxy):
+            obj = obj()
+        if not isinstance(obj, VObject):
+            raise TypeError('Object must be a VObject or VProxy')
+        self._v_object = obj
+        self._v_loop = loop
+
+    def __call__(self):
+        """Returns the object proxied by this object.
+
+        :returns: proxied object
+        :rtype:   :class:`versile.orb.entity.VObject`
+
+        """
+        return self._v_object
+
+    def __getattr__(self, attr):
+        """Overloads to return a callable for asynchronous remote calls."""
+        if attr.startswith('_v_'):
+            return getattr(self._v_object, attr)
+        if isinstance(attr, bytes):
+            attr = unicode(attr)
+        if attr == 'meta':
+            return _VAsyncProxyMeta(self, attr)
+        return _VAsyncProxyMethod(self, (attr,))
+
+
+class _VAsyncProxyMethod(object):
+    """Callable for performing an asynchronous remote method call."""
+    def __init__(self, proxy, prefix):
+        self._obj = proxy._v_object
+        self._loop = proxy._v_loop
+        self._prefix = prefix
+
+    def __call__(self, *args, **kargs):
+        args = self._prefix + args
+        if kargs.get('oneway', False):
+            self._obj._v_call(*args, **kargs)
+            return VAsyncResult(None, loop=self._loop)
+        kargs['nowait'] = True
+        call = self._obj._v_call(*args, **kargs)
+        return VAsyncResult(call, loop=self._loop)
+
+
+class _VAsyncProxyMeta(_VAsyncProxyMethod):
+    """Callable for a method named 'meta' which also aliases meta calls."""
+    def __init__(self, proxy, method_name):
+        super(_VAsyncProxyMeta, self).__init__(proxy, (method_name,))
+        self._proxy = proxy
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if isinstance(attr, bytes):
+            attr = unicode(attr)
+        return _VAsyncProxyMethod(self._proxy, (None, attr))
+
+
+def _get_loop(loop):
+    if loop is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except (AttributeError, RuntimeError):
+            loop = asyncio.get_event_loop()
+    return loop
@@ -0,0 +1,234 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Micro-benchmarks for :term:`VPy` performance regression testing."""
+from __future__ import print_function, unicode_literals
+
+import json
+import optparse
+import platform
+import sys
+import time
+import timeit
+
+from versile.internal import _vexport, _vplatform, _vspeedups, _pyver
+
+__all__ = ['VBenchmark', 'run_benchmarks', 'main']
+__all__ = _vexport(__all__)
+
+
+class VBenchmark(object):
+    """A micro-benchmark of a single operation.
+
+    :param name:   benchmark name
+    :type  name:   unicode
+    :param func:   operation to benchmark, called without arguments
+    :type  func:   callable
+    :param group:  name of the benchmark's group
+    :type  group:  unicode
+    :param params: parameters which identify the benchmark's case
+    :type  params: dict
+    :param size:   number of bytes processed by one call to *func*
+    :type  size:   int
+
+    If *size* is set then benchmark results include a throughput in
+    bytes per second.
+
+    """
+
+    def __init__(self, name, func, group=None, params=None, size=None):
+        self.__name = name
+        self.__func = func
+        self.__group = group
+        if params is None:
+            params = dict()
+        self.__params = params
+        self.__size = size
+
+    def run(self, repeat=5, min_time=0.1):
+        """Runs the benchmark.
+
+        :param repeat:   number of timed repetitions
+        :type  repeat:   int
+        :param min_time: minimum duration of one repetition in seconds
+        :type  min_time: float
+        :returns:        benchmark result
+        :rtype:          dict
+
+        The number of calls per repetition is calibrated so that a
+        repetition lasts at least *min_time*\ . The result includes
+        the best and median time per call of all repetitions, which
+        are in seconds.
+
+        """
+        func, timer = self.__func, timeit.default_timer
+
+        # Calibrate number of calls per repetition
+        loops = 1
+        while True:
+            elapsed = self.__time(func, loops, timer)
+            if elapsed >= min_time or loops >= 0x1000000:
+                break
+            if elapsed <= 0.0:
+                loops *= 10
+            else:
+                loops = max(loops*2, int(loops*min_time*1.2/elapsed))
+
+        times = [self.__time(func, loops, timer)/loops
+                 for i in range(max(repeat, 1))]
+        times.sort()
+        best, median = times[0], times[len(times)//2]
+
+        result = dict(name=self.__name, group=self.__group,
+                      params=self.__params, loops=loops,
+                      repeat=len(times), best=best, median=median)
+        if best > 0.0:
+            result['ops_per_sec'] = 1.0/best
+        if self.__size is not None:
+            result['size'] = self.__size
+            if best > 0.0:
+                result['bytes_per_sec'] = self.__size/best
+        return result
+
+    @property
+    def name(self):
+        """Benchmark name."""
+        return self.__name
+
+    @property
+    def group(self):
+        """Benchmark group name."""
+        return self.__group
+
+    @classmethod
+    def __time(cls, func, loops, timer):
+        if _pyver == 2:
+            _range = xrange
+        else:
+            _range = range
+        start = timer()
+        for i in _range(loops):
+            func()
+        return timer() - start
+
+
+def run_benchmarks(benchmarks, repeat=5, min_time=0.1, match=None,
+                   progress=None):
+    """Runs a set of benchmarks and returns a report.
+
+    :param benchmarks: benchmarks to run
+    :type  benchmarks: list of :class:`VBenchmark`
+    :param repeat:     number of timed repetitions per benchmark
+    :type  repeat:     int
+    :param min_time:   minimum duration of one repetition in seconds
+    :type  min_time:   float
+    :param match:      if set, only run benchmarks with names containing it
+    :type  match:      unicode
+    :param progress:   if set, called with each benchmark before running it
+    :type  progress:   callable
+    :returns:          benchmark report
+    :rtype:            dict
+
+    The report holds information about the runtime environment,
+    including whether the :mod:`versile._speedups` extension was
+    loaded, and a list of results from :meth:`VBenchmark.run`\ . It
+    can be serialized as JSON for comparing results between
+    releases or runtimes.
+
+    """
+    results = []
+    for bench in benchmarks:
+        if match and match not in bench.name:
+            continue
+        if progress:
+            progress(bench)
+        results.append(bench.run(repeat=repeat, min_time=min_time))
+
+    env = dict(python=platform.python_version(),
+               implementation=_vplatform,
+               platform=platform.platform(),
+               speedups=(_vspeedups is not None))
+    return dict(time=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                environment=env, repeat=repeat, min_time=min_time,
+                results=results)
+
+
+def main(args=None):
+    """Runs :term:`VPy` benchmarks from the command line.
+
+    :param args: command line arguments (default is sys.argv[1:])
+    :type  args: list
+    :returns:    exit status
+    :rtype:      int
+
+    Writes a JSON report generated by :func:`run_benchmarks`
+    to stdout or a file. Run with '--help' for a list of options.
+
+    The benchmarks can be run with ``python -m versile.bench``\ .
+
+    """
+    from versile.bench.codec import codec_benchmarks
+
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='write JSON report to FILE', metavar='FILE')
+    parser.add_option('-r', '--repeat', dest='repeat', type='int',
+                      default=5, help='timed repetitions [default: %default]')
+    parser.add_option('-t', '--min-time', dest='min_time', type='float',
+                      default=0.1,
+                      help='minimum seconds per repetition '
+                      '[default: %default]')
+    parser.add_option('-k', '--match', dest='match', default=None,
+                      help='only run benchmarks with names containing STR',
+                      metavar='STR')
+    parser.add_option('-l', '--list', dest='list', action='store_true',
+                      default=False, help='list benchmarks and exit')
+    parser.add_option('-v', '--verbose', dest='verbose',
+                      action='store_true', default=False,
+                      help='report progress on stderr')
+    opts, _args = parser.parse_args(args)
+    if _args:
+        parser.error('unexpected arguments')
+
+    benchmarks = codec_benchmarks()
+    if opts.list:
+        for bench in benchmarks:
+            if not opts.match or opts.match in bench.name:
+                print(bench.name)
+        return 0
+
+    progress = None
+    if opts.verbose:
+        def progress(bench):
+            sys.stderr.write('%s\n' % bench.name)
+            sys.stderr.flush()
+    report = run_benchmarks(benchmarks, repeat=opts.repeat,
+                            min_time=opts.min_time, match=opts.match,
+                            progress=progress)
+
+    data = json.dumps(report, indent=2, sort_keys=True)
+    if opts.output:
+        f = open(opts.output, 'w')
+        try:
+            f.write(data)
+            f.write('\n')
+        finally:
+            f.close()
+    else:
+        print(data)
+    return 0
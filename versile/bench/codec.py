@@ -0,0 +1,170 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Micro-benchmarks for :class:`versile.orb.entity.VEntity` serialization."""
+from __future__ import print_function, unicode_literals
+
+from versile.internal import _vexport, _pyver
+from versile.bench import VBenchmark
+from versile.orb.entity import VEntity, VInteger, VBoolean, VNone, VFloat
+from versile.orb.entity import VBytes, VString, VTuple, VTagged, VException
+from versile.orb.entity import VIOContext
+from versile.vse import VSEResolver
+from versile.vse.container import VArrayOfInt, VFrozenDict
+
+__all__ = ['codec_benchmarks']
+__all__ = _vexport(__all__)
+
+
+def codec_benchmarks():
+    """Returns benchmarks for entity serialization.
+
+    :returns: benchmarks
+    :rtype:   list of :class:`versile.bench.VBenchmark`
+
+    For each entity type and a set of sizes, generates benchmarks
+    for encoding with :meth:`versile.orb.entity.VEntity._v_write`\ ,
+    decoding with :meth:`versile.orb.entity.VEntity._v_decode_bytes`
+    and incremental decoding with a
+    :class:`versile.orb.entity.VEntityReader`\ . Also generates
+    benchmarks for lazy-conversion with
+    :meth:`versile.orb.entity.VEntity._v_lazy` and
+    :meth:`versile.orb.entity.VEntity._v_lazy_native`\ .
+
+    :term:`VSE` entities are decoded to native representation with a
+    :class:`versile.vse.VSEResolver` parser, similar to how they are
+    received by a link.
+
+    Benchmark data is generated deterministically so results can be
+    compared between runs.
+
+    """
+    VSEResolver.enable_vse()
+    parser = VSEResolver()
+    ctx = VIOContext()
+    ctx.str_encoding = ctx.str_decoding = b'utf8'
+
+    benchmarks = []
+    for group, params, entity, vse in _codec_cases():
+        data = entity._v_write(ctx)
+        name = _case_name(group, params)
+
+        def encode(entity=entity):
+            entity._v_write(ctx)
+        benchmarks.append(VBenchmark(name + '.encode', encode, group=group,
+                                     params=params, size=len(data)))
+
+        if vse:
+            def decode(data=data):
+                obj, num_read = VEntity._v_decode_bytes(data, ctx)
+                VEntity._v_lazy_native(obj, parser)
+        else:
+            def decode(data=data):
+                VEntity._v_decode_bytes(data, ctx)
+        benchmarks.append(VBenchmark(name + '.decode', decode, group=group,
+                                     params=params, size=len(data)))
+
+        def read(data=data):
+            reader = VEntity._v_reader(ctx)
+            reader.read(data)
+            reader.result()
+        benchmarks.append(VBenchmark(name + '.reader', read, group=group,
+                                     params=params, size=len(data)))
+
+    for params, native in _lazy_cases():
+        name = _case_name('lazy', params)
+        entity = VEntity._v_lazy(native)
+
+        def lazy(native=native):
+            VEntity._v_lazy(native)
+        benchmarks.append(VBenchmark(name + '.lazy', lazy, group='lazy',
+                                     params=params))
+
+        def lazy_native(entity=entity):
+            VEntity._v_lazy_native(entity)
+        benchmarks.append(VBenchmark(name + '.lazy_native', lazy_native,
+                                     group='lazy', params=params))
+
+    return benchmarks
+
+
+def _case_name(group, params):
+    items = ['%s=%s' % (key, params[key]) for key in sorted(params)]
+    return '.'.join([group] + items)
+
+def _codec_cases():
+    """Returns a list of (group, params, entity, vse) codec cases."""
+    if _pyver == 2:
+        _range = xrange
+    else:
+        _range = range
+
+    cases = []
+    for value in (0, 200, -200, 0x7fff, -0x7fff, 2**62, -2**62, 2**256):
+        cases.append(('VInteger', dict(value=value), VInteger(value), False))
+    cases.append(('VBoolean', dict(), VBoolean(True), False))
+    cases.append(('VNone', dict(), VNone(), False))
+    for digits in (2, 16):
+        value = VFloat(int('3' * digits), -digits + 1)
+        cases.append(('VFloat', dict(digits=digits), value, False))
+    for size in (16, 1024, 64*1024):
+        value = VBytes(b'\xa5' * size)
+        cases.append(('VBytes', dict(size=size), value, False))
+        value = VString('\u00e6' + 'a' * (size - 1))
+        cases.append(('VString', dict(size=size), value, False))
+    for size in (10, 100, 1000):
+        value = VTuple([VInteger(i) for i in _range(size)])
+        cases.append(('VTuple', dict(size=size), value, False))
+    for depth in (4, 16):
+        value = VInteger(0)
+        for i in _range(depth):
+            value = VTuple((value, VString('level'), VInteger(i)))
+        cases.append(('VTuple.nested', dict(depth=depth), value, False))
+    value = VTagged(VInteger(42), VString('tag'), VInteger(1))
+    cases.append(('VTagged', dict(), value, False))
+    value = VException('error', 'some failure', 42)
+    cases.append(('VException', dict(), value, False))
+    for size in (10, 1000):
+        value = VArrayOfInt(_range(size))
+        cases.append(('VArrayOfInt', dict(size=size), value, True))
+        value = VFrozenDict(dict((i, 'value %s' % i)
+                                 for i in _range(size)))
+        cases.append(('VFrozenDict', dict(size=size), value, True))
+    return cases
+
+def _lazy_cases():
+    """Returns a list of (params, native) lazy-conversion cases."""
+    if _pyver == 2:
+        _range = xrange
+    else:
+        _range = range
+
+    cases = []
+    cases.append((dict(type='int'), 42))
+    cases.append((dict(type='unicode'), 'lazy conversion'))
+    for size in (10, 1000):
+        cases.append((dict(type='tuple.int', size=size),
+                      tuple(_range(size))))
+        cases.append((dict(type='tuple.mixed', size=size),
+                      tuple((i, 'item', b'\x00', None, True, 1.5)
+                            for i in _range(size//6 + 1))))
+    value = 0
+    for i in _range(16):
+        value = (value, 'level', i)
+    cases.append((dict(type='tuple.nested', depth=16), value))
+    return cases
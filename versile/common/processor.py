@@ -19,7 +19,9 @@
 """Generic thread-bases processor for executing queued function calls."""
 from __future__ import print_function, unicode_literals
 
+import collections
 import threading
+import time
 import weakref
 
 from versile.internal import _vexport, _v_silent
@@ -68,6 +70,10 @@ class VProcessor(VCondition):
     :type  lazy:    bool
     :param logger:  if True then log worker exceptions (or None)
     :type  logger:  :class:`versile.common.log.VLogger`
+    :param fair:    if True use fair scheduling between call groups
+    :type  fair:    bool
+    :param group_limit: max executing calls per call group (or None)
+    :type  group_limit: int
 
     If *daemon* is set, worker threads are configured to be
     daemonic. A program will exit if only daemon threads remain,
@@ -81,17 +87,41 @@ class VProcessor(VCondition):
     of executed calls to the provided logger, with a 'warn' logging
     level.
 
+    If *fair* is False then queued calls are executed in the order
+    they were queued (sorted by call priority). If *fair* is True then
+    the processor keeps a separate queue for each call group, and
+    workers take calls from call groups in round-robin order. This
+    prevents one call group which queues a large number of calls from
+    holding up calls of other groups, e.g. when call groups are links
+    which share a processor. Calls without a call group are handled as
+    a group of their own.
+
+    *group_limit* is only used with fair scheduling. If set, it is the
+    maximum number of calls of the same call group which may execute
+    at the same time. Limits can also be set for individual call
+    groups with :meth:`set_group_limit`\ .
+
+    With fair scheduling, the processor tracks statistics for call
+    groups which can be retreived with :meth:`group_stats`\ .
+
     """
 
     # Class processor
     _cls_processor = None
     _cls_processor_lock = threading.RLock()
 
-    def __init__(self, workers, daemon=False, lazy=True, logger=False):
+    def __init__(self, workers, daemon=False, lazy=True, logger=False,
+                 fair=False, group_limit=None):
         super(VProcessor, self).__init__()
-        self.__first_node = None
-        self.__last_node = None
+        if group_limit is not None and group_limit < 1:
+            raise VProcessorError('Group limit must be positive')
+        self.__queue = _VCallQueue()  # call queue if not fair
         self.__group_calls = dict()   # call_group -> set(call_node)
+        self.__fair = fair
+        self.__group_limit = group_limit
+        self.__groups = dict()        # call_group -> _VCallQueue if fair
+        self.__group_limits = dict()  # call_group -> limit if fair
+        self.__ready = dict()         # priority -> deque(_VCallQueue)
         self._queued_calls = 0
         self._active_calls = 0
         self._current_workers = 0
@@ -148,8 +178,25 @@ class VProcessor(VCondition):
         else:
             raise VProcessorError('No processor available')
 
+    @classmethod
+    def current(cls):
+        """Returns the processor which executes the current thread's call.
+
+        :returns: processor, or None
+        :rtype:   :class:`VProcessor`
+
+        Returns None if the calling thread is not a processor worker
+        thread.
+
+        """
+        thread = threading.current_thread()
+        if isinstance(thread, _VProcessorWorker):
+            return thread.processor
+        return None
+
     def queue_call(self, function, args=[], kargs={}, group=None,
-                 result_only=False, start_callback=None, done_callback=None):
+                 result_only=False, start_callback=None, done_callback=None,
+                 priority=0):
         """Push a function call onto the call queue.
 
         :param function:       the function to call
@@ -164,6 +211,8 @@ class VProcessor(VCondition):
         :type  start_callback: callable
         :param done_callback:  function to call when the job is completed
         :type  done_callback:  callable
+        :param priority:       call priority
+        :type  priority:       int
         :returns:              call reference
         :rtype:                :class:`VProcessorCall`
         :raises:               :exc:`VProcessorError`
@@ -181,6 +230,12 @@ class VProcessor(VCondition):
         when the task is popped off the processor's queue - and will
         be executed while still holding a lock on the processor.
 
+        Calls with a higher *priority* are executed before calls with
+        a lower priority which are queued on the same queue. With fair
+        scheduling, the next call of each call group is compared and
+        the call groups with the highest priority call are served in
+        round-robin order.
+
         Raises an exception if the call cannot be scheduled. The
         default implementation does not raise any exception, however
         derived classes may override.
@@ -192,12 +247,14 @@ class VProcessor(VCondition):
             call = VProcessorCall(self, node, function, args, kargs)
             node.set_call(call, group=group, result_only=result_only,
                           start_cback=start_callback,
-                          done_cback=done_callback)
-            if self.__last_node:
-                self.__last_node.insert_after(node)
-                self.__last_node = node
+                          done_cback=done_callback, priority=priority)
+            if self.__fair:
+                queue = self.__group_queue(group)
+                node.queued_at = time.time()
+                if queue.push(node):
+                    self.__update_ready(queue)
             else:
-                self.__first_node = self.__last_node = node
+                self.__queue.push(node)
             if group:
                 call_group = self.__group_calls.get(group, None)
                 if not call_group:
@@ -243,6 +300,104 @@ class VProcessor(VCondition):
             while group_calls:
                 self._remove_node(group_calls.pop())
 
+    def set_group_limit(self, group, limit):
+        """Sets the max number of executing calls for a call group.
+
+        :param group: an object which represents the call group
+        :param limit: max executing calls (or None)
+        :type  limit: int
+        :raises:      :exc:`VProcessorError`
+
+        Overrides the processor's default call group limit for
+        *group*\ . If *limit* is None then the override is removed.
+
+        The processor holds a reference to *group* until the override
+        is removed. Raises an exception if the processor does not use
+        fair scheduling.
+
+        """
+        with self:
+            if not self.__fair:
+                raise VProcessorError('Requires fair scheduling')
+            if limit is None:
+                self.__group_limits.pop(group, None)
+                queue = self.__groups.get(group, None)
+                limit = self.__group_limit
+            elif limit < 1:
+                raise VProcessorError('Group limit must be positive')
+            else:
+                self.__group_limits[group] = limit
+                queue = self.__group_queue(group)
+            if queue:
+                queue.limit = limit
+                self.__update_ready(queue)
+                self.__release_queue(queue)
+                self.notify_all()
+
+    def group_stats(self, group):
+        """Returns statistics for a call group.
+
+        :param group: an object which represents the call group
+        :returns:     call group statistics (or None)
+        :rtype:       dict
+
+        Returns None if the processor does not use fair scheduling,
+        or if the processor does not track the call group. The
+        returned dictionary has the following keys:
+
+        +------------+-----------------------------------------------+
+        | Key        | Value                                         |
+        +============+===============================================+
+        | queued     | number of queued calls                        |
+        +------------+-----------------------------------------------+
+        | active     | number of executing calls                     |
+        +------------+-----------------------------------------------+
+        | limit      | max executing calls (or None)                 |
+        +------------+-----------------------------------------------+
+        | started    | number of calls which were started            |
+        +------------+-----------------------------------------------+
+        | wait_total | total seconds started calls were queued       |
+        +------------+-----------------------------------------------+
+        | wait_max   | max seconds a started call was queued         |
+        +------------+-----------------------------------------------+
+        | wait_next  | seconds the next call of the group was queued |
+        +------------+-----------------------------------------------+
+
+        A call group is tracked while it has queued or executing
+        calls, or while a limit is set with :meth:`set_group_limit`\
+        . Statistics are reset when tracking of the group ends.
+
+        """
+        with self:
+            queue = self.__groups.get(group, None)
+            if not queue:
+                return None
+            if queue.first:
+                wait_next = max(time.time() - queue.first.queued_at, 0.0)
+            else:
+                wait_next = 0.0
+            return dict(queued=queue.queued, active=queue.active,
+                        limit=queue.limit, started=queue.started,
+                        wait_total=queue.wait_total,
+                        wait_max=queue.wait_max, wait_next=wait_next)
+
+    def call_groups(self):
+        """Returns call groups tracked by fair scheduling.
+
+        :returns: call groups
+        :rtype:   list
+
+        See :meth:`group_stats` for which call groups are tracked.
+
+        """
+        with self:
+            return list(self.__groups.keys())
+
+    @property
+    def fair(self):
+        """True if the processor uses fair scheduling (bool)."""
+        return self.__fair
+
     def workers(self):
         """Returns the currently set target number of workers.
 
@@ -296,22 +451,32 @@ class VProcessor(VCondition):
         with self:
             self.set_workers(0)
             if purge:
-                while self.__last_node:
-                    node = self.__last_node
-                    node.call.cancel()
-                    # This call should be redundant
-                    self._remove_node(node)
+                if self.__fair:
+                    queues = list(self.__groups.values())
+                else:
+                    queues = [self.__queue]
+                for queue in queues:
+                    while queue.last:
+                        node = queue.last
+                        call = node.get_call()
+                        if call:
+                            call.cancel()
+                        # This call should be redundant
+                        self._remove_node(node)
 
     def _pop_call(self):
         """Pops the next call for execution.
 
-        :returns: (a call for execution, start_callback, done_callback)
-        :rtype:   tuple(:class:`VProcessorCall`, callable, callable)
+        :returns: (call for execution, start_callback, done_callback, group)
+        :rtype:   tuple(:class:`VProcessorCall`, callable, callable, object)
         :raises:  :exc:`VProcessorNoCall`, :exc:`VProcessorStopWorker`
 
         Raises an exception if there is no call available, or if the
         worker which pops the call should end its operation.
 
+        The returned group must be passed to :meth:`_call_done` when
+        execution of the call has completed.
+
         """
         with self:
             if self._target_workers < self._current_workers:
@@ -319,22 +484,53 @@ class VProcessor(VCondition):
                 if self._target_workers < self._current_workers:
                     self.notify()
                 raise VProcessorStopWorker()
-            if self.__first_node is None:
-                raise VProcessorNoCall()
-            node = self.__first_node
-            # When extracting, clear properties on node - this is particularly
-            # important because node has circular reference with its node.call
-            call, node.call = node.call, None
-            start_cback, node.start_cback = node.start_cback, None
-            done_cback, node.done_cback = node.done_cback, None
-            self._remove_node(self.__first_node)
-            self._active_calls += 1
-            return (call, start_cback, done_cback)
-
-    def _call_done(self):
-        """Notification from worker that processing of a call was completed."""
+            while True:
+                if self.__fair:
+                    if not self.__ready:
+                        raise VProcessorNoCall()
+                    # Take next group with highest priority in round-robin
+                    priority = max(self.__ready)
+                    ready = self.__ready[priority]
+                    queue = ready.popleft()
+                    if not ready:
+                        self.__ready.pop(priority)
+                    queue.ready = None
+                    node = queue.first
+                    wait = max(time.time() - node.queued_at, 0.0)
+                    queue.started += 1
+                    queue.wait_total += wait
+                    queue.wait_max = max(queue.wait_max, wait)
+                    queue.active += 1
+                else:
+                    queue = None
+                    node = self.__queue.first
+                    if node is None:
+                        raise VProcessorNoCall()
+                # When extracting, clear properties on node - this is
+                # particularly important because node has circular
+                # reference with its node.call
+                call, node.call = node.get_call(), None
+                start_cback, node.start_cback = node.start_cback, None
+                done_cback, node.done_cback = node.done_cback, None
+                self._remove_node(node)
+                if call is None:
+                    # Result-only call was dereferenced, skip
+                    if queue:
+                        self.__group_done(queue)
+                    continue
+                self._active_calls += 1
+                return (call, start_cback, done_cback, queue)
+
+    def _call_done(self, group=None):
+        """Notification from worker that processing of a call was completed.
+
+        :param group: group returned by :meth:`_pop_call` for the call
+
+        """
         with self:
             self._active_calls -= 1
+            if group:
+                self.__group_done(group)
 
     def _remove_node(self, node):
         """Remove call from call queue (if it is in queue).
@@ -347,11 +543,11 @@ class VProcessor(VCondition):
 
         """
         with self:
-            if not node._prev:
-                self.__first_node = node._next
-            if not node._next:
-                self.__last_node = node._prev
-            node.remove()
+            queue = node.queue
+            if queue is None:
+                return
+            is_first = (node is queue.first)
+            queue.remove(node)
 
             group = node.group
             if group:
@@ -359,15 +555,68 @@ class VProcessor(VCondition):
                 if call_group:
                     call_group.discard(node)
                 if not call_group:
-                    self.__group_calls.pop(group)
+                    self.__group_calls.pop(group, None)
                 node.group = None
 
             self._queued_calls -= 1
 
+            if self.__fair:
+                if is_first:
+                    self.__update_ready(queue)
+                self.__release_queue(queue)
+
     def _deref_call(self, node):
         with self:
-            if not node.is_result_only():
-                self.remove_call(node)
+            if node.is_result_only():
+                self._remove_node(node)
+
+    def __group_queue(self, group):
+        # Returns call queue of a call group, lazy-creating the queue
+        queue = self.__groups.get(group, None)
+        if queue is None:
+            queue = _VCallQueue()
+            queue.limit = self.__group_limits.get(group, self.__group_limit)
+            self.__groups[group] = queue
+            queue.group = group
+        return queue
+
+    def __release_queue(self, queue):
+        # Stops tracking a call group if it no longer needs to be tracked
+        if (not queue.queued and not queue.active
+            and queue.group not in self.__group_limits):
+            if self.__groups.get(queue.group, None) is queue:
+                self.__groups.pop(queue.group)
+
+    def __group_done(self, queue):
+        # Updates call group after completion of one of its calls
+        queue.active -= 1
+        if queue.ready is None and queue.first:
+            self.__update_ready(queue)
+            if queue.ready is not None:
+                self.notify()
+        self.__release_queue(queue)
+
+    def __update_ready(self, queue):
+        # Updates a call group's membership in the ready queues
+        if (queue.first is None
+            or (queue.limit is not None and queue.active >= queue.limit)):
+            priority = None
+        else:
+            priority = queue.first.priority
+        if priority == queue.ready:
+            return
+        if queue.ready is not None:
+            ready = self.__ready[queue.ready]
+            ready.remove(queue)
+            if not ready:
+                self.__ready.pop(queue.ready)
+        if priority is not None:
+            ready = self.__ready.get(priority, None)
+            if ready is None:
+                ready = collections.deque()
+                self.__ready[priority] = ready
+            ready.append(queue)
+        queue.ready = priority
 
 
 class VProcessorCall(VResult):
@@ -445,13 +694,19 @@ class _VProcessorWorker(threading.Thread):
         self.__processor = processor
         self.__log = logger
 
+    @property
+    def processor(self):
+        """Processor which owns the worker."""
+        return self.__processor
+
     def run(self):
         processor = self.__processor
         while True:
             try:
                 with processor:
                     try:
-                        call, start_cback, done_cback = processor._pop_call()
+                        _pop = processor._pop_call()
+                        call, start_cback, done_cback, group = _pop
                     except VProcessorNoCall:
                         processor.wait()
                         continue
@@ -475,7 +730,7 @@ class _VProcessorWorker(threading.Thread):
                         self.__log.warn('worker execute raised exception')
                         self.__log.log_trace(lvl=self.__log.WARN)
 
-                processor._call_done()
+                processor._call_done(group)
                 if done_cback:
                     try:
                         done_cback()
@@ -487,7 +742,7 @@ class _VProcessorWorker(threading.Thread):
                             _v_silent(e)
             finally:
                 # Make sure to dereference any object we don't need
-                call = start_cback = done_cback = None
+                call = start_cback = done_cback = group = None
 
 
 class _VCallNode(object):
@@ -500,8 +755,12 @@ class _VCallNode(object):
         self.start_cback = None
         self.done_cback = None
         self.group = None
+        self.priority = 0
+        self.queued_at = None
+        self.queue = None
 
-    def set_call(self, call, group, result_only, start_cback, done_cback):
+    def set_call(self, call, group, result_only, start_cback, done_cback,
+                 priority=0):
         self.group = group
         if result_only:
             self.call = weakref.ref(call)
@@ -509,6 +768,14 @@ class _VCallNode(object):
             self.call = call
         self.start_cback = start_cback
         self.done_cback = done_cback
+        self.priority = priority
+
+    def get_call(self):
+        """Returns the node's call (or None if dereferenced)."""
+        call = self.call
+        if isinstance(call, weakref.ref):
+            call = call()
+        return call
 
     def is_result_only(self):
         return not isinstance(self.call, VProcessorCall)
@@ -545,3 +812,61 @@ class _VCallNode(object):
             node._prev = self._prev
         self._prev = node
         node._next = self
+
+
+class _VCallQueue(object):
+    """Queue of :class:`_VCallNode` sorted by call priority.
+
+    Calls with the same priority are kept in the order they were
+    pushed. Also holds the state which a :class:`VProcessor` keeps for
+    a call group when it uses fair scheduling.
+
+    """
+
+    def __init__(self):
+        self.first = None
+        self.last = None
+        self.queued = 0
+        self.group = None
+        self.limit = None
+        self.active = 0
+        self.ready = None      # priority of ready queue holding this queue
+        self.started = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def push(self, node):
+        """Pushes a node onto the queue.
+
+        :returns: True if the node was pushed as the first node
+        :rtype:   bool
+
+        """
+        last = self.last
+        if last is None:
+            self.first = self.last = node
+        elif last.priority >= node.priority:
+            last.insert_after(node)
+            self.last = node
+        else:
+            prev = last._prev
+            while prev and prev.priority < node.priority:
+                prev = prev._prev
+            if prev:
+                prev.insert_after(node)
+            else:
+                self.first.insert_before(node)
+                self.first = node
+        node.queue = self
+        self.queued += 1
+        return node is self.first
+
+    def remove(self, node):
+        """Removes a node which is held by the queue."""
+        if node is self.first:
+            self.first = node._next
+        if node is self.last:
+            self.last = node._prev
+        node.remove()
+        node.queue = None
+        self.queued -= 1
@@ -20,6 +20,7 @@
 from __future__ import print_function, unicode_literals
 
 import base64
+from binascii import unhexlify
 from collections import deque
 import os
 import tempfile
@@ -28,41 +29,67 @@ import time
 import weakref
 
 from versile.internal import _b2s, _s2b, _bfmt, _vexport, _v_silent, _pyver
-from versile.internal import _b_ord, _b_chr
+from versile.internal import _b_ord, _b_chr, _vspeedups, _vmemoryview
 from versile.common.iface import abstract, VInterface
 
-__all__ = ['VBitfield', 'VByteBuffer', 'VCondition', 'VConfig',
-           'VLinearIDProvider', 'VLockable', 'VResult', 'VResultException',
-           'VNoResult', 'VCancelledResult', 'VHaveResult', 'VSimpleBus',
+__all__ = ['VBitfield', 'VByteBlockPool', 'VByteBuffer', 'VCondition',
+           'VConfig', 'VLinearIDProvider', 'VLockable', 'VResult',
+           'VResultException', 'VNoResult', 'VCancelledResult',
+           'VHaveResult', 'VSimpleBus',
            'IVSimpleBusListener', 'VNamedTemporaryFile', 'VObjectIdentifier',
-           'VStatus', 'VUniqueIDProvider', 'bytes_to_posint',
-           'bytes_to_signedint', 'decode_pem_block', 'encode_pem_block',
-           'netbytes_to_posint', 'netbytes_to_signedint', 'posint_to_bytes',
-           'posint_to_netbytes', 'signedint_to_bytes', 'signedint_to_netbytes']
+           'VStatus', 'VUniqueIDProvider', 'VUnlockedByteBuffer',
+           'bytes_to_posint', 'bytes_to_signedint', 'decode_pem_block',
+           'encode_pem_block', 'netbytes_to_posint', 'netbytes_to_signedint',
+           'posint_to_bytes', 'posint_to_netbytes', 'signedint_to_bytes',
+           'signedint_to_netbytes']
 __all__ = _vexport(__all__)
 
 
+if _pyver == 2 and _vmemoryview:
+    def _join_bytes(chunks):
+        # Python 2 bytes join does not accept memoryview elements
+        return b''.join([c.tobytes() if isinstance(c, memoryview) else c
+                         for c in chunks])
+else:
+    _join_bytes = b''.join
+
+
 class VByteBuffer(object):
     """Holds a FIFO buffer of bytes data.
 
-    :param data: data to place in buffer
-    :type  data: bytes
+    :param data:  data to place in buffer
+    :type  data:  bytes
+    :param views: if True buffer operates in zero-copy 'views' mode
+    :type  views: bool
 
     The class aims to improve performance by holding a list of
     buffered bytes objects until they have been fully read, and
     minimizing byte object join operations, performing only when
     needed.
 
-    Atomic operation methods are thread-safe.
+    In 'views' mode appended chunks are held as :class:`memoryview`
+    objects, and data returned by :meth:`pop_list`\ , :meth:`pop`\ ,
+    :meth:`peek_list` and :meth:`peek` are :class:`memoryview`
+    slices which reference the appended data without copying
+    it. :meth:`pop` and :meth:`peek` only need to copy when returned
+    data spans multiple chunks. Appended data must not be modified
+    while it is referenced by the buffer or by returned views. On
+    python versions without :class:`memoryview` the *views* argument
+    is ignored.
+
+    Atomic operation methods are thread-safe. For buffers which are
+    only accessed by a single thread, :class:`VUnlockedByteBuffer`
+    avoids the overhead of locking.
 
     .. automethod:: __len__
 
     """
 
-    def __init__(self, data=None):
+    def __init__(self, data=None, views=False):
         self._chunks = deque()
         self._length = 0
         self._start = 0
+        self._views = views and _vmemoryview
         self.__lock = threading.Lock()
         if data:
             self.append(data)
@@ -76,8 +103,7 @@ class VByteBuffer(object):
         """
         self.__lock.acquire()
         try:
-            self._chunks.append(chunk)
-            self._length += len(chunk)
+            self._append(chunk)
         finally:
             self.__lock.release()
 
@@ -90,9 +116,7 @@ class VByteBuffer(object):
         """
         self.__lock.acquire()
         try:
-            for chunk in chunks:
-                self._chunks.append(chunk)
-                self._length += len(chunk)
+            self._append_list(chunks)
         finally:
             self.__lock.release()
 
@@ -111,44 +135,9 @@ class VByteBuffer(object):
         """
         self.__lock.acquire()
         try:
-            result = []
-            start = self._start
-            length = self._length
-            if num_bytes < 0:
-                num_bytes = length
-            bytes_left = num_bytes
-            while self._chunks and bytes_left:
-                current = self._chunks[0]
-                current_len = len(current)
-                current_left = current_len - start
-                bytes_to_read = min(current_left, bytes_left)
-                if start == 0:
-                    if bytes_to_read == current_left:
-                        result.append(current)
-                        self._chunks.popleft()
-                        start = 0
-                        length -= bytes_to_read
-                    else:
-                        result.append(current[:bytes_to_read])
-                        start += bytes_to_read
-                        length -= bytes_to_read
-                else:
-                    if bytes_to_read == current_left:
-                        result.append(current[start:])
-                        self._chunks.popleft()
-                        start = 0
-                        length -= bytes_to_read
-                    else:
-                        end_pos = start + bytes_to_read
-                        result.append(current[start:end_pos])
-                        start += bytes_to_read
-                        length -= bytes_to_read
-                bytes_left -= bytes_to_read
-            self._start = start
-            self._length = length
+            return self._pop_list(num_bytes)
         finally:
             self.__lock.release()
-        return result
 
     def pop(self, num_bytes=-1):
         """Pops data from the start of the buffer.
@@ -156,14 +145,37 @@ class VByteBuffer(object):
         :param num_bytes: number of bytes to pop
         :type  num_bytes: int
         :returns:         popped data
-        :rtype:           bytes
+        :rtype:           bytes (:class:`memoryview` in 'views' mode)
 
         If *num_bytes* <0 then all data in the buffer is returned. If
         fewer than *num_bytes* are available, then all available bytes
         in the buffer are returned.
 
         """
-        return b''.join(self.pop_list(num_bytes))
+        return self.__join(self.pop_list(num_bytes))
+
+    def readinto(self, buf):
+        """Pops data from the start of the buffer into a writable buffer.
+
+        :param buf: buffer to receive data
+        :type  buf: bytearray, :class:`memoryview`
+        :returns:   number of bytes popped into *buf*
+        :rtype:     int
+
+        Pops up to len(*buf*) bytes and copies them directly into
+        *buf*\ , without creating intermediate bytes objects.
+
+        """
+        if _vmemoryview:
+            target = memoryview(buf)
+        else:
+            target = buf
+        pos = 0
+        for chunk in self.pop_list(len(target)):
+            end = pos + len(chunk)
+            target[pos:end] = chunk
+            pos = end
+        return pos
 
     def peek_list(self, num_bytes=-1):
         """Retreives data from the start of the buffer without popping.
@@ -174,50 +186,9 @@ class VByteBuffer(object):
         """
         self.__lock.acquire()
         try:
-            result = []
-            if self._length > 0:
-                start = self._start
-                if num_bytes < 0:
-                    num_bytes = self._length
-                bytes_left = num_bytes
-                chunk_it = iter(self._chunks)
-                current = next(chunk_it)
-                while bytes_left:
-                    current_len = len(current)
-                    current_left = current_len - start
-                    bytes_to_read = min(current_left, bytes_left)
-                    if start == 0:
-                        if bytes_to_read == current_left:
-                            result.append(current)
-                            start = 0
-                            bytes_left -= bytes_to_read
-                            try:
-                                current = next(chunk_it)
-                            except StopIteration:
-                                break
-                        else:
-                            result.append(current[:bytes_to_read])
-                            start += bytes_to_read
-                            bytes_left -= bytes_to_read
-                            break
-                    else:
-                        if bytes_to_read == current_left:
-                            result.append(current[start:])
-                            start = 0
-                            bytes_left -= bytes_to_read
-                            try:
-                                current = next(chunk_it)
-                            except StopIteration:
-                                break
-                        else:
-                            end_pos = start + bytes_to_read
-                            result.append(current[start:end_pos])
-                            start += bytes_to_read
-                            bytes_left -= bytes_to_read
-                            break
+            return self._peek_list(num_bytes)
         finally:
             self.__lock.release()
-        return result
 
     def peek(self, num_bytes=-1):
         """Retreives data from the buffer without popping.
@@ -225,7 +196,7 @@ class VByteBuffer(object):
         Similar to :meth:`pop`\ , but leaves returned data in the buffer.
 
         """
-        return b''.join(self.peek_list(num_bytes))
+        return self.__join(self.peek_list(num_bytes))
 
     def remove(self, num_bytes=-1):
         """Removes data from the start of the buffer.
@@ -241,48 +212,49 @@ class VByteBuffer(object):
         """
         self.__lock.acquire()
         try:
-            start = self._start
-            length = self._length
-            if num_bytes < 0:
-                num_bytes = length
-            bytes_left = num_bytes
-            while self._chunks and bytes_left:
-                current = self._chunks[0]
-                current_len = len(current)
-                current_left = current_len - start
-                bytes_to_remove = min(current_left, bytes_left)
-                if start == 0:
-                    if bytes_to_remove == current_left:
-                        self._chunks.popleft()
-                        start = 0
-                        length -= bytes_to_remove
-                    else:
-                        start += bytes_to_remove
-                        length -= bytes_to_remove
-                else:
-                    if bytes_to_remove == current_left:
-                        self._chunks.popleft()
-                        start = 0
-                        length -= bytes_to_remove
-                    else:
-                        end_pos = start + bytes_to_remove
-                        start += bytes_to_remove
-                        length -= bytes_to_remove
-                bytes_left -= bytes_to_remove
-            self._start = start
-            num_removed = self._length - length
-            self._length = length
+            return self._remove(num_bytes)
         finally:
             self.__lock.release()
-        return num_removed
+
+    def compact(self, max_bytes):
+        """Copies held data if the buffer holds only a small amount of data.
+
+        :param max_bytes: max buffered bytes for performing a copy
+        :type  max_bytes: int
+        :returns:         True if buffered data was copied
+        :rtype:           bool
+
+        If the buffer holds data which spans chunks or references
+        :class:`memoryview` data, and the amount of data is not
+        larger than *max_bytes*\ , then the data is replaced with a
+        single bytes copy. This releases references to appended data,
+        so that e.g. a small amount of buffered data does not keep a
+        large :class:`VByteBlockPool` block referenced.
+
+        """
+        self.__lock.acquire()
+        try:
+            return self._compact(max_bytes)
+        finally:
+            self.__lock.release()
+
+    @property
+    def views(self):
+        """True if the buffer operates in 'views' mode (bool)."""
+        return self._views
+
+    def __join(self, chunks):
+        if self._views:
+            if len(chunks) == 1:
+                return chunks[0]
+            return memoryview(_join_bytes(chunks))
+        return _join_bytes(chunks)
 
     def clear(self):
         """Clears the buffer."""
         self.__lock.acquire()
         try:
-            self._chunks.clear()
-            self._length = 0
-            self._start = 0
+            self._clear()
         finally:
             self.__lock.release()
 
@@ -294,6 +266,316 @@ class VByteBuffer(object):
             length = int(length)
         return length
 
+    # Unsynchronized implementations of the atomic buffer operations,
+    # called by VByteBuffer with its lock held and used directly by
+    # VUnlockedByteBuffer
+
+    def _append(self, chunk):
+        if self._views and not isinstance(chunk, memoryview):
+            chunk = memoryview(chunk)
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+    def _append_list(self, chunks):
+        if self._views:
+            chunks = [c if isinstance(c, memoryview) else memoryview(c)
+                      for c in chunks]
+        for chunk in chunks:
+            self._chunks.append(chunk)
+            self._length += len(chunk)
+
+    def _pop_list(self, num_bytes=-1):
+        result = []
+        start = self._start
+        length = self._length
+        if num_bytes < 0:
+            num_bytes = length
+        bytes_left = num_bytes
+        while self._chunks and bytes_left:
+            current = self._chunks[0]
+            current_len = len(current)
+            current_left = current_len - start
+            bytes_to_read = min(current_left, bytes_left)
+            if start == 0:
+                if bytes_to_read == current_left:
+                    result.append(current)
+                    self._chunks.popleft()
+                    start = 0
+                    length -= bytes_to_read
+                else:
+                    result.append(current[:bytes_to_read])
+                    start += bytes_to_read
+                    length -= bytes_to_read
+            else:
+                if bytes_to_read == current_left:
+                    result.append(current[start:])
+                    self._chunks.popleft()
+                    start = 0
+                    length -= bytes_to_read
+                else:
+                    end_pos = start + bytes_to_read
+                    result.append(current[start:end_pos])
+                    start += bytes_to_read
+                    length -= bytes_to_read
+            bytes_left -= bytes_to_read
+        self._start = start
+        self._length = length
+        return result
+
+    def _peek_list(self, num_bytes=-1):
+        result = []
+        if self._length > 0:
+            start = self._start
+            if num_bytes < 0:
+                num_bytes = self._length
+            bytes_left = num_bytes
+            chunk_it = iter(self._chunks)
+            current = next(chunk_it)
+            while bytes_left:
+                current_len = len(current)
+                current_left = current_len - start
+                bytes_to_read = min(current_left, bytes_left)
+                if start == 0:
+                    if bytes_to_read == current_left:
+                        result.append(current)
+                        start = 0
+                        bytes_left -= bytes_to_read
+                        try:
+                            current = next(chunk_it)
+                        except StopIteration:
+                            break
+                    else:
+                        result.append(current[:bytes_to_read])
+                        start += bytes_to_read
+                        bytes_left -= bytes_to_read
+                        break
+                else:
+                    if bytes_to_read == current_left:
+                        result.append(current[start:])
+                        start = 0
+                        bytes_left -= bytes_to_read
+                        try:
+                            current = next(chunk_it)
+                        except StopIteration:
+                            break
+                    else:
+                        end_pos = start + bytes_to_read
+                        result.append(current[start:end_pos])
+                        start += bytes_to_read
+                        bytes_left -= bytes_to_read
+                        break
+        return result
+
+    def _remove(self, num_bytes=-1):
+        start = self._start
+        length = self._length
+        if num_bytes < 0:
+            num_bytes = length
+        bytes_left = num_bytes
+        while self._chunks and bytes_left:
+            current = self._chunks[0]
+            current_len = len(current)
+            current_left = current_len - start
+            bytes_to_remove = min(current_left, bytes_left)
+            if start == 0:
+                if bytes_to_remove == current_left:
+                    self._chunks.popleft()
+                    start = 0
+                    length -= bytes_to_remove
+                else:
+                    start += bytes_to_remove
+                    length -= bytes_to_remove
+            else:
+                if bytes_to_remove == current_left:
+                    self._chunks.popleft()
+                    start = 0
+                    length -= bytes_to_remove
+                else:
+                    end_pos = start + bytes_to_remove
+                    start += bytes_to_remove
+                    length -= bytes_to_remove
+            bytes_left -= bytes_to_remove
+        self._start = start
+        num_removed = self._length - length
+        self._length = length
+        return num_removed
+
+    def _clear(self):
+        self._chunks.clear()
+        self._length = 0
+        self._start = 0
+
+    def _compact(self, max_bytes):
+        chunks = self._chunks
+        if not chunks or self._length > max_bytes:
+            return False
+        if (len(chunks) == 1 and not self._start
+            and not isinstance(chunks[0], memoryview)):
+            return False
+        data = _join_bytes(self._pop_list())
+        if self._views:
+            data = memoryview(data)
+        chunks.append(data)
+        self._length = len(data)
+        return True
+
+
+class VUnlockedByteBuffer(VByteBuffer):
+    """A :class:`VByteBuffer` without thread synchronization.
+
+    Has the same interface as :class:`VByteBuffer`\ , however buffer
+    operations do not acquire a lock and are not thread-safe. The
+    class should only be used for buffers which are accessed by a
+    single thread, such as buffers of a reactor's producer/consumer
+    chain which are only accessed from the reactor thread.
+
+    """
+
+    append = VByteBuffer._append
+    append_list = VByteBuffer._append_list
+    pop_list = VByteBuffer._pop_list
+    peek_list = VByteBuffer._peek_list
+    remove = VByteBuffer._remove
+    clear = VByteBuffer._clear
+    compact = VByteBuffer._compact
+
+
+class VByteBlockPool(object):
+    """Pool of :class:`bytearray` blocks for receiving data without copying.
+
+    :param block_size: size of pooled blocks
+    :type  block_size: int
+    :param max_blocks: max number of retired blocks held for reuse
+    :type  max_blocks: int
+
+    Data is received with calls such as
+    :meth:`socket.socket.recv_into` into the free end of the pool's
+    current block. :meth:`reserve` returns a writable
+    :class:`memoryview` of free block space, and after data has been
+    received into it :meth:`commit` returns a :class:`memoryview` of
+    the received data. Ownership of the received data passes to the
+    holder of the view, and the pool never writes to that part of the
+    block again. Consecutive reads, also from different connections,
+    are received into the same block until it is full.
+
+    A full block is retired, and is reused once all views of the
+    block have been released. If no retired block can be reused then
+    a new block is allocated. At most *max_blocks* retired blocks are
+    held by the pool, other blocks are freed when their views are
+    released.
+
+    Connections do not hold blocks between reads, however buffered
+    views keep their block referenced. Consumers which keep a small
+    amount of received data buffered, e.g. a partial message on an
+    idle connection, should copy it with :meth:`VByteBuffer.compact`
+    so the block can be released.
+
+    Requires :class:`memoryview`\ . The pool is not thread-safe. A
+    pool for use by the reactor thread of a reactor can be obtained
+    with :meth:`reactor_pool`\ .
+
+    """
+
+    __reactor_pools = weakref.WeakKeyDictionary()
+    __reactor_pools_lock = threading.Lock()
+
+    def __init__(self, block_size=0x10000, max_blocks=8):
+        self.__block_size = block_size
+        self.__min_reserve = block_size // 16
+        self.__max_blocks = max_blocks
+        self.__block = None
+        self.__view = None
+        self.__pos = 0
+        self.__retired = deque()
+
+    @classmethod
+    def reactor_pool(cls, reactor):
+        """Returns a pool for a reactor, lazy-creating the pool.
+
+        :param reactor: the reactor
+        :returns:       reactor's pool
+        :rtype:         :class:`VByteBlockPool`
+
+        The returned pool should only be used from the reactor's
+        thread.
+
+        """
+        with cls.__reactor_pools_lock:
+            pool = cls.__reactor_pools.get(reactor, None)
+            if pool is None:
+                pool = cls()
+                cls.__reactor_pools[reactor] = pool
+            return pool
+
+    def reserve(self, max_len):
+        """Returns free block space for receiving data.
+
+        :param max_len: max bytes to receive
+        :type  max_len: int
+        :returns:       free block space
+        :rtype:         :class:`memoryview`
+
+        The returned view may be shorter than *max_len*\ , it holds at
+        most one block. Data received into the view is only retained
+        if :meth:`commit` is called before the pool is used again.
+
+        """
+        free = self.__block_size - self.__pos
+        if self.__block is None or (free < max_len
+                                    and free < self.__min_reserve):
+            self.__new_block()
+            free = self.__block_size
+        pos = self.__pos
+        return self.__view[pos:(pos + min(max_len, free))]
+
+    def commit(self, num_bytes):
+        """Takes ownership of data received into reserved space.
+
+        :param num_bytes: bytes received at start of reserved space
+        :type  num_bytes: int
+        :returns:         received data
+        :rtype:           :class:`memoryview`
+
+        """
+        start = self.__pos
+        self.__pos = end = start + num_bytes
+        return self.__view[start:end]
+
+    @property
+    def block_size(self):
+        """Size of pooled blocks (int)."""
+        return self.__block_size
+
+    def __new_block(self):
+        block, self.__block = self.__block, None
+        self.__view = None
+        if block is not None:
+            self.__retired.append(block)
+        for i in xrange(len(self.__retired)):
+            block = self.__retired.popleft()
+            if self.__unreferenced(block):
+                break
+            self.__retired.append(block)
+        else:
+            block = bytearray(self.__block_size)
+            while len(self.__retired) > self.__max_blocks:
+                self.__retired.popleft()
+        self.__block = block
+        self.__view = memoryview(block)
+        self.__pos = 0
+
+    @staticmethod
+    def __unreferenced(block):
+        # A bytearray cannot be resized while it has exported views
+        try:
+            block.append(0)
+        except BufferError:
+            return False
+        else:
+            del block[-1]
+            return True
+
+
 @abstract
 class VUniqueIDProvider(object):
     """Base class for generators of unique integer ids.
@@ -680,7 +962,8 @@ class VResult(VCondition):
         if timeout:
             start_time = time.time()
         with self:
-            while True:
+            # Result may have been pushed before the lock was acquired
+            while not self._has_result:
                 if timeout is not None and timeout > 0.0:
                     current_time = time.time()
                     if current_time > start_time + timeout:
@@ -689,8 +972,6 @@ class VResult(VCondition):
                     super(VResult, self).wait(wait_time)
                 else:
                     super(VResult, self).wait()
-                if self._has_result:
-                    break
 
     def result(self, timeout=None):
         """Returns the call result.
@@ -1527,28 +1808,14 @@ def posint_to_bytes(number):
     if number < 0:
         raise TypeError('Number must be a non-negative integer')
 
-    hex_str = hex(number)
-    hex_str_len = len(hex_str)
-    if hex_str[-1] == 'L':
-        hex_str_len -= 1
-    offset = hex_str_len % 2
-    num_bytes = (hex_str_len // 2) + offset - 1
-
-    data = []
     if _pyver == 2:
-        if offset:
-            data.append(_s2b(_b_chr(int(hex_str[2], 16))))
-        for i in xrange(num_bytes - offset):
-            pos = 2 + 2*i + offset
-            data.append(_s2b(_b_chr(int(hex_str[pos:(pos+2)], 16))))
-        return b''.join(data)
+        hex_str = _bfmt(b'%x', number)
+        if len(hex_str) % 2:
+            hex_str = b'0' + hex_str
+        return _s2b(unhexlify(hex_str))
     else:
-        if offset:
-            data.append(int(hex_str[2], 16))
-        for i in xrange(num_bytes - offset):
-            pos = 2 + 2*i + offset
-            data.append(int(hex_str[pos:(pos+2)], 16))
-        return bytes(data)
+        num_bytes = max((number.bit_length() + 7) // 8, 1)
+        return number.to_bytes(num_bytes, 'big')
 
 def posint_to_netbytes(number):
     """Converts a non-negative integer to a :term:`VP` byte representation.
@@ -1750,6 +2017,12 @@ def netbytes_to_signedint(data):
     else:
         return (None, call_info)
 
+if _vspeedups:
+    posint_to_netbytes = _vspeedups.posint_to_netbytes
+    signedint_to_netbytes = _vspeedups.signedint_to_netbytes
+    netbytes_to_posint = _vspeedups.netbytes_to_posint
+    netbytes_to_signedint = _vspeedups.netbytes_to_signedint
+
 
 def decode_pem_block(block):
     """Decodes a :term:`PEM` formatted block with BEGIN/END delimiters.
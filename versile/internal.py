@@ -19,6 +19,7 @@
 """Functionality for internal use by versile modules."""
 from __future__ import print_function, unicode_literals
 
+import os
 import sys
 import platform
 
@@ -86,6 +87,23 @@ else:
     def _bfmt(fmt, *args):
         return fmt % args
 
+# True if the memoryview type is available (it is missing on python 2.6)
+try:
+    memoryview
+except NameError:
+    _vmemoryview = False
+else:
+    _vmemoryview = True
+
+# Optional native implementations of codec primitives, which are not
+# loaded if the VERSILE_NO_SPEEDUPS environment variable is set
+_vspeedups = None
+if _vplatform == 'cpython' and not os.environ.get('VERSILE_NO_SPEEDUPS'):
+    try:
+        from versile import _speedups as _vspeedups
+    except ImportError:
+        pass
+
 def _v_silent(exc):
     """Receive a 'silent' exception.
 
@@ -135,3 +135,21 @@ class VMessageCode(object):
 
     KEEP_ALIVE               = 0x09
     """Sends a keep-alive notification."""
+
+    NOTIFY_DEREF_BATCH       = 0x0a
+    """Notify of local dereferences of a set of remotely referenced objects.
+
+    Protocol extension which is sent only to a peer which offered
+    dereference batching during the link handshake. An offer is sent
+    as a NOTIFY_DEREF message for peer ID 0, which is never assigned
+    to an object.
+
+    """
+
+    CONFIRM_DEREF_BATCH      = 0x0b
+    """Notifies a set of local objects no longer have remote references.
+
+    Protocol extension which is sent only in response to
+    NOTIFY_DEREF_BATCH.
+
+    """
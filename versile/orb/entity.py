@@ -19,35 +19,40 @@
 """Implements the :term:`VFE` specification."""
 from __future__ import print_function, unicode_literals
 
+from binascii import hexlify
 from collections import deque
 from decimal import Decimal
+import mmap
 import operator
+import tempfile
 from threading import Lock
 import traceback
 import weakref
 
 from versile.internal import _b2s, _s2b, _vexport, _b_ord, _b_chr, _pyver
+from versile.internal import _vspeedups, _vmemoryview
 from versile.common.iface import abstract
 from versile.common.pending import VPending
 from versile.common.util import VByteBuffer, VLockable
 from versile.common.util import posint_to_netbytes, signedint_to_netbytes
 from versile.common.util import netbytes_to_posint, netbytes_to_signedint
-from versile.common.util import VLinearIDProvider, VResult
+from versile.common.util import VLinearIDProvider, VResult, _join_bytes
 from versile.orb.const import VEntityCode
 from versile.orb.error import VEntityError, VEntityReaderError
 from versile.orb.error import VEntityWriterError
 
 __all__ = ['VBoolean', 'VBooleanDecoder', 'VBytes', 'VBytesDecoder',
-           'VCallContext', 'VCallError', 'VFloat', 'VFloatDecoder',
-           'VEntity', 'VEntityDecoder', 'VEntityDecoderBase',
+           'VBytesSink', 'VCallContext', 'VCallError', 'VFloat',
+           'VFloatDecoder', 'VEntity', 'VEntityDecoder', 'VEntityDecoderBase',
            'VEntityReader', 'VEntityWriter', 'VException',
            'VExceptionDecoder', 'VIOContext', 'VInteger',
            'VIntegerDecoder', 'VNone', 'VNoneDecoder', 'VObject',
            'VObjectCall', 'VObjectDecoder', 'VObjectIOContext', 'VProxy',
            'VReference', 'VReferenceCall', 'VReferenceDecoder',
-           'VSimulatedException', 'VString', 'VStringDecoder', 'VTagged',
-           'VTaggedDecoder', 'VTaggedParseError', 'VTaggedParseUnknown',
-           'VTaggedParser', 'VTuple', 'VTupleDecoder']
+           'VSimulatedException', 'VStreamedBytes', 'VString',
+           'VStringDecoder', 'VTagged', 'VTaggedDecoder',
+           'VTaggedParseError', 'VTaggedParseUnknown', 'VTaggedParser',
+           'VTuple', 'VTupleDecoder']
 __all__ = _vexport(__all__)
 
 
@@ -104,6 +109,87 @@ def _meta_op2(oper, cast):
             return oper(a, b)
     return perform_op
 
+def _bulk_posint(data, pos, end):
+    """Decodes a netbytes integer at data[pos:end].
+
+    Returns (number, new_pos), or (None, pos) if data is incomplete.
+
+    """
+    if pos >= end:
+        return (None, pos)
+    first_byte = _b_ord(data[pos])
+    if first_byte <= 246:
+        return (first_byte, pos + 1)
+    if first_byte < 255:
+        num_bytes, start = first_byte - 246, pos + 1
+    else:
+        num_bytes, start = _bulk_posint(data, pos + 1, end)
+        if num_bytes is None:
+            return (None, pos)
+        num_bytes += 9
+    stop = start + num_bytes
+    if stop > end:
+        return (None, pos)
+    number = int(hexlify(data[start:stop].tobytes()), 16) + 247
+    return (number, stop)
+
+def _entity_header(code, number):
+    """Returns entity code byte followed by netbytes encoding of number."""
+    if _pyver == 2:
+        return _s2b(_b_chr(code)) + posint_to_netbytes(number)
+    else:
+        return bytes((code,)) + posint_to_netbytes(number)
+
+if _vspeedups:
+    _bulk_posint = _vspeedups.bulk_posint
+    _entity_header = _vspeedups.entity_header
+
+# Node tags for implicit encodings decoded by VEntity._v_decode_bytes;
+# explicit encodings are tagged with their VEntityCode
+_BULK_DONE = -1
+_BULK_INT = -2
+_BULK_BYTES = -3
+_BULK_TUPLE = -4
+
+# Explicit VInteger encodings for values in the range [_VINT_CACHE_MIN,
+# _VINT_CACHE_MAX) are cached on first use, as such values (e.g. link
+# message codes and message IDs) are encoded repeatedly
+_VINT_CACHE_MIN = -0x400
+_VINT_CACHE_MAX = 0x10000
+_VINT_CACHE = dict()
+
+def _vint_encode(value):
+    """Returns explicit VInteger encoding of value as a list of bytes."""
+    if value >= VEntityCode.START - 1:
+        number = value - (VEntityCode.START - 1)
+        return [_entity_header(VEntityCode.VINT_POS, number)]
+    elif value < -1:
+        return [_entity_header(VEntityCode.VINT_NEG, -(value + 2))]
+    elif _pyver == 2:
+        return [_s2b(_b_chr(value + 1))]
+    else:
+        return [bytes((value + 1,))]
+
+# Interned VInteger and VBoolean instances, and the VNone singleton,
+# which are returned by the class constructors instead of creating new
+# (immutable) entities with the same value
+_VINT_INTERN_MIN = -0x100
+_VINT_INTERN_MAX = 0x400
+_VINT_INTERNED = dict()
+_VBOOL_INTERNED = dict()
+_VNONE = None
+
+# Precomputed VTuple headers for tuple lengths which encode as a single
+# byte, indexed by tuple length
+if _pyver == 2:
+    _VTUPLE_HEADERS = tuple(_s2b(_b_chr(VEntityCode.VTUPLE) + _b_chr(_n))
+                            for _n in xrange(247))
+    _VTUPLE_LENGTHS = tuple(_s2b(_b_chr(_n)) for _n in xrange(247))
+else:
+    _VTUPLE_HEADERS = tuple(bytes((VEntityCode.VTUPLE, _n))
+                            for _n in xrange(247))
+    _VTUPLE_LENGTHS = tuple(bytes((_n,)) for _n in xrange(247))
+
 
 class VEntityReader(object):
     """Reader for decoding a serialized VEntity.
@@ -366,6 +452,8 @@ class VIOContext(object):
     def __init__(self):
         self.__str_encoding = self.__str_decoding = None
         self.__mod_use_oid = True
+        self.__bytes_threshold = None
+        self.__bytes_sink = None
 
     def set_codec(self, codec):
         """Sets :attr:`str_encoding` and :attr:`str_decoding`\ .
@@ -411,6 +499,33 @@ class VIOContext(object):
     mod_use_oid = property(__get_mod_use_oid, __set_mod_use_oid, None)
     """If True use OID as default when encoding module-registered entities."""
 
+    def __get_bytes_threshold(self): return self.__bytes_threshold
+    def __set_bytes_threshold(self, num): self.__bytes_threshold = num
+    bytes_threshold = property(__get_bytes_threshold, __set_bytes_threshold,
+                               None)
+    """Payload length threshold for streamed decoding of :class:`VBytes`\ .
+
+    If None (the default) then decoded :class:`VBytes` payloads are
+    held in memory. If set then a :class:`VBytes` with a payload of at
+    least *bytes_threshold* bytes is decoded by passing payload data
+    to a sink created with :attr:`bytes_sink` as it is received, and
+    the decoded entity is the sink's result. With the default sink the
+    result is a :class:`VStreamedBytes`\ , which is also the native
+    representation of the entity.
+
+    """
+
+    def __get_bytes_sink(self): return self.__bytes_sink
+    def __set_bytes_sink(self, sink): self.__bytes_sink = sink
+    bytes_sink = property(__get_bytes_sink, __set_bytes_sink, None)
+    """Sink factory for streamed decoding of :class:`VBytes`\ .
+
+    A callable sink(length) which returns a sink object with the
+    methods of :class:`VBytesSink`\ . If None (the default) then
+    :class:`VBytesSink` is used. See :attr:`bytes_threshold`\ .
+
+    """
+
 
 class VObjectIOContext(VIOContext):
     """I/O context for any :class:`VEntity` including :class:`VObject`\ .
@@ -901,31 +1016,30 @@ class VEntityWriter(object):
             raise VEntityWriterError('Decoder was already initialized')
 
         # Perform entity encoding
-        h_data = deque()
-        p_data = deque()
-        embedded = deque()
-        embedded.appendleft((entity, self.__explicit))
-        while embedded:
-            obj, explicit = embedded.popleft()
-            header, emb, payload = obj._v_encode(context=self.__context,
-                                              explicit=explicit)
-            for data in header:
-                h_data.append(data)
-            payload.reverse()
-            for data in payload:
-                p_data.appendleft(data)
-            emb.reverse()
-            for e in emb:
-                embedded.appendleft(e)
+        chunks = entity._v_write_chunks(self.__context, self.__explicit)
         self.__buffer.remove()
-        for data in h_data:
-            self.__buffer.append(data)
-        for data in p_data:
-            self.__buffer.append(data)
+        self.__buffer.append_list(chunks)
         self.__entity = entity
         self.__initialized = True
 
 
+class _VLazyNode(object):
+    """Tree level of a lazy conversion performed by :class:`VEntity`\ ."""
+
+    __slots__ = ('items', 'unprocessed_index', 'parent', 'parent_index',
+                 'aggregator')
+
+    def __init__(self, items, parent, parent_index, aggregator):
+        self.items = items
+        self.unprocessed_index = 0
+        self.parent = parent
+        self.parent_index = parent_index
+        self.aggregator = aggregator
+
+def _vlazy_first(items):
+    return items[0]
+
+
 @abstract
 class VEntity(object):
     """Base class for data types of the :term:`VP` VEntity specification.
@@ -943,10 +1057,14 @@ class VEntity(object):
     .. automethod:: _v_decoder
     .. automethod:: _v_writer
     .. automethod:: _v_write
+    .. automethod:: _v_write_chunks
     .. automethod:: _v_reader
+    .. automethod:: _v_decode_bytes
 
     """
 
+    __slots__ = ()
+
     @classmethod
     def _v_lazy(cls, obj, parser=None):
         """Performs lazy conversion of obj to a VEntity object.
@@ -992,15 +1110,19 @@ class VEntity(object):
         if isinstance(obj, VEntity):
             return obj
 
-        class Node:
-            def __init__(self, items, parent, parent_index, aggregator):
-                self.items = items
-                self.unprocessed_index = 0
-                self.parent = parent
-                self.parent_index = parent_index
-                self.aggregator = aggregator
+        # Fast paths for non-composite values and flat tuples
+        obj_type = type(obj)
+        leaf = _VENTITY_LAZY_LEAF.get(obj_type, None)
+        if leaf is not None:
+            return leaf(obj)
+        elif obj_type is tuple:
+            _import()
+            if not _VSEResolver.lazy_arrays():
+                result = _vlazy_flat_tuple(obj)
+                if result is not None:
+                    return result
 
-        node = Node([obj], None, None, lambda l : l[0])
+        node = _VLazyNode([obj], None, None, _vlazy_first)
         while True:
             if node.unprocessed_index<len(node.items):
                 index = node.unprocessed_index
@@ -1013,7 +1135,7 @@ class VEntity(object):
                 else:
                     # Create a new tree level for converting object
                     node.unprocessed_index = index
-                    new_node = Node(obj_split, node, index, f)
+                    new_node = _VLazyNode(obj_split, node, index, f)
                     node = new_node
             elif node.parent:
                 # Delete node and go back up one level
@@ -1056,15 +1178,23 @@ class VEntity(object):
         <type 'unicode'>
 
         """
-        class Node:
-            def __init__(self, items, parent, parent_index, aggregator):
-                self.items = items
-                self.unprocessed_index = 0
-                self.parent = parent
-                self.parent_index = parent_index
-                self.aggregator = aggregator
-
-        node = Node([obj], None, None, lambda l : l[0])
+        # Fast paths for non-composite values and flat tuples
+        obj_type = type(obj)
+        native = _VENTITY_NATIVE_LEAF.get(obj_type, None)
+        if native is not None:
+            return native(obj)
+        elif obj_type in _VENTITY_LAZY_LEAF:
+            return obj
+        elif obj_type is VTuple:
+            result = _vnative_flat_tuple(obj._v_value)
+            if result is not None:
+                return result
+        elif obj_type is tuple:
+            result = _vnative_flat_tuple(obj)
+            if result is not None:
+                return result
+
+        node = _VLazyNode([obj], None, None, _vlazy_first)
         while True:
             if node.unprocessed_index<len(node.items):
                 index = node.unprocessed_index
@@ -1077,7 +1207,7 @@ class VEntity(object):
                 else:
                     # Create a new tree level for converting object
                     node.unprocessed_index = index
-                    new_node = Node(obj_split, node, index, f)
+                    new_node = _VLazyNode(obj_split, node, index, f)
                     node = new_node
             elif node.parent:
                 # Traverse back one level, deleting leaf node
@@ -1188,6 +1318,11 @@ class VEntity(object):
         if isinstance(obj, VEntity):
             return (None, [obj])
 
+        # Non-composite values are converted directly
+        leaf = _VENTITY_LAZY_LEAF.get(type(obj), None)
+        if leaf is not None:
+            return (None, [leaf(obj)])
+
         # Get default converter
         converter = _VENTITY_LAZY_CONVERTER.get(type(obj), None)
 
@@ -1199,7 +1334,11 @@ class VEntity(object):
             _import()
 
             global _VSEResolver
-            if _VSEResolver.lazy_arrays():
+            if not _VSEResolver.lazy_arrays() and type(obj) is tuple:
+                flat = _vlazy_flat_tuple(obj)
+                if flat is not None:
+                    return (None, [flat])
+            elif _VSEResolver.lazy_arrays():
                 # Lazy array conversion is enabled, inspect tuple
                 # elements for the appropriate elements
                 _int = _vinteger = _float = _vfloat = False
@@ -1378,6 +1517,11 @@ class VEntity(object):
         This method is intended for internal use by :term:`VPy`\ .
 
         """
+        if type(obj) is VTuple or type(obj) is tuple:
+            items = obj._v_value if type(obj) is VTuple else obj
+            flat = _vnative_flat_tuple(items)
+            if flat is not None:
+                return (None, [flat])
         if isinstance(obj, VEntity):
             if isinstance(obj, VTagged) and parser:
                 try:
@@ -1481,6 +1625,39 @@ class VEntity(object):
         """
         return self._v_writer(context).write()
 
+    def _v_write_chunks(self, context, explicit=True):
+        """Returns the entity's serialized byte encoding as a list of chunks.
+
+        :param context:  I/O context for encoding
+        :type  context:  :class:`VIOContext`
+        :param explicit: if True encode the explicit serialized representation
+        :type  explicit: bool
+        :returns:        entity's serialized representation
+        :rtype:          list<bytes>
+
+        The entity is fully encoded, and the concatenation of the
+        returned chunks is the serialized representation. Payload data
+        of the entity is included in the list without copying, which
+        allows callers to perform a single join or write the chunks
+        to a single buffer.
+
+        """
+        h_data = []
+        p_data = deque()
+        embedded = deque()
+        embedded.appendleft((self, explicit))
+        while embedded:
+            obj, explicit = embedded.popleft()
+            header, emb, payload = obj._v_encode(context=context,
+                                                 explicit=explicit)
+            h_data.extend(header)
+            payload.reverse()
+            p_data.extendleft(payload)
+            emb.reverse()
+            embedded.extendleft(emb)
+        h_data.extend(p_data)
+        return h_data
+
     @classmethod
     def _v_reader(cls, context, explicit=True):
         """Returns a reader for the class' serialized representation.
@@ -1497,6 +1674,208 @@ class VEntity(object):
         reader.set_decoder(cls._v_decoder(context=context, explicit=explicit))
         return reader
 
+    @classmethod
+    def _v_decode_bytes(cls, data, context):
+        """Decodes a serialized entity held in a byte buffer in one pass.
+
+        :param data:    serialized (explicit) entity data
+        :type  data:    bytes, bytearray, memoryview
+        :param context: I/O context for decoding
+        :type  context: :class:`VIOContext`
+        :returns:       (entity, num_read), or (None, 0) if incomplete
+        :raises:        :exc:`versile.orb.error.VEntityReaderError`
+
+        Produces the same result as reading *data* with a
+        :class:`VEntityReader`\ , however decoding is performed with
+        offset arithmetic on a memoryview of the data without
+        instantiating decoders for embedded entities. This is faster
+        when the full serialized representation is already available.
+
+        *num_read* is the number of bytes of *data* which were
+        decoded, any trailing data is ignored. If *data* does not hold
+        a complete entity, (None, 0) is returned and the context is
+        left unmodified. (None, 0) is also returned if *data* holds a
+        :class:`VBytes` which should be streamed per the context's
+        :attr:`VIOContext.bytes_threshold`\ , as such entities must
+        be decoded with a :class:`VEntityReader`\ .
+
+        On python versions without :class:`memoryview` decoding is
+        performed with a :class:`VEntityReader`\ , and the context
+        may be modified also when *data* is incomplete.
+
+        """
+        if not _vmemoryview:
+            reader = cls._v_reader(context)
+            num_read = reader.read(data)
+            if not reader.done():
+                return (None, 0)
+            return (reader.result(), num_read)
+        if not isinstance(data, memoryview):
+            data = memoryview(data)
+        pos, end = 0, len(data)
+
+        # Decode headers, generating a list of entity nodes in the
+        # order they appear in the serialized data. Pending node tags
+        # are held in a LIFO, None signifies an explicit encoding
+        nodes = []
+        payload_nodes = []
+        pending = [None]
+        while pending:
+            tag = pending.pop()
+            if tag is None:
+                if pos >= end:
+                    return (None, 0)
+                code = _b_ord(data[pos])
+                pos += 1
+                if code < VEntityCode.START:
+                    nodes.append((_BULK_DONE, VInteger(code - 1), 0))
+                elif code == VEntityCode.VINT_POS:
+                    number, pos = _bulk_posint(data, pos, end)
+                    if number is None:
+                        return (None, 0)
+                    number += VEntityCode.START - 1
+                    nodes.append((_BULK_DONE, VInteger(number), 0))
+                elif code == VEntityCode.VINT_NEG:
+                    number, pos = _bulk_posint(data, pos, end)
+                    if number is None:
+                        return (None, 0)
+                    nodes.append((_BULK_DONE, VInteger(-(number + 2)), 0))
+                elif code == VEntityCode.VBOOL_TRUE:
+                    nodes.append((_BULK_DONE, VBoolean(True), 0))
+                elif code == VEntityCode.VBOOL_FALSE:
+                    nodes.append((_BULK_DONE, VBoolean(False), 0))
+                elif code == VEntityCode.VNONE:
+                    nodes.append((_BULK_DONE, VNone(), 0))
+                elif code in (VEntityCode.VTUPLE, VEntityCode.VBYTES):
+                    number, pos = _bulk_posint(data, pos, end)
+                    if number is None or number > end - pos:
+                        return (None, 0)
+                    if code == VEntityCode.VTUPLE:
+                        nodes.append((code, None, number))
+                        pending.extend([None]*number)
+                    elif (context.bytes_threshold is not None
+                          and 0 < context.bytes_threshold <= number):
+                        # Streamed payloads require an incremental reader
+                        return (None, 0)
+                    else:
+                        node = [code, number, 0]
+                        nodes.append(node)
+                        payload_nodes.append(node)
+                elif code in (VEntityCode.VSTRING, VEntityCode.VSTRING_ENC):
+                    include_codec = (code == VEntityCode.VSTRING_ENC)
+                    num_embedded = include_codec and 2 or 1
+                    nodes.append((VEntityCode.VSTRING, include_codec,
+                                  num_embedded))
+                    pending.extend([_BULK_BYTES]*num_embedded)
+                elif code in (VEntityCode.VEXCEPTION, VEntityCode.VTAGGED):
+                    nodes.append((code, None, 1))
+                    pending.append(_BULK_TUPLE)
+                elif code == VEntityCode.VFLOAT_2:
+                    nodes.append((VEntityCode.VFLOAT_N, 2, 2))
+                    pending.extend((_BULK_INT, _BULK_INT))
+                elif code == VEntityCode.VFLOAT_10:
+                    nodes.append((VEntityCode.VFLOAT_N, 10, 2))
+                    pending.extend((_BULK_INT, _BULK_INT))
+                elif code == VEntityCode.VFLOAT_N:
+                    nodes.append((VEntityCode.VFLOAT_N, None, 3))
+                    pending.extend((_BULK_INT, _BULK_INT, _BULK_INT))
+                elif code in (VEntityCode.VREF_LOCAL, VEntityCode.VREF_REMOTE):
+                    if not isinstance(context, VObjectIOContext):
+                        raise VEntityReaderError('Requires object context')
+                    nodes.append((code, None, 1))
+                    pending.append(_BULK_INT)
+                else:
+                    raise VEntityReaderError('Could not parse object type')
+            else:
+                number, pos = _bulk_posint(data, pos, end)
+                if number is None:
+                    return (None, 0)
+                if tag == _BULK_INT:
+                    if number & 0x1:
+                        number = -(number >> 1)
+                    else:
+                        number >>= 1
+                    nodes.append((_BULK_DONE, number, 0))
+                elif tag == _BULK_BYTES:
+                    if number > end - pos:
+                        return (None, 0)
+                    node = [tag, number, 0]
+                    nodes.append(node)
+                    payload_nodes.append(node)
+                else:
+                    if number > end - pos:
+                        return (None, 0)
+                    nodes.append((tag, None, number))
+                    pending.extend([None]*number)
+
+        # Payloads are serialized in reverse order of their headers
+        for node in reversed(payload_nodes):
+            stop = pos + node[1]
+            if stop > end:
+                return (None, 0)
+            node[1] = data[pos:stop].tobytes()
+            pos = stop
+
+        # Construct entities bottom-up; embedded results are held in
+        # a LIFO in reverse order of appearance
+        results = []
+        for tag, value, num_embedded in reversed(nodes):
+            if num_embedded:
+                embedded = results[-num_embedded:]
+                del results[-num_embedded:]
+                embedded.reverse()
+            else:
+                embedded = []
+            if tag == _BULK_DONE or tag == _BULK_BYTES:
+                result = value
+            elif tag == _BULK_TUPLE:
+                result = embedded
+            elif tag == VEntityCode.VTUPLE:
+                result = VTuple(embedded)
+            elif tag == VEntityCode.VBYTES:
+                result = VBytes(value)
+            elif tag == VEntityCode.VSTRING:
+                if value:
+                    codec, raw_string = embedded
+                else:
+                    raw_string, = embedded
+                    codec = context.str_decoding
+                if codec is None:
+                    raise VEntityReaderError('Cannot decode, no codec defined')
+                try:
+                    if _pyver == 2:
+                        _str = unicode(_b2s(raw_string), encoding=_b2s(codec))
+                    else:
+                        _str = str(raw_string, encoding=_b2s(codec))
+                except:
+                    raise VEntityReaderError('Invalid string encoding')
+                result = VString(_str)
+            elif tag == VEntityCode.VFLOAT_N:
+                base = value
+                if base is None:
+                    base = embedded[1]
+                    if base < 2:
+                        raise VEntityReaderError('Invalid base')
+                result = VFloat(embedded[0], embedded[-1], base=base)
+            elif tag == VEntityCode.VEXCEPTION:
+                result = VException(*embedded[0])
+            elif tag == VEntityCode.VTAGGED:
+                values = embedded[0]
+                if not values:
+                    raise VEntityReaderError('Malformed VTagged encoding')
+                result = VTagged(values[0], *values[1:])
+            elif tag == VEntityCode.VREF_LOCAL:
+                peer_id = embedded[0]
+                result = context._ref_from_peer_id(peer_id, lazy=True)
+                context._ref_add_recv(peer_id)
+            else:
+                try:
+                    result = context._local_from_peer_id(embedded[0])
+                except VEntityError as e:
+                    raise VEntityReaderError(e.args)
+            results.append(result)
+        return (results[0], pos)
+
 
 class VEntityDecoder(VEntityDecoderBase):
     """Decodes a VEntity from its serialized representation.
@@ -1583,6 +1962,9 @@ class VInteger(VEntity):
     :type  value: int, long, :class:`VInteger`
     :raises:      :exc:`exceptions.TypeError`
 
+    Entities for small int values are interned, constructing a
+    :class:`VInteger` for such a value returns a shared instance.
+
     Example:
 
     >>> from versile.orb.entity import VInteger
@@ -1593,6 +1975,15 @@ class VInteger(VEntity):
 
     """
 
+    __slots__ = ('_v_value',)
+
+    def __new__(cls, value):
+        if cls is VInteger and type(value) is int:
+            instance = _VINT_INTERNED.get(value, None)
+            if instance is not None:
+                return instance
+        return super(VInteger, cls).__new__(cls)
+
     def __setattr__(self, *args):
         raise TypeError("can't modify immutable instance")
     __delattr__ = __setattr__
@@ -1605,6 +1996,9 @@ class VInteger(VEntity):
         else:
             raise TypeError('Value must be an integer')
 
+    def __reduce__(self):
+        return (self.__class__, (self._v_value,))
+
     @classmethod
     def _v_converter(cls, obj):
         return (None, [VInteger(obj)])
@@ -1616,30 +2010,17 @@ class VInteger(VEntity):
         return self._v_value
 
     def _v_encode(self, context, explicit=True):
-        result = []
-        if explicit:
-            if self._v_value >= VEntityCode.START - 1:
-                if _pyver == 2:
-                    result.append(_s2b(_b_chr(VEntityCode.VINT_POS)))
-                else:
-                    result.append(bytes((VEntityCode.VINT_POS,)))
-                encode_v_value = self._v_value - (VEntityCode.START - 1)
-                result.append(posint_to_netbytes(encode_v_value))
-            elif self._v_value < -1:
-                if _pyver == 2:
-                    result.append(_s2b(_b_chr(VEntityCode.VINT_NEG)))
-                else:
-                    result.append(bytes((VEntityCode.VINT_NEG,)))
-                encode_v_value = -(self._v_value + 2)
-                result.append(posint_to_netbytes(encode_v_value))
-            else:
-                if _pyver == 2:
-                    result.append(_s2b(_b_chr(self._v_value + 1)))
-                else:
-                    result.append(bytes((self._v_value + 1,)))
+        value = self._v_value
+        if not explicit:
+            return ([signedint_to_netbytes(value)], [], [])
+        elif _VINT_CACHE_MIN <= value < _VINT_CACHE_MAX:
+            data = _VINT_CACHE.get(value, None)
+            if data is None:
+                data = b''.join(_vint_encode(value))
+                _VINT_CACHE[value] = data
+            return ([data], [], [])
         else:
-            result.append(signedint_to_netbytes(self._v_value))
-        return (result, [], [])
+            return (_vint_encode(value), [], [])
 
     @classmethod
     def _v_decoder(cls, context, explicit=True):
@@ -1682,11 +2063,15 @@ class VInteger(VEntity):
         return self._v_value.__repr__()
 
 
+_VINT_INTERNED.update((_n, VInteger(_n)) for _n in
+                      xrange(_VINT_INTERN_MIN, _VINT_INTERN_MAX))
+
+
 class VIntegerDecoder(VEntityDecoderBase):
     """Decoder for reading a :class:`VInteger` from serialized data."""
 
     def __init__(self, context, explicit=True):
-        super(VIntegerDecoder, self).__init__(context)
+        VEntityDecoderBase.__init__(self, context)
         self.__explicit = explicit
         self.__data = b''
         self.__result = None
@@ -1781,6 +2166,8 @@ class VBoolean(VEntity):
     :param value: boolean value
     :type  value: bool, :class:`VBoolean`
 
+    VBoolean(True) and VBoolean(False) return shared instances.
+
     Example:
 
     >>> from versile.orb.entity import VBoolean
@@ -1791,6 +2178,15 @@ class VBoolean(VEntity):
 
     """
 
+    __slots__ = ('_v_value',)
+
+    def __new__(cls, value):
+        if cls is VBoolean and type(value) is bool:
+            instance = _VBOOL_INTERNED.get(value, None)
+            if instance is not None:
+                return instance
+        return super(VBoolean, cls).__new__(cls)
+
     def __init__(self, value):
         if isinstance(value, bool):
             super(VBoolean, self).__setattr__('_v_value', value)
@@ -1799,6 +2195,9 @@ class VBoolean(VEntity):
         else:
             raise TypeError('Value must be a boolean')
 
+    def __reduce__(self):
+        return (self.__class__, (self._v_value,))
+
     def __setattr__(self, *args):
         raise TypeError("can't modify immutable instance")
     __delattr__ = __setattr__
@@ -1863,6 +2262,9 @@ class VBoolean(VEntity):
         return self._v_value.__repr__()
 
 
+_VBOOL_INTERNED.update((_b, VBoolean(_b)) for _b in (False, True))
+
+
 class VBooleanDecoder(VEntityDecoderBase):
     """Decoder for reading a :class:`VBoolean` from serialized data."""
 
@@ -1917,7 +2319,8 @@ class VNone(VEntity):
 
     As None is a special python entity, this object does not fully
     simulate None in the way that e.g. VInteger implements much of int
-    behaviour via overloaded operators.
+    behaviour via overloaded operators. VNone() returns a shared
+    singleton instance.
 
     .. warning::
 
@@ -1935,6 +2338,13 @@ class VNone(VEntity):
 
     """
 
+    __slots__ = ('_v_value',)
+
+    def __new__(cls):
+        if cls is VNone and _VNONE is not None:
+            return _VNONE
+        return super(VNone, cls).__new__(cls)
+
     def __setattr__(self, *args):
         raise TypeError("can't modify immutable instance")
     __delattr__ = __setattr__
@@ -1942,6 +2352,9 @@ class VNone(VEntity):
     def __init__(self):
         super(VNone, self).__setattr__('_v_value', None)
 
+    def __reduce__(self):
+        return (self.__class__, ())
+
     @classmethod
     def _v_converter(cls, obj):
         return (None, [VNone()])
@@ -1985,6 +2398,9 @@ class VNone(VEntity):
         return None.__repr__()
 
 
+_VNONE = VNone()
+
+
 class VNoneDecoder(VEntityDecoderBase):
     """Decoder for reading a :class:`VNone` from serialized data."""
 
@@ -2073,6 +2489,8 @@ class VFloat(VEntity):
 
     """
 
+    __slots__ = ('_v_digits', '_v_base', '_v_exp', '_cached_decimal')
+
     def __setattr__(self, *args):
         raise TypeError("can't modify immutable instance")
     __delattr__ = __setattr__
@@ -2151,6 +2569,10 @@ class VFloat(VEntity):
         super(VFloat, self).__setattr__('_v_base', base)
         super(VFloat, self).__setattr__('_v_exp', exp)
 
+    def __reduce__(self):
+        return (_vfloat_reconstruct, (self.__class__, self._v_digits,
+                                      self._v_exp, self._v_base))
+
     @classmethod
     def _v_converter(cls, obj):
         return (None, [VFloat(obj)])
@@ -2283,6 +2705,11 @@ class VFloat(VEntity):
                             str(self._v_base), '^(', str(self._v_exp), ')]\''))
 
 
+def _vfloat_reconstruct(cls, digits, exp, base):
+    # Pickle/copy support, VFloat only takes 'base' as a keyword argument
+    return cls(digits, exp, base=base)
+
+
 class VFloatDecoder(VEntityDecoderBase):
     """Decoder for reading a :class:`VFloat` from serialized data."""
 
@@ -2406,6 +2833,8 @@ class VTuple(VEntity):
 
     """
 
+    __slots__ = ('_v_value',)
+
     def __init__(self, *obj, **modify):
         if len(obj) == 0:
             obj_list = []
@@ -2442,6 +2871,9 @@ class VTuple(VEntity):
                 raise TypeError('All VTuple elements must be VEntity\'s')
         super(VTuple, self).__setattr__('_v_value', tuple(value))
 
+    def __reduce__(self):
+        return (self.__class__, (self._v_value,))
+
     def __setattr__(self, *args):
         raise TypeError("can't modify immutable instance")
     __delattr__ = __setattr__
@@ -2459,15 +2891,19 @@ class VTuple(VEntity):
         return (tuple, list(self._v_value))
 
     def _v_encode(self, context, explicit=True):
-        if explicit:
-            if _pyver == 2:
-                header = [_s2b(_b_chr(VEntityCode.VTUPLE))]
+        value = self._v_value
+        num_elements = len(value)
+        if num_elements <= 246:
+            if explicit:
+                header = [_VTUPLE_HEADERS[num_elements]]
             else:
-                header = [bytes((VEntityCode.VTUPLE,))]
+                header = [_VTUPLE_LENGTHS[num_elements]]
         else:
-            header = []
-        header.append(posint_to_netbytes(len(self._v_value)))
-        embedded = [(e, True) for e in self._v_value]
+            if explicit:
+                header = [_entity_header(VEntityCode.VTUPLE, num_elements)]
+            else:
+                header = [posint_to_netbytes(num_elements)]
+        embedded = [(e, True) for e in value]
         return (header, embedded, [])
 
     @classmethod
@@ -2542,7 +2978,7 @@ class VTupleDecoder(VEntityDecoderBase):
     """Decoder for reading a :class:`VTuple` from serialized data."""
 
     def __init__(self, context, explicit=True):
-        super(VTupleDecoder, self).__init__(context)
+        VEntityDecoderBase.__init__(self, context)
         self.__explicit = explicit
         self.__data = b''
         self.__result = None
@@ -2630,6 +3066,10 @@ class VBytes(VEntity):
     :param value: byte array
     :type  value: bytes, :class:`VBytes`
 
+    A :class:`VBytes` which was decoded by streaming its payload to a
+    :class:`VBytesSink` is by default a :class:`VStreamedBytes`\ , see
+    :attr:`VIOContext.bytes_threshold`\ .
+
     Example initialization:
 
     >>> from versile.orb.entity import *
@@ -2640,6 +3080,8 @@ class VBytes(VEntity):
 
     """
 
+    __slots__ = ('_v_value',)
+
     def __setattr__(self, *args):
         raise TypeError("can't modify immutable instance")
     __delattr__ = __setattr__
@@ -2654,6 +3096,9 @@ class VBytes(VEntity):
         else:
             raise TypeError('Value must be a bytes or bytearray object')
 
+    def __reduce__(self):
+        return (self.__class__, (self._v_value,))
+
     @classmethod
     def _v_converter(cls, obj):
         if isinstance(obj, VBytes):
@@ -2670,15 +3115,12 @@ class VBytes(VEntity):
         return self._v_value
 
     def _v_encode(self, context, explicit=True):
+        value = self._v_value
         if explicit:
-            if _pyver == 2:
-                header = [_s2b(_b_chr(VEntityCode.VBYTES))]
-            else:
-                header = [bytes((VEntityCode.VBYTES,))]
+            header = [_entity_header(VEntityCode.VBYTES, len(value))]
         else:
-            header = []
-        header.append(posint_to_netbytes(len(self._v_value)))
-        return (header, [], [self._v_value])
+            header = [posint_to_netbytes(len(value))]
+        return (header, [], [value])
 
     @classmethod
     def _v_decoder(cls, context, explicit=True):
@@ -2733,11 +3175,189 @@ class VBytes(VEntity):
         return self._v_value.__repr__()
 
 
+def _streamed_op2(oper, cast, reflected=False):
+    """Generates operator f(a,b) overloads for :class:`VStreamedBytes`."""
+    def perform_op(a, b):
+        a = a._v_value[:]
+        if isinstance(b, VStreamedBytes):
+            b = b._v_value[:]
+        elif isinstance(b, VEntity):
+            b = b._v_value
+        if reflected:
+            a, b = b, a
+        if cast:
+            return VEntity._v_lazy(oper(a, b))
+        else:
+            return oper(a, b)
+    return perform_op
+
+
+class VStreamedBytes(VBytes):
+    """A :class:`VBytes` with a payload held in a file.
+
+    :param file: file holding the payload
+    :type  file: file
+
+    Produced by :class:`VBytesSink` when a payload is streamed, see
+    :attr:`VIOContext.bytes_threshold`\ . The entity takes ownership
+    of *file*, and its payload is accessed through a read-only
+    :class:`mmap.mmap` of the file.
+
+    Comparison and hash are based on payload content, so the entity
+    equals a :class:`VBytes` or bytes object with the same payload and
+    has the same hash. Comparing or hashing reads the payload, and
+    the hash is cached.
+
+    The entity is its own native representation, so native conversion
+    of a decoded :class:`VBytes` produces a :class:`VStreamedBytes`
+    instead of bytes. This only happens when streamed decoding has
+    been enabled with :attr:`VIOContext.bytes_threshold`\ . A
+    bytes-like view of the payload is available as :attr:`payload`\ .
+
+    .. automethod:: close
+
+    """
+
+    __slots__ = ('_v_file', '_v_hash')
+
+    __CHUNK = 0x10000
+
+    def __init__(self, file):
+        file.flush()
+        file.seek(0, 2)
+        if file.tell():
+            value = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Empty files cannot be mapped
+            value = b''
+        object.__setattr__(self, '_v_value', value)
+        object.__setattr__(self, '_v_file', file)
+        object.__setattr__(self, '_v_hash', None)
+
+    def close(self):
+        """Closes the payload mapping and the file holding the payload.
+
+        The entity should not be used after it has been closed.
+
+        """
+        if not isinstance(self._v_value, bytes):
+            self._v_value.close()
+        self._v_file.close()
+
+    @property
+    def payload(self):
+        """Read-only bytes-like view of the payload."""
+        return self._v_value
+
+    def _v_native_converter(self):
+        return (None, [self])
+
+    def _v_native(self, deep=True):
+        return self
+
+    def _v_encode(self, context, explicit=True):
+        return VBytes(self._v_value[:])._v_encode(context, explicit)
+
+    def __reduce__(self):
+        # The payload file cannot be shared, copies hold the payload bytes
+        return (VBytes, (self._v_value[:],))
+
+    def __eq__(self, other):
+        if isinstance(other, VEntity):
+            other = other._v_value
+        value = self._v_value
+        try:
+            if len(other) != len(value):
+                return False
+        except TypeError:
+            return False
+        chunk = self.__CHUNK
+        for pos in xrange(0, len(value), chunk):
+            if value[pos:(pos+chunk)] != other[pos:(pos+chunk)]:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __lt__        =  _streamed_op2(operator.lt, cast=False)
+    __le__        =  _streamed_op2(operator.le, cast=False)
+    __ge__        =  _streamed_op2(operator.ge, cast=False)
+    __gt__        =  _streamed_op2(operator.gt, cast=False)
+    __add__       =  _streamed_op2(operator.add, cast=True)
+    __radd__      =  _streamed_op2(operator.add, cast=True, reflected=True)
+
+    def __hash__(self):
+        if self._v_hash is None:
+            object.__setattr__(self, '_v_hash', hash(self._v_value[:]))
+        return self._v_hash
+
+    def __str__(self):
+        return self._v_value[:].__str__()
+
+    def __unicode__(self):
+        return unicode(self._v_value[:])
+
+    def __repr__(self):
+        return str('<VStreamedBytes of %s bytes>' % len(self._v_value))
+
+
+class VBytesSink(object):
+    """Sink for streamed decoding of :class:`VBytes` payload data.
+
+    :param length: payload length in bytes
+    :type  length: int
+
+    Sinks are created by a :class:`VBytesDecoder` when a payload is
+    streamed, see :attr:`VIOContext.bytes_threshold`\ . Payload data
+    is passed to :meth:`write` as it is received, and when all data
+    has been written then :meth:`result` is called to generate the
+    value held by the decoded :class:`VBytes`\ .
+
+    This implementation writes payload data to an anonymous temporary
+    file, and produces a :class:`VStreamedBytes` which holds the file
+    as the result. Derived classes can override to e.g. write payload
+    data directly to its final destination.
+
+    .. automethod:: write
+    .. automethod:: result
+
+    """
+
+    def __init__(self, length):
+        self._file = tempfile.TemporaryFile()
+
+    def write(self, data):
+        """Receives a chunk of payload data.
+
+        :param data: payload data
+        :type  data: bytes, :class:`memoryview`
+
+        Data received from a network connection may be passed as a
+        :class:`memoryview` of a receive buffer. A sink which keeps a
+        reference to the data after returning should copy it.
+
+        """
+        self._file.write(data)
+
+    def result(self):
+        """Returns the decoded entity after all payload data was written.
+
+        :returns: entity with the payload
+        :rtype:   :class:`VBytes`
+
+        The returned entity must hold the full payload, otherwise
+        decoding fails.
+
+        """
+        return VStreamedBytes(self._file)
+
+
 class VBytesDecoder(VEntityDecoderBase):
     """Decoder for reading a :class:`VBytes` from serialized data."""
 
     def __init__(self, context, explicit=True):
-        super(VBytesDecoder, self).__init__(context)
+        VEntityDecoderBase.__init__(self, context)
         self.__explicit = explicit
         self.__elements = 0
         self.__result = None
@@ -2746,6 +3366,7 @@ class VBytesDecoder(VEntityDecoderBase):
         self.__data = b''
         self.__payload = []
         self.__payload_read = 0
+        self.__sink = None
 
     def decode_header(self, data):
         if self.__result is not None:
@@ -2803,16 +3424,35 @@ class VBytesDecoder(VEntityDecoderBase):
         if self.__elements == 0:
             self.__result = VBytes(b'')
             return (0, True)
+        if not self.__payload_read:
+            threshold = self.context.bytes_threshold
+            if threshold is not None and 0 < threshold <= self.__elements:
+                sink_factory = self.context.bytes_sink or VBytesSink
+                self.__sink = sink_factory(self.__elements)
+                self.__payload = None
         max_read = self.__elements - self.__payload_read
-        data_read = data.pop(max_read)
-        self.__payload.append(data_read)
-        self.__payload_read += len(data_read)
+        if self.__sink is not None:
+            write = self.__sink.write
+        else:
+            write = self.__payload.append
+        num_read = 0
+        for data_read in data.pop_list(max_read):
+            write(data_read)
+            num_read += len(data_read)
+        self.__payload_read += num_read
         if self.__elements == self.__payload_read:
-            self.__result = VBytes(b''.join(self.__payload))
-            self.__payload = None
-            return (len(data_read), True)
+            if self.__sink is not None:
+                result, self.__sink = self.__sink.result(), None
+                if (not isinstance(result, VBytes)
+                    or len(result) != self.__elements):
+                    raise VEntityReaderError('Invalid VBytes sink result')
+                self.__result = result
+            else:
+                self.__result = VBytes(_join_bytes(self.__payload))
+                self.__payload = None
+            return (num_read, True)
         else:
-            return (len(data_read), False)
+            return (num_read, False)
 
     def result(self):
         if self.__result is not None:
@@ -2844,6 +3484,8 @@ class VString(VEntity):
 
     """
 
+    __slots__ = ('_v_value',)
+
     def __setattr__(self, *args):
         raise TypeError("can't modify immutable instance")
     __delattr__ = __setattr__
@@ -2856,6 +3498,9 @@ class VString(VEntity):
         else:
             raise TypeError('Value must be a bytes or bytearray object')
 
+    def __reduce__(self):
+        return (self.__class__, (self._v_value,))
+
     @classmethod
     def _v_converter(cls, obj):
         if isinstance(obj, VString):
@@ -2984,7 +3629,7 @@ class VStringDecoder(VEntityDecoderBase):
     """Decoder for reading a :class:`VString` from serialized data."""
 
     def __init__(self, context, explicit=True):
-        super(VStringDecoder, self).__init__(context)
+        VEntityDecoderBase.__init__(self, context)
         self.__result = None
         self.__have_code = False
         self.__include_codec = None
@@ -3029,12 +3674,18 @@ class VStringDecoder(VEntityDecoderBase):
         return (embedded(), num_embedded)
 
     def put_embedded_results(self, result):
+        def _raw(entity):
+            value = entity._v_value
+            if not isinstance(value, bytes):
+                # Streamed payload
+                value = value[:]
+            return value
         codec = None
         if self.__include_codec:
-            codec = result[0]._v_native()
-            raw_string = result[1]._v_native()
+            codec = _raw(result[0])
+            raw_string = _raw(result[1])
         elif self.context:
-            raw_string = result[0]._v_native()
+            raw_string = _raw(result[0])
             codec = self.context.str_decoding
         if codec is None:
             raise VEntityReaderError('Cannot decode, no codec defined')
@@ -3645,10 +4296,19 @@ class VObject(VEntity, VLockable):
         +---------+-------------------------------------------------------+
         | vchk    | If set, perform 'vchk validation' on provided checks  |
         +---------+-------------------------------------------------------+
+        | pending | If set a pending result is returned as a VPending     |
+        +---------+-------------------------------------------------------+
 
         The method invokes :meth:`_v_execute` to perform the actual
         call execution.
 
+        When the call is blocking and *pending* is set, then if
+        :meth:`_v_execute` returns a :class:`VPending` the method
+        returns a :class:`VPending` for the call result instead of
+        waiting for the result. This allows a caller which can handle
+        a :class:`VPending`\ , such as a link, to release its thread
+        while the call completes.
+
         When the call is performed as non-blocking by specifying
         *nowait* or *oneway* then the call will be scheduled for
         execution by the object's processor. If no processor or class
@@ -3675,7 +4335,7 @@ class VObject(VEntity, VLockable):
         is used as a single validation criteria.
 
         """
-        nowait = nores = oneway = False
+        nowait = nores = oneway = pending = False
         ctx = checks = None
         for key, val in kargs.items():
             if key == 'nowait':
@@ -3684,6 +4344,8 @@ class VObject(VEntity, VLockable):
                 nores = bool(val)
             elif key == 'oneway':
                 oneway = bool(val)
+            elif key == 'pending':
+                pending = bool(val)
             elif key == 'ctx':
                 ctx = val
             elif key == 'vchk':
@@ -3781,6 +4443,10 @@ class VObject(VEntity, VLockable):
                                 e = VSimulatedException(e)
                         call.push_exception(e)
                     result.add_callpair(_callback, _failback)
+                    if pending:
+                        _pending = VPending()
+                        call.add_callpair(_pending.callback, _pending.failback)
+                        return _pending
                     return call.result()
                 else:
                     if nores:
@@ -4659,3 +5325,91 @@ if _pyver == 2:
     _VENTITY_LAZY_CONVERTER[unicode] = VString._v_converter
 else:
     _VENTITY_LAZY_CONVERTER[str] = VString._v_converter
+
+# Exact-type converters for non-composite values, used by fast paths
+# of VEntity._v_lazy and VEntity._v_lazy_native. Must come after class
+# definitions so class names are defined.
+_VENTITY_LAZY_LEAF = { int        : VInteger,
+                       bool       : VBoolean,
+                       type(None) : lambda obj: _VNONE,
+                       float      : VFloat,
+                       Decimal    : VFloat,
+                       bytes      : VBytes
+                       }
+if _pyver == 2:
+    _VENTITY_LAZY_LEAF[long] = VInteger
+    _VENTITY_LAZY_LEAF[unicode] = VString
+else:
+    _VENTITY_LAZY_LEAF[str] = VString
+
+_vget_value = operator.attrgetter('_v_value')
+_VENTITY_NATIVE_LEAF = { VInteger : _vget_value,
+                         VBoolean : _vget_value,
+                         VNone    : _vget_value,
+                         VFloat   : VFloat._v_native,
+                         VBytes   : _vget_value,
+                         VStreamedBytes : VStreamedBytes._v_native,
+                         VString  : _vget_value
+                         }
+
+def _vlazy_flat_tuple(items):
+    """Returns VTuple lazy-conversion of items, or None if not flat.
+
+    Returns None if any element is a non-entity which cannot be
+    converted with a non-composite converter.
+
+    """
+    leaf_conv = _VENTITY_LAZY_LEAF
+    entities = []
+    for item in items:
+        leaf = leaf_conv.get(type(item), None)
+        if leaf is not None:
+            entities.append(leaf(item))
+        elif isinstance(item, VEntity):
+            entities.append(item)
+        else:
+            return None
+    result = object.__new__(VTuple)
+    object.__setattr__(result, '_v_value', tuple(entities))
+    return result
+
+def _vnative_flat_tuple(items):
+    """Returns native conversion of a tuple of items, or None if not flat.
+
+    Returns None if any element requires a tree traversal to be
+    converted, e.g. composite elements or :class:`VTagged` elements.
+
+    """
+    native_conv, leaf_types = _VENTITY_NATIVE_LEAF, _VENTITY_LAZY_LEAF
+    result = []
+    for item in items:
+        item_type = type(item)
+        native = native_conv.get(item_type, None)
+        if native is not None:
+            result.append(native(item))
+        elif item_type in leaf_types:
+            result.append(item)
+        else:
+            return None
+    return tuple(result)
+
+# Decoders implemented by the optional native extension replace the
+# pure-python decoders. Must come after class definitions so class
+# names are defined.
+if _vspeedups:
+    class VIntegerDecoder(_vspeedups.IntegerDecoder, VEntityDecoderBase):
+        """Decoder for reading a :class:`VInteger` from serialized data."""
+
+    class VBytesDecoder(_vspeedups.BytesDecoder, VEntityDecoderBase):
+        """Decoder for reading a :class:`VBytes` from serialized data."""
+
+    class VTupleDecoder(_vspeedups.TupleDecoder, VEntityDecoderBase):
+        """Decoder for reading a :class:`VTuple` from serialized data."""
+
+    class VStringDecoder(_vspeedups.StringDecoder, VEntityDecoderBase):
+        """Decoder for reading a :class:`VString` from serialized data."""
+
+    _vspeedups.set_entity_types(VInteger, VBytes, VTuple, VString,
+                                VBytesSink, VEntity._v_decoder,
+                                VBytesDecoder, _VINT_INTERNED,
+                                VEntityReaderError)
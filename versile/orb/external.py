@@ -24,9 +24,10 @@ import textwrap
 from threading import RLock
 import types
 
-from versile.internal import _vexport, _v_silent
+from versile.internal import _vexport, _v_silent, _pyver
 from versile.orb.entity import VObject, VNone, VString, VException
 from versile.orb.entity import VEntityError, VCallError
+from versile.common.processor import VProcessor
 
 __all__ = ['VExternal', 'doc', 'doc_with', 'meta', 'meta_as', 'publish']
 __all__ = _vexport(__all__)
@@ -132,7 +133,7 @@ def doc_with(doc):
         return c
     return decor
 
-def publish(name=None, doc=False, show=False, ctx=False):
+def publish(name=None, doc=False, show=False, ctx=False, process=False):
     """Decorator for publishing a :class:`VExternal` method externally.
 
     Keyword arguments:
@@ -145,6 +146,8 @@ def publish(name=None, doc=False, show=False, ctx=False):
     :type  show: bool
     :param ctx:  if True then include session as a keyword argument
     :type  ctx:  bool
+    :param process: if True then execute in a worker process
+    :type  process: bool
 
     If *doc* is a unicode string, then this is used as the
     documentation string. Otherwise, if doc is set to True and the
@@ -162,10 +165,27 @@ def publish(name=None, doc=False, show=False, ctx=False):
             def my_method_b(self, arg1, arg2, ctx=None):
                 pass
 
+    If *process* is True then the method is executed in a worker
+    process when the object's processor, or else the processor which
+    executes the call (such as a link's processor), is a
+    :class:`versile.orb.pool.VProcessPoolProcessor`\ , see
+    :meth:`versile.orb.pool.VProcessPoolProcessor.process_call`\ . The
+    method must be a class method, as object instances are not passed
+    to worker processes, and it cannot take a *ctx* argument. With
+    other processors the method is executed in the calling thread
+    similar to other methods. Below is an example::
+
+        class MyClass(VExternal):
+            @classmethod
+            @publish(show=True, process=True)
+            def my_method_c(cls, arg1, arg2):
+                pass
+
     """
     # decor() requires copying arguments, otherwise it raises a
     # 'referenced before assignment' on the doc param
     _name, _doc, _ctx, _show = name, doc, ctx, show
+    _process = process
     def decor(f):
         f.external = True
         if name:
@@ -220,6 +240,13 @@ def publish(name=None, doc=False, show=False, ctx=False):
         else:
             raise TypeError('Invalid use of @publish show argument')
 
+        if isinstance(_process, bool):
+            if _process and _ctx:
+                raise TypeError('Cannot combine @publish ctx and process')
+            f.external_process = _process
+        else:
+            raise TypeError('Invalid use of @publish process argument')
+
         return f
     return decor
 
@@ -237,14 +264,20 @@ class VExternal(VObject):
 
     .. note::
 
-        During construction the class inspects all attributes set on
-        the object to identify published methods. This causes the
-        constructor to resolve all attributes, which will also try to
-        access any properties that are defined on the
-        class. Exceptions raised while trying to access properties are
-        ignored, however the class must make sure it is set up so that
-        the constructor's attempts to access any @property does not
-        trigger any error condition or deadlock.
+        Published and meta methods are identified by inspecting the
+        attributes of the object's class the first time the class is
+        instantiated. The resulting method tables are cached on the
+        class and shared by all its instances, so that construction
+        does not need to inspect attributes. Derived classes get their
+        own tables. Methods which are added to a class after it has
+        been instantiated are not registered, and methods which are
+        set as instance attributes must be published with
+        :meth:`_v_publish`\ .
+
+        Per-instance changes made with :meth:`_v_publish` or
+        :meth:`_v_unpublish` replace the instance's tables with
+        modified copies and do not affect other instances. Method
+        lookups for remote calls are performed without locking.
 
     .. automethod:: _v_execute
     .. automethod:: _v_publish
@@ -256,52 +289,15 @@ class VExternal(VObject):
     def __init__(self, processor=None):
         super(VExternal, self).__init__(processor=processor)
 
-        self.__methods = dict()         # external name -> method_data
-        self.__method_names = dict()    # method_func -> external name
-        self.__methods_lock = RLock()
-
-        self.__meta = dict()            # meta name -> meta_data
-        self.__meta_names = dict()      # method_func -> meta name
-
-        for _attr_name in dir(self):
-            try:
-                method = getattr(self, _attr_name)
-            except Exception as e:
-                _v_silent(e)
-                continue
-            if not isinstance(method, types.MethodType):
-                continue
-            if hasattr(method, 'external') and method.external:
-                method_func, instance_method = self._v_unwind_method(method)
-                try:
-                    doc = method.external_doc
-                except AttributeError:
-                    doc = None
-                try:
-                    ctx = not method.external_noctx
-                except AttributeError:
-                    ctx = True
-                try:
-                    show = method.external_show
-                except AttributeError:
-                    show = False
-                method_data = _VMethodData(method_func, instance_method,
-                                           doc, ctx, show)
-
-                name = method.external_name
-                if name is None:
-                    name = unicode(method.__name__)
-                self.__methods[name] = method_data
-                self.__method_names[method_func] = name
-
-            if hasattr(method, 'meta') and method.meta:
-                name = method.meta_name
-                if name is None:
-                    name = unicode(method.__name__)
-                method_func, instance_method = self._v_unwind_method(method)
-                meta_data = _VMetaData(method_func, instance_method)
-                self.__meta[name] = meta_data
-                self.__meta_names[method_func] = name
+        # Method tables are shared with the class. Tables are never
+        # modified in-place; publishing methods replaces the instance's
+        # tables with modified copies, so lookups do not need to lock
+        tables = self.__class_tables()
+        self.__methods = tables[0]       # external name -> method_data
+        self.__method_names = tables[1]  # method_func -> external name
+        self.__meta = tables[2]          # meta name -> meta_data
+        self.__meta_names = tables[3]    # method_func -> meta name
+        self.__methods_lock = RLock()    # held when replacing tables
 
     def _v_execute(self, *args, **kargs):
         """Executes remote method calls.
@@ -326,37 +322,42 @@ class VExternal(VObject):
         if m_name is None or not isinstance(m_name, (unicode, VString)):
             raise VCallError('Missing or invalid method name parameter')
 
+        # Calls may raise exceptions which are propagated out
         if regular_call:
-            with self.__methods_lock:
-                method_data = self.__methods.get(m_name, None)
+            method_data = self.__methods.get(m_name, None)
             if not method_data:
                 raise VCallError('Not a published external method')
             if not method_data.ctx:
                 kargs.pop('ctx', None)
-            func = method_data.method_func
+            if method_data.process:
+                # Imported here as process dispatch is optional and the
+                # pool module imports multiprocessing
+                from versile.orb.pool import VProcessPoolProcessor
+
+                # Use the object's processor, or the processor which
+                # is executing the call, e.g. a link's processor
+                processor = self._v_processor
+                if not isinstance(processor, VProcessPoolProcessor):
+                    processor = VProcessor.current()
+                if isinstance(processor, VProcessPoolProcessor):
+                    return processor.process_call(self.__class__,
+                                                  method_data.process, args)
             if method_data.instance_method:
-                method = lambda *arg, **karg: func(self, *arg, **karg)
+                return method_data.method_func(self, *args, **kargs)
             else:
-                _cls = self.__class__
-                method = lambda *arg, **karg: func(_cls, *arg, **karg)
-            # This may raise an exception which is propagated out
-            return method(*args, **kargs)
+                return method_data.method_func(self.__class__, *args,
+                                               **kargs)
         else:
-            with self.__methods_lock:
-                meta_data = self.__meta.get(m_name, None)
-            if meta_data:
-                func = meta_data.method_func
-                if meta_data.instance_method:
-                    method = lambda *arg, **karg: func(self, *arg, **karg)
-                else:
-                    _cls = self.__class__
-                    method = lambda *arg, **karg: func(_cls, *arg, **karg)
-                # This may raise an exception which is propagated out
-                return method(*args, **kargs)
-            else:
+            meta_data = self.__meta.get(m_name, None)
+            if not meta_data:
                 raise VCallError('Not a provided meta method')
+            if meta_data.instance_method:
+                return meta_data.method_func(self, *args, **kargs)
+            else:
+                return meta_data.method_func(self.__class__, *args, **kargs)
 
-    def _v_publish(self, method, name=None, doc=False, ctx=False, show=False):
+    def _v_publish(self, method, name=None, doc=False, ctx=False, show=False,
+                   process=False):
         """Publishes a method, making it externally callable.
 
         :param method: the method to publish
@@ -375,7 +376,7 @@ class VExternal(VObject):
                 raise VEntityError('Another method published with same name')
             method_func, instance_method = self._v_unwind_method(method)
             if isinstance(doc, unicode):
-                doc = _doc
+                pass
             elif isinstance(doc, bool):
                 if doc:
                     try:
@@ -395,10 +396,20 @@ class VExternal(VObject):
                 raise TypeError('Invalid use of @publish doc argument')
             ctx = bool(ctx)
             show = bool(show)
+            if process:
+                if ctx or instance_method:
+                    raise TypeError('process requires class method, no ctx')
+                process = unicode(method.__name__)
+            else:
+                process = None
             method_data = _VMethodData(method_func, instance_method,
-                                       doc, ctx, show)
-            self.__methods[name] = method_data
-            self.__method_names[method_func] = name
+                                       doc, ctx, show, process)
+            methods = dict(self.__methods)
+            methods[name] = method_data
+            method_names = dict(self.__method_names)
+            method_names[method_func] = name
+            self.__methods = methods
+            self.__method_names = method_names
 
     def _v_unpublish(self, method):
         """Unpublishes a method, making it no longer externally callable.
@@ -408,9 +419,9 @@ class VExternal(VObject):
 
         """
         with self.__methods_lock:
-            name = self.__method_names.pop(method.im_func, None)
+            name = self.__method_names.get(method.im_func, None)
             if name is not None:
-                self.__methods.pop(name, None)
+                self.__unpublish(name, method.im_func)
 
     def _v_unpublish_by_name(self, name):
         """Unpublishes a method, making it no longer externally available
@@ -423,41 +434,39 @@ class VExternal(VObject):
 
         """
         with self.__methods_lock:
-            method_data = self.__methods.pop(name, None)
+            method_data = self.__methods.get(name, None)
             if method_data:
-                self.__method_names.pop(method_data.method_func, None)
+                self.__unpublish(name, method_data.method_func)
 
     @meta_as('doc')
     def _v_doc(self, *args, **kargs):
-        with self.__methods_lock:
-            if not args:
-                try:
-                    doc = self._v_external_doc
-                except AttributeError:
-                    return None
-                else:
-                    return doc
-            elif len(args) == 1:
-                method_name = args[0]
-                if not isinstance(method_name, (unicode, VString)):
-                    raise VCallError('Method argument must be a VString')
-                method_data = self.__methods.get(method_name, None)
-                if method_data:
-                    return method_data.doc
-                else:
-                    raise VException('Not an exposed method')
+        if not args:
+            try:
+                doc = self._v_external_doc
+            except AttributeError:
+                return None
+            else:
+                return doc
+        elif len(args) == 1:
+            method_name = args[0]
+            if not isinstance(method_name, (unicode, VString)):
+                raise VCallError('Method argument must be a VString')
+            method_data = self.__methods.get(method_name, None)
+            if method_data:
+                return method_data.doc
             else:
-                raise VCallError('Invalid doc meta call format')
+                raise VException('Not an exposed method')
+        else:
+            raise VCallError('Invalid doc meta call format')
 
     @meta_as('methods')
     def _v_methods(self, **kargs):
-        with self.__methods_lock:
-            result = []
-            for name, method_data in self.__methods.items():
-                if method_data.show:
-                    result.append(name)
-            result.sort()
-            return tuple(result)
+        result = []
+        for name, method_data in self.__methods.items():
+            if method_data.show:
+                result.append(name)
+        result.sort()
+        return tuple(result)
 
     def _v_unwind_method(self, method):
         """Internal call to unwind the parameters of a method.
@@ -478,14 +487,113 @@ class VExternal(VObject):
             raise RuntimeError('Not instance or class method of this object')
         return method.im_func, is_instance_call
 
+    def __unpublish(self, name, method_func):
+        # Replaces method tables with copies which do not include the
+        # method, must be called with the methods lock held
+        methods = dict(self.__methods)
+        methods.pop(name, None)
+        method_names = dict(self.__method_names)
+        method_names.pop(method_func, None)
+        self.__methods = methods
+        self.__method_names = method_names
+
+    @classmethod
+    def __class_tables(cls):
+        """Returns (methods, method_names, meta, meta_names) for the class.
+
+        Tables are generated by inspecting class attributes on first
+        use, and are cached on the class. The cache is looked up in
+        the class' own dictionary so derived classes are inspected
+        separately.
+
+        """
+        tables = cls.__dict__.get('_VExternal__tables', None)
+        if tables is not None:
+            return tables
+
+        methods, method_names = dict(), dict()
+        meta, meta_names = dict(), dict()
+        for _attr_name in dir(cls):
+            try:
+                method = getattr(cls, _attr_name)
+            except Exception as e:
+                _v_silent(e)
+                continue
+            if _pyver == 2:
+                if not isinstance(method, types.MethodType):
+                    continue
+                method_func = method.im_func
+                if method.im_self is None:
+                    instance_method = True
+                elif method.im_self is cls:
+                    instance_method = False
+                else:
+                    continue
+            else:
+                # Instance methods are plain functions on the class,
+                # which is also how static methods are retrieved
+                raw = inspect.getattr_static(cls, _attr_name, None)
+                if isinstance(raw, staticmethod):
+                    continue
+                if isinstance(method, types.FunctionType):
+                    method_func = method
+                    instance_method = True
+                elif (isinstance(method, types.MethodType)
+                      and method.__self__ is cls):
+                    method_func = method.__func__
+                    instance_method = False
+                else:
+                    continue
+
+            if hasattr(method, 'external') and method.external:
+                try:
+                    doc = method.external_doc
+                except AttributeError:
+                    doc = None
+                try:
+                    ctx = not method.external_noctx
+                except AttributeError:
+                    ctx = True
+                try:
+                    show = method.external_show
+                except AttributeError:
+                    show = False
+                process = None
+                if getattr(method, 'external_process', False):
+                    if instance_method:
+                        raise TypeError('@publish process requires a '
+                                        'class method')
+                    process = _attr_name
+                method_data = _VMethodData(method_func, instance_method,
+                                           doc, ctx, show, process)
+
+                name = method.external_name
+                if name is None:
+                    name = unicode(method.__name__)
+                methods[name] = method_data
+                method_names[method_func] = name
+
+            if hasattr(method, 'meta') and method.meta:
+                name = method.meta_name
+                if name is None:
+                    name = unicode(method.__name__)
+                meta[name] = _VMetaData(method_func, instance_method)
+                meta_names[method_func] = name
+
+        tables = (methods, method_names, meta, meta_names)
+        cls.__tables = tables
+        return tables
+
 
 class _VMethodData:
-    def __init__(self, method_func, instance_method, doc, ctx, show):
+    def __init__(self, method_func, instance_method, doc, ctx, show,
+                 process=None):
         self.method_func = method_func
         self.instance_method = instance_method
         self.doc = doc
         self.ctx = ctx
         self.show = show
+        self.process = process   # attribute name if executed in process
 
 
 class _VMetaData:
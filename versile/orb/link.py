@@ -26,7 +26,7 @@ import weakref
 
 from versile.internal import _vexport
 from versile.common.iface import abstract, peer
-from versile.common.pending import VPending
+from versile.common.pending import VPending, VPendingList
 from versile.common.processor import VProcessor
 from versile.common.util import VCondition, VSimpleBus
 from versile.common.util import VConfig
@@ -40,8 +40,8 @@ from versile.orb.entity import VObjectCall, VCallContext, VSimulatedException
 from versile.orb.error import VLinkError
 from versile.orb.module import VModuleResolver
 
-__all__ = ['VHandshake', 'VLink', 'VLinkCallContext', 'VLinkConfig',
-           'VLinkKeepAlive']
+__all__ = ['VHandshake', 'VLink', 'VLinkCallBatch', 'VLinkCallContext',
+           'VLinkConfig', 'VLinkKeepAlive']
 __all__ = _vexport(__all__)
 
 
@@ -136,6 +136,9 @@ class VLink(VObjectIOContext):
     DEFAULT_INT_LINK_BUFSIZE = 0x80000
     """Default buffer sizes for internal links."""
 
+    MAX_PEER_DEREF_BATCH = 200
+    """Max deref batching window (msec) adopted from a peer's offer."""
+
     STATUS_HANDSHAKING = 1
     """Status associated with handshaking active link."""
 
@@ -207,6 +210,12 @@ class VLink(VObjectIOContext):
         self._keep_alive_r_lkap = None    # Time of last keep-alive message
         self._keep_alive_r_times = collections.deque()
 
+        self._deref_batch = None          # deref batching window (msec)
+        self._deref_batch_sent = False    # True if sent batching offer
+        self._deref_batch_recv = False    # True if got peer batching offer
+        self._deref_queue = []            # queued (peer_id, recv_count)
+        self._deref_lock = Lock()
+
         self._peer_copyleft = None        # Set to True/False during h.shake
         self._peer_lic = None         # If peer copyleft, set in h.shake
         self._peer_lic_url = None     # If peer copyleft, set in h.shake
@@ -243,7 +252,9 @@ class VLink(VObjectIOContext):
                _MC.CALL_ERROR              : self._call_error,
                _MC.NOTIFY_DEREF            : self._notify_deref,
                _MC.CONFIRM_DEREF           : self._confirm_deref,
-               _MC.KEEP_ALIVE              : self._keep_alive
+               _MC.KEEP_ALIVE              : self._keep_alive,
+               _MC.NOTIFY_DEREF_BATCH      : self._notify_deref_batch,
+               _MC.CONFIRM_DEREF_BATCH     : self._confirm_deref_batch
                }
         self._handlers = _h
 
@@ -386,6 +397,19 @@ class VLink(VObjectIOContext):
                 self._peer_objcall.append(result)
             return result
 
+    def call_batch(self):
+        """Returns a batch for sending multiple remote calls together.
+
+        :returns: call batch
+        :rtype:   :class:`VLinkCallBatch`
+
+        Calls added to the batch are sent to the link peer as a single
+        write when the batch is sent. See :class:`VLinkCallBatch` for
+        usage.
+
+        """
+        return VLinkCallBatch(self)
+
     @abstract
     def shutdown(self, force=False, timeout=None, purge=None):
         """Shuts down the link.
@@ -603,6 +627,29 @@ class VLink(VObjectIOContext):
         """
         raise NotImplementedError()
 
+    @abstract
+    def _send_call_msgs(self, messages):
+        """Dispatch a set of call messages to the link peer.
+
+        :param messages: messages as (msg_code, payload, checks, noreturn)
+        :type  messages: list
+        :returns:        associated registered reference calls
+        :rtype:          list
+        :raises:         :exc:`versile.orb.error.VLinkError`
+
+        Similar to :meth:`_send_call_msg` for a list of messages,
+        except the messages should be dispatched with a single write
+        while holding the lock on message sending once. If *noreturn*
+        is True for a message then no reference call is registered
+        for the message, and the associated element of the returned
+        list is None.
+
+        For internal use by link infrastructure, and should normally
+        not be invoked directly by an application.
+
+        """
+        raise NotImplementedError()
+
     def _initiate_handshake(self):
         """Create handshake object and send to peer."""
         self._send_handshake_msg(self._create_hello_msg())
@@ -873,6 +920,12 @@ class VLink(VObjectIOContext):
         peer_id = peer_id._v_native()
         peer_recv_count = peer_recv_count._v_native()
 
+        if peer_id == 0:
+            # Peer ID 0 is never assigned to an object, it carries an
+            # offer from the peer to batch dereference messages
+            self._recv_deref_batch_offer(peer_recv_count)
+            return
+
         performed_deref = False
         no_ref_left = False
 
@@ -923,6 +976,148 @@ class VLink(VObjectIOContext):
         if _exit:
             self.shutdown()
 
+    def _notify_deref_batch(self, msg_id, msg_data):
+        """Processes a batched VObject dereference notification message.
+
+        :param msg_id:   message ID (unused)
+        :type  msg_id:   int, long
+        :param msg_data: a tuple of (peer_id1, recv_count1, peer_id2, ...)
+        :type  msg_data: :class:`versile.orb.entity.`VTuple`
+
+        Similar to :meth:`_notify_deref` for a set of objects, except
+        performed dereferences are confirmed with a single batched
+        confirmation message.
+
+        """
+        if not isinstance(msg_data, VTuple) or len(msg_data) % 2:
+            raise VLinkError('Malformed VLink protocol deref message')
+        values = []
+        for item in msg_data:
+            if not isinstance(item, VInteger):
+                raise VLinkError('Malformed VLink protocol deref message')
+            values.append(item._v_native())
+
+        confirmed = []
+        no_ref_left = False
+
+        self._local_lock.acquire()
+        try:
+            for pos in range(0, len(values), 2):
+                peer_id, peer_recv_count = values[pos], values[pos+1]
+                local = self._local_obj.get(peer_id, None)
+                if local:
+                    obj, send_count = local
+                    if send_count == peer_recv_count:
+                        confirmed.append(peer_id)
+                        self._local_obj.pop(peer_id, None)
+                        self._local_p_ids.pop(obj, None)
+            # Shut down link if no references remain
+            if confirmed and not self._local_obj and not self._peer_obj:
+                no_ref_left = True
+        finally:
+            self._local_lock.release()
+
+        if confirmed:
+            msg_code = VMessageCode.CONFIRM_DEREF_BATCH
+            try:
+                self._send_msg(msg_code, VTuple(confirmed))
+            except VLinkError:
+                # Shut down if sending message fails
+                self.log.debug('_send_msg failed')
+                self.shutdown(force=True, purge=True)
+        if no_ref_left:
+            self.shutdown()
+
+    def _confirm_deref_batch(self, msg_id, msg_data):
+        """Processes a batched VReference dereference confirmation message.
+
+        :param msg_id:   message ID (unused)
+        :type  msg_id:   int, long
+        :param msg_data: the peer IDs for the objects in question
+        :type  msg_data: :class:`versile.orb.entity.`VTuple`
+
+        """
+        if not isinstance(msg_data, VTuple):
+            raise VLinkError('Malformed VLink protocol deref confirm message')
+        peer_ids = []
+        for item in msg_data:
+            if not isinstance(item, VInteger):
+                raise VLinkError('Malformed VLink protocol deref confirm '
+                                 + 'message')
+            peer_ids.append(item._v_native())
+        self._peer_lock.acquire()
+        try:
+            for peer_id in peer_ids:
+                self._peer_obj.pop(peer_id, None)
+            # Shut down link if no references remain
+            _exit = (not self._local_obj and not self._peer_obj)
+        finally:
+            self._peer_lock.release()
+        if _exit:
+            self.shutdown()
+
+    def _send_deref_batch_offer(self, window):
+        """Offers the peer to batch dereference messages.
+
+        :param window: batching window in milliseconds
+        :type  window: int, long
+
+        The offer is sent as a :attr:`VMessageCode.NOTIFY_DEREF` for
+        peer ID 0 with *window* as the receive count. Peer ID 0 is
+        never assigned to an object, and peers which do not support
+        batching ignore the message. Batching is enabled only when
+        the peer has also sent an offer, see
+        :meth:`_recv_deref_batch_offer`\ .
+
+        """
+        self._deref_lock.acquire()
+        try:
+            if self._deref_batch_sent:
+                return
+            self._deref_batch_sent = True
+            if self._deref_batch_recv:
+                self._deref_batch = window
+        finally:
+            self._deref_lock.release()
+        try:
+            self._send_msg(VMessageCode.NOTIFY_DEREF, VTuple(0, window))
+        except VLinkError:
+            # Shut down if sending message fails
+            self.log.debug('_send_msg failed')
+            self.shutdown(force=True, purge=True)
+
+    def _recv_deref_batch_offer(self, window):
+        """Processes a peer offer to batch dereference messages.
+
+        :param window: batching window requested by the peer (msec)
+        :type  window: int, long
+        :raises:       :exc:`versile.orb.error.VLinkError`
+
+        If this side of the link has not already sent an offer, an
+        offer is sent in return, using the window set on the link
+        configuration. If not set then *window* is used, limited to
+        :attr:`MAX_PEER_DEREF_BATCH`\ , so a peer cannot make the
+        link hold dereferences for an arbitrary time. Batching is then
+        enabled, as both sides have declared support.
+
+        """
+        if window <= 0:
+            raise VLinkError('Malformed VLink protocol deref batch offer')
+        own_window = self._config.deref_batch
+        if own_window is None:
+            own_window = min(window, self.MAX_PEER_DEREF_BATCH)
+        self._deref_lock.acquire()
+        try:
+            if self._deref_batch_recv:
+                raise VLinkError('Duplicate VLink protocol deref batch offer')
+            self._deref_batch_recv = True
+            if self._deref_batch_sent:
+                self._deref_batch = own_window
+                return
+        finally:
+            self._deref_lock.release()
+        self._send_deref_batch_offer(own_window)
+
     def _keep_alive(self, msg_id, msg_data):
         """Processes a keep-alive message.
 
@@ -959,6 +1154,10 @@ class VLink(VObjectIOContext):
         message to the link peer. Should normally occur when a
         :class:`versile.orb.entity.`VReference` is garbage collected.
 
+        If dereference batching was enabled with the peer, the
+        dereference is queued and sent together with other
+        dereferences within the negotiated window.
+
         """
         self._peer_lock.acquire()
         try:
@@ -968,6 +1167,16 @@ class VLink(VObjectIOContext):
 
         if entry:
             w_ref, recv_count = entry
+            if self._deref_batch:
+                self._deref_lock.acquire()
+                try:
+                    schedule = not self._deref_queue
+                    self._deref_queue.append((peer_id, recv_count))
+                finally:
+                    self._deref_lock.release()
+                if schedule:
+                    self._schedule_deref_send(self._deref_batch)
+                return
             msg_code = VMessageCode.NOTIFY_DEREF
             try:
                 self._send_msg(msg_code, VTuple(peer_id, recv_count))
@@ -1128,6 +1337,39 @@ class VLink(VObjectIOContext):
         """
         raise NotImplementedError()
 
+    @abstract
+    def _schedule_deref_send(self, delay):
+        """Schedules sending queued dereference notifications.
+
+        :param delay: delay in milliseconds
+        :type  delay: int, long
+
+        The scheduled call should execute :meth:`_handle_deref_send`\ .
+
+        """
+        raise NotImplementedError()
+
+    def _handle_deref_send(self):
+        """Sends queued dereference notifications as a single message."""
+        self._deref_lock.acquire()
+        try:
+            queue, self._deref_queue = self._deref_queue, []
+        finally:
+            self._deref_lock.release()
+        if not queue or not self._active:
+            return
+
+        payload = []
+        for peer_id, recv_count in queue:
+            payload.append(peer_id)
+            payload.append(recv_count)
+        try:
+            self._send_msg(VMessageCode.NOTIFY_DEREF_BATCH, VTuple(payload))
+        except VLinkError:
+            # Shut down if sending message fails
+            self.log.debug('_send_msg failed')
+            self.shutdown(force=True, purge=True)
+
     def _handle_keep_alive_send(self):
         """Handles a reactor scheduled keep-alive send check."""
         if not self._active or self._closing:
@@ -1195,13 +1437,16 @@ class VLink(VObjectIOContext):
             # Register call on processor with group=self
             processor.queue_call(self.__execute_call, args=x_args, group=self,
                                  start_callback=self.__call_start_cback,
-                                 done_callback=self.__call_done_cback)
+                                 done_callback=self.__call_done_cback,
+                                 priority=self._config.call_priority)
         else:
             raise VLinkError('No processor registered on object or link')
 
     def __execute_call(self, call_id, obj, args, nores, noreturn):
         try:
-            result = obj._v_call(*args, nores=nores, ctx=self.__context)
+            # A pending result is received without blocking the thread
+            result = obj._v_call(*args, nores=nores, ctx=self.__context,
+                                 pending=True)
         except Exception as e:
             if isinstance(e, VCallError):
                 self.log.debug('VCallError %s' % e)
@@ -1488,6 +1733,11 @@ class VHandshake(VObject, VCondition):
                 raise VException('Invalid negotiated keep-alive from peer')
             link._keep_alive_recv = granted_t
 
+        # If defined on link, offer batching of dereference messages
+        window = link._config.deref_batch
+        if window is not None:
+            link._send_deref_batch_offer(window)
+
         # Finish handshake
         self._can_finish()
         peer_gw = self._peer._v_call('finish')
@@ -1574,7 +1824,7 @@ class VLinkReference(VReference):
         set internally on the link side which executes the call.
 
         """
-        nowait = nores = oneway = False
+        nowait = nores = oneway = pending = False
         checks = None
         for key, val in kargs.items():
             if key == 'nowait':
@@ -1583,6 +1833,8 @@ class VLinkReference(VReference):
                 nores = bool(val)
             elif key == 'oneway':
                 oneway = bool(val)
+            elif key == 'pending':
+                pending = bool(val)
             elif key == 'ctx':
                 pass
             elif key == 'vchk':
@@ -1621,6 +1873,10 @@ class VLinkReference(VReference):
 
         if nowait:
             return call
+        elif pending:
+            _pending = VPending()
+            call.add_callpair(_pending.callback, _pending.failback)
+            return _pending
         else:
             return call.result()
 
@@ -1629,6 +1885,202 @@ class VLinkReference(VReference):
         """Holds the reference's link context (:class:`VLink`\ )."""
         return self._v_context
 
+class VLinkCallBatch(object):
+    """A batch of remote calls which are sent to a link peer together.
+
+    :param link: the link to send calls over
+    :type  link: :class:`VLink`
+
+    Calls are added with :meth:`call` and are not sent to the peer
+    until :meth:`send` is called. All calls of the batch are then
+    assigned message IDs and written to the link peer with a single
+    write, which avoids per-call locking and serialization
+    overhead when performing many calls. The batch can be used as a
+    context manager, which sends the batch when the context exits
+    without an exception. Example use::
+
+        with link.call_batch() as batch:
+            for num in range(1000):
+                batch.call(service, 'echo', num)
+        results = batch.result()
+
+    Calls must be made on references to objects of the link's peer.
+    A batch can only be sent once.
+
+    """
+
+    def __init__(self, link):
+        self.__link = link
+        self.__messages = []
+        self.__calls = None
+
+    def call(self, ref, method, *args, **kargs):
+        """Adds a remote method call to the batch.
+
+        :param ref:    reference to the remote object
+        :type  ref:    :class:`VLinkReference`\ ,
+                       :class:`versile.orb.entity.VProxy`
+        :param method: remote method name
+        :type  method: unicode
+        :returns:      position of the call in the batch
+        :rtype:        int
+        :raises:       :exc:`versile.orb.entity.VCallError`
+
+        If *method* is of type 'bytes' it is converted to unicode,
+        similar to :class:`versile.orb.entity.VProxy` method
+        names. *args* are the arguments to the remote method. Keyword
+        arguments *nores*\ , *oneway* and *vchk* are similar to
+        :meth:`VLinkReference._v_call`\ .
+
+        """
+        nores = oneway = False
+        checks = None
+        for key, val in kargs.items():
+            if key == 'nores':
+                nores = bool(val)
+            elif key == 'oneway':
+                oneway = bool(val)
+            elif key == 'vchk':
+                if isinstance(val, (list, tuple)):
+                    checks = tuple(val)
+                else:
+                    checks = (val,)
+            else:
+                raise TypeError('Invalid keyword argument')
+
+        if self.__calls is not None:
+            raise VCallError('Batch was already sent')
+        if isinstance(ref, VProxy):
+            ref = ref()
+        if isinstance(method, bytes):
+            method = unicode(method)
+        if (not isinstance(ref, VLinkReference)
+            or ref._v_intctx is not self.__link):
+            raise VCallError('Not a reference to a peer object of the link')
+
+        try:
+            args = self.__link._lazy_entity((method,) + args)
+        except TypeError:
+            raise VCallError('Cannot lazy-convert arguments')
+
+        if oneway:
+            msg_code = VMessageCode.METHOD_CALL_NO_RETURN
+        elif nores:
+            msg_code = VMessageCode.METHOD_CALL_VOID_RESULT
+        else:
+            msg_code = VMessageCode.METHOD_CALL
+        self.__messages.append((msg_code, VTuple(ref, args), checks,
+                                oneway))
+        return len(self.__messages) - 1
+
+    def send(self):
+        """Sends all calls of the batch to the link peer.
+
+        :returns: call results for calls of the batch
+        :rtype:   list of :class:`versile.orb.entity.VReferenceCall`
+        :raises:  :exc:`versile.orb.entity.VCallError`
+
+        Returned call results are in the same order as calls were
+        added to the batch. Elements for 'oneway' calls are None.
+
+        """
+        if self.__calls is not None:
+            raise VCallError('Batch was already sent')
+        if self.__messages:
+            try:
+                self.__calls = self.__link._send_call_msgs(self.__messages)
+            except Exception as e:
+                raise VCallError('Unable to send remote method calls')
+        else:
+            self.__calls = []
+        self.__messages = None
+        return self.__calls
+
+    def result(self, timeout=None, exceptions=False):
+        """Waits for and returns results of all calls of the batch.
+
+        :param timeout:    max seconds to wait for each call result
+        :type  timeout:    float
+        :param exceptions: if True return exceptions in place of results
+        :type  exceptions: bool
+        :returns:          call results
+        :rtype:            list
+        :raises:           exception raised by a remote call, or
+                           :exc:`versile.common.util.VNoResult`
+
+        Sends the batch if it has not already been sent. Results are
+        in the same order as calls were added to the batch, and the
+        result of a 'oneway' call is None.
+
+        If *exceptions* is False and a call raised an exception, the
+        exception of the first such call is raised and other results
+        are not returned. If *exceptions* is True then the exception
+        of each failed call, including
+        :exc:`versile.common.util.VNoResult` for a call which timed
+        out, is returned as that call's result.
+
+        """
+        if self.__calls is None:
+            self.send()
+        results = []
+        for call in self.__calls:
+            if call is None:
+                results.append(None)
+            elif exceptions:
+                try:
+                    results.append(call.result(timeout))
+                except Exception as e:
+                    results.append(e)
+            else:
+                results.append(call.result(timeout))
+        return results
+
+    def pending(self):
+        """Returns a combined asynchronous result for all calls of the batch.
+
+        :returns: combined result
+        :rtype:   :class:`versile.common.pending.VPendingList`
+
+        Sends the batch if it has not already been sent. The returned
+        object fires a callback when all calls of the batch have
+        completed. The callback result is a list with a (did_succeed,
+        result) tuple for each call, in the same order as calls were
+        added to the batch, where a failed call's result is its
+        failure. The result of a 'oneway' call is (True, None).
+
+        """
+        if self.__calls is None:
+            self.send()
+        pending_list = []
+        for call in self.__calls:
+            _pending = VPending()
+            if call is None:
+                _pending.callback(None)
+            else:
+                call.add_callpair(_pending.callback, _pending.failback)
+            pending_list.append(_pending)
+        return VPendingList(pending_list)
+
+    @property
+    def calls(self):
+        """Call results for a sent batch, otherwise None."""
+        return self.__calls
+
+    def __len__(self):
+        if self.__messages is not None:
+            return len(self.__messages)
+        else:
+            return len(self.__calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self.__calls is None:
+            self.send()
+        return False
+
+
 class VLinkCallContext(VCallContext):
     """Call context for a link."""
 
@@ -1668,6 +2120,10 @@ class VLinkConfig(VConfig):
     :type  ctx_factory:   callable
     :param keep_alive:    keep-alive settings for link
     :type  keep_alive:    :class:`VLinkKeepAlive`
+    :param deref_batch:   window for batching dereferences (milliseconds)
+    :type  deref_batch:   int
+    :param call_priority: processor priority of peer's remote calls
+    :type  call_priority: int
 
     If *hold_peer* to False then peer gateway reference is dropped
     after the handshake. This prevents holding a references to the
@@ -1702,6 +2158,30 @@ class VLinkConfig(VConfig):
     If set, *keep_alive* are keep-alive settings for negotiating
     keep-alive with the link peer.
 
+    If *deref_batch* is set then the link offers during the link
+    handshake to batch dereference messages. If the link peer
+    supports batching it returns the offer, and dereferences of
+    remote objects are then collected during a *deref_batch*
+    milliseconds window and sent to the peer as a single message,
+    which the peer confirms with a single message. This reduces link
+    traffic when many references are garbage collected
+    together. Peers which do not support batching ignore the offer,
+    and the link then uses one message per dereference.
+
+    Links which do not set *deref_batch* use one message per
+    dereference unless batching is offered by the peer. If the peer
+    offers batching, the link accepts and adopts the peer's window,
+    limited to :attr:`VLink.MAX_PEER_DEREF_BATCH` milliseconds.
+    Batching is thus enabled when either side of the link sets
+    *deref_batch*\ .
+
+    *call_priority* is the priority of calls queued on the link
+    processor for executing remote calls received from the peer, see
+    :meth:`versile.common.processor.VProcessor.queue_call`\ . The
+    link is the call group of the calls, so a processor which is
+    shared between links and which uses fair scheduling will schedule
+    calls fairly between the links.
+
     *kargs* is passed on as additional keywords to the parent
     constructor.
 
@@ -1710,7 +2190,8 @@ class VLinkConfig(VConfig):
     def __init__(self, hold_peer=True, init_timeout=None, force_timeout=None,
                  purge=False, lazy_threads=3, lazy_entity=True,
                  lazy_native=True, parser=None, lazy_parser=True,
-                 ctx_factory=None, keep_alive=None, **kargs):
+                 ctx_factory=None, keep_alive=None, deref_batch=None,
+                 call_priority=0, **kargs):
         if keep_alive is None:
             keep_alive = VLinkKeepAlive()
         s_init = super(VLinkConfig, self).__init__
@@ -1718,7 +2199,9 @@ class VLinkConfig(VConfig):
                force_timeout=force_timeout, purge=purge,
                lazy_threads=lazy_threads, lazy_entity=lazy_entity,
                lazy_native=lazy_native, parser=parser, lazy_parser=lazy_parser,
-               ctx_factory=ctx_factory, keep_alive=keep_alive, **kargs)
+               ctx_factory=ctx_factory, keep_alive=keep_alive,
+               deref_batch=deref_batch, call_priority=call_priority,
+               **kargs)
 
 
 class VLinkKeepAlive(object):
@@ -0,0 +1,261 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Processor which can execute calls in a pool of worker processes."""
+from __future__ import print_function, unicode_literals
+
+import multiprocessing
+import sys
+import threading
+
+from versile.internal import _vexport, _pyver
+from versile.common.pending import VPending
+from versile.common.processor import VProcessor
+from versile.orb.entity import VEntity, VIOContext, VCallError
+from versile.orb.entity import VSimulatedException
+from versile.orb.module import VModuleResolver
+
+__all__ = ['VProcessPoolProcessor']
+__all__ = _vexport(__all__)
+
+
+class VProcessPoolProcessor(VProcessor):
+    """Processor which can also execute calls in worker processes.
+
+    :param workers:   number of worker threads to start
+    :type  workers:   int
+    :param processes: number of worker processes (default: number of CPUs)
+    :type  processes: int
+
+    Other arguments are similar to
+    :class:`versile.common.processor.VProcessor`\ .
+
+    Calls queued with :meth:`queue_call` are executed by worker
+    threads, similar to a :class:`versile.common.processor.VProcessor`\
+    . In addition, :meth:`process_call` executes a call in a
+    :class:`multiprocessing.Pool` of worker processes. This allows
+    CPU intensive calls to execute in parallel, without holding the
+    python interpreter lock of the process which runs the processor.
+
+    When a :class:`versile.orb.external.VExternal` object has this
+    processor as its processor, then methods which were published
+    with *process* set are executed with :meth:`process_call`\ .
+
+    The process pool is lazy-created the first time it is needed, or
+    it can be created with :meth:`start_pool`\ . As worker processes
+    are forked from the running process, the pool should preferably
+    be started before starting reactor threads or other threads.
+
+    """
+
+    def __init__(self, workers, processes=None, daemon=False, lazy=True,
+                 logger=False, fair=False, group_limit=None):
+        s_init = super(VProcessPoolProcessor, self).__init__
+        s_init(workers, daemon=daemon, lazy=lazy, logger=logger, fair=fair,
+               group_limit=group_limit)
+        self.__processes = processes
+        self.__pool = None
+        self.__pool_calls = set()    # unresolved pendings of current pool
+        self.__pool_lock = threading.Lock()
+        self.__parser = VModuleResolver(add_imports=True)
+
+    def process_call(self, cls, name, args):
+        """Executes a class method in a worker process.
+
+        :param cls:  class which holds the method
+        :type  cls:  type
+        :param name: attribute name of the class method
+        :type  name: unicode
+        :param args: method arguments
+        :type  args: tuple
+        :returns:    pending call result
+        :rtype:      :class:`versile.common.pending.VPending`
+        :raises:     :exc:`versile.orb.entity.VCallError`
+
+        The worker process looks up the method as the attribute *name*
+        of *cls*\ , which must be a module level class that the worker
+        process can import. Arguments and the result are passed
+        between processes as serialized
+        :class:`versile.orb.entity.VEntity` data, and so must be
+        lazy-convertible to :class:`versile.orb.entity.VEntity`\
+        . Object references cannot be passed.
+
+        Raises an exception if the arguments cannot be serialized. If
+        the method raises an exception, the exception is passed as a
+        failure of the returned result if it can be serialized,
+        otherwise a :exc:`versile.orb.entity.VCallError` is passed.
+
+        If the process pool is stopped before the call completes, a
+        :exc:`versile.orb.entity.VCallError` is passed as a failure,
+        see :meth:`stop`\ .
+
+        """
+        try:
+            data = _encode(tuple(args), self.__parser)
+        except Exception:
+            raise VCallError('Arguments cannot be passed to a process')
+
+        pending = VPending()
+        pool = self.start_pool()
+        with self.__pool_lock:
+            calls = self.__pool_calls
+            calls.add(pending)
+
+        def resolve(is_result, value):
+            # Resolves the call unless already failed by stop()
+            with self.__pool_lock:
+                if pending not in calls:
+                    return
+                calls.discard(pending)
+            if is_result:
+                pending.callback(value)
+            else:
+                pending.failback(value)
+        def callback(result):
+            try:
+                is_result, data = result
+                if data is None:
+                    value = VCallError()
+                else:
+                    value = _decode(data, self.__parser)
+            except Exception:
+                is_result, value = False, VCallError()
+            if not is_result and not isinstance(value, Exception):
+                value = VSimulatedException(value)
+            resolve(is_result, value)
+        def error_callback(exc):
+            resolve(False, VCallError('Process pool call failed'))
+
+        f_args = (cls.__module__, cls.__name__, name, data)
+        try:
+            if _pyver == 2:
+                pool.apply_async(_pool_execute, f_args, callback=callback)
+            else:
+                pool.apply_async(_pool_execute, f_args, callback=callback,
+                                 error_callback=error_callback)
+        except Exception:
+            with self.__pool_lock:
+                calls.discard(pending)
+            raise VCallError('Process pool is not running')
+        return pending
+
+    def start_pool(self):
+        """Starts the process pool if not already started.
+
+        :returns: process pool
+        :rtype:   :class:`multiprocessing.pool.Pool`
+
+        """
+        with self.__pool_lock:
+            if self.__pool is None:
+                self.__pool = multiprocessing.Pool(self.__processes)
+            return self.__pool
+
+    def stop(self, purge=False):
+        """Stop all worker processing by shutting down all workers.
+
+        :param purge: if True, then empty the call queue
+        :type  purge: bool
+
+        See :meth:`versile.common.processor.VProcessor.stop`\ . Also
+        closes the process pool. If *purge* is True then the pool is
+        terminated without completing calls which are queued on the
+        pool, and those calls fail with a
+        :exc:`versile.orb.entity.VCallError`\ . Otherwise the pool
+        completes queued calls before it shuts down, and calls which
+        did not complete (e.g. because a worker process died) then
+        fail with a :exc:`versile.orb.entity.VCallError`\ .
+
+        """
+        super(VProcessPoolProcessor, self).stop(purge=purge)
+        with self.__pool_lock:
+            pool, self.__pool = self.__pool, None
+            calls, self.__pool_calls = self.__pool_calls, set()
+        if pool:
+            if purge:
+                pool.terminate()
+                self.__fail_calls(calls)
+            else:
+                pool.close()
+                def join():
+                    pool.join()
+                    self.__fail_calls(calls)
+                thread = threading.Thread(target=join)
+                thread.daemon = True
+                thread.start()
+
+    def __fail_calls(self, calls):
+        with self.__pool_lock:
+            pendings = list(calls)
+            calls.clear()
+        for pending in pendings:
+            pending.failback(VCallError('Process pool was stopped'))
+
+    @property
+    def processes(self):
+        """Number of worker processes set on the processor (or None)."""
+        return self.__processes
+
+
+# Resolver used by worker processes, lazy-created
+_process_parser = None
+
+def _pool_execute(module, cls_name, name, data):
+    """Executes a method in a pool process.
+
+    Returns (True, result_data) for a result or (False, exc_data) for
+    an exception, where exc_data is None if the exception cannot be
+    serialized. Exceptions which are not derived from Exception, such
+    as SystemExit, are also returned so the call always completes.
+
+    """
+    global _process_parser
+    if _process_parser is None:
+        _process_parser = VModuleResolver(add_imports=True)
+    parser = _process_parser
+    try:
+        __import__(module)
+        cls = getattr(sys.modules[module], cls_name)
+        method = getattr(cls, name)
+        args = _decode(data, parser)
+        result = method(*args)
+    except BaseException as e:
+        if isinstance(e, VCallError):
+            return (False, None)
+        if isinstance(e, VSimulatedException):
+            e = e.value
+        try:
+            return (False, _encode(e, parser))
+        except Exception:
+            return (False, None)
+    try:
+        return (True, _encode(result, parser))
+    except Exception:
+        return (False, None)
+
+def _io_context():
+    ctx = VIOContext()
+    ctx.str_encoding = ctx.str_decoding = b'utf8'
+    return ctx
+
+def _encode(value, parser):
+    return VEntity._v_lazy(value, parser)._v_write(_io_context())
+
+def _decode(data, parser):
+    entity, num_read = VEntity._v_decode_bytes(data, _io_context())
+    return VEntity._v_lazy_native(entity, parser)
@@ -263,27 +263,41 @@ class VService(VLockable):
 
     @classmethod
     def create_socket(cls, interface='', port=0, bind=True, listen=10,
-                      reuse=True):
+                      reuse=True, reuse_port=False):
         """Creates a listening socket for creating a service.
 
-        :param interface: interface to bind to
-        :type  interface: unicode
-        :param port:      port to bind to
-        :type  port:      int
-        :param bind:      if True bind the socket
-        :type  bind:      bool
-        :param listen:    argument for socket.listen() if binding
-        :type  listen:    int
-        :param reuse:     if True set up address reuse on socket
-        :type  reuse:     True
+        :param interface:  interface to bind to
+        :type  interface:  unicode
+        :param port:       port to bind to
+        :type  port:       int
+        :param bind:       if True bind the socket
+        :type  bind:       bool
+        :param listen:     argument for socket.listen() if binding
+        :type  listen:     int
+        :param reuse:      if True set up address reuse on socket
+        :type  reuse:      True
+        :param reuse_port: if True set up port reuse on socket
+        :type  reuse_port: bool
+        :raises:           :exc:`exceptions.ValueError`
 
         The returned socket can be used as a *sock* argument for the
         :class:`VService` constructor.
 
+        If *reuse_port* is True then SO_REUSEPORT is set on the
+        socket, which allows several sockets (typically in separate
+        processes) to bind to the same port and have the operating
+        system distribute connections between them. Raises
+        :exc:`exceptions.ValueError` if SO_REUSEPORT is not supported
+        on the platform.
+
         """
+        if reuse_port and not hasattr(socket, 'SO_REUSEPORT'):
+            raise ValueError('SO_REUSEPORT not supported on platform')
         sock = socket.socket()
         if reuse:
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         if bind:
             sock.bind((interface, port))
             sock.listen(listen)
@@ -540,6 +554,12 @@ class VServiceController(VExternal):
                 self._nodes[node] = max(num, 0)
             self.__process()
 
+    @property
+    def clients(self):
+        """Dictionary of registered node -> number of active clients."""
+        with self:
+            return dict(self._nodes)
+
     def add_node(self, node):
         """Adds a node to the set of nodes managed by the controller.
 
@@ -642,12 +662,23 @@ class VServiceNode(VExternal):
     is also normally not be possible when the service registers itself
     with the node during construction).
 
+    :param controlled: if True the controller authorizes client accept
+    :type  controlled: bool
+
+    If *controlled* is False then the node's service accepts client
+    connections without authorization from the controller, and the
+    node only reports accepted and closed client connections to the
+    controller. This can be used for tracking clients of services
+    whose connections are distributed by other mechanisms, such as
+    services listening on separate SO_REUSEPORT sockets.
+
     """
 
-    def __init__(self):
+    def __init__(self, controlled=True):
         super(VServiceNode, self).__init__()
         self._service = None
         self._cntl = None
+        self._controlled = controlled
 
     @publish(show=True, doc=True)
     def start_service(self, cntl):
@@ -695,6 +726,11 @@ class VServiceNode(VExternal):
             if self._service:
                 self._service._can_accept()
 
+    @property
+    def controlled(self):
+        """True if the controller authorizes client accept (bool)."""
+        return self._controlled
+
     def register_service(self, service):
         """Registers a service with this node, which the node will manage.
 
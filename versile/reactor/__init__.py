@@ -187,6 +187,35 @@ class IVTimeReactor(VInterface):
 
         """
 
+    def call_soon(self, callback, *args, **kargs):
+        """Queues a call for execution at the end of the current loop.
+
+        :param callback: function to execute
+        :type  callback: callable
+        :param args:     arguments to function
+        :param kargs:    keyword arguments to function
+
+        Requests that the reactor thread executes the following at the
+        end of the current iteration of the reactor's event loop, or
+        as soon as possible if called from outside the reactor thread:
+
+            callback(\*args, \*\*kargs)
+
+        Calls are executed in the order they were queued. Compared to
+        :meth:`schedule` with a zero delay, queued calls do not have
+        a call object and cannot be cancelled, which makes them
+        cheaper for triggering frequent operations such as producer
+        and consumer limit updates.
+
+        If *callback* is queued without arguments and the same
+        callback which was queued without arguments is still pending,
+        then the call is ignored. A bound method is the same callback
+        if it is the same method bound to the same object (by
+        identity, not equality), which allows repeatedly triggering an
+        object's method without queueing duplicate calls.
+
+        """
+
     def cg_schedule(self, delay_time, callgroup, callback, *args, **kargs):
         """Schedules a call for execution and associates with a call group.
 
@@ -399,6 +428,11 @@ class VScheduledCall(object):
             finally:
                 self.__executed = True
 
+    @property
+    def callback(self):
+        """The call's callback (None if the call was cancelled)."""
+        return self.__callback
+
     @property
     def callgroup(self):
         return self.__callgroup
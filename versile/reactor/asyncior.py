@@ -0,0 +1,491 @@
+# Copyright (C) 2011-2013 Versile AS
+#
+# This file is part of Versile Python.
+#
+# Versile Python is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Reactor based on an :mod:`asyncio` event loop.
+
+Only available on python versions that support :mod:`asyncio`\ , with
+an event loop which supports :meth:`asyncio.AbstractEventLoop.add_reader`
+and :meth:`asyncio.AbstractEventLoop.add_writer`\ .
+
+"""
+from __future__ import print_function, unicode_literals, absolute_import
+
+import asyncio # Raises ImportError if no asyncio
+import copy
+import threading
+import time
+
+from versile.internal import _vexport, _v_silent
+from versile.common.iface import implements
+from versile.common.log import VLogger
+from versile.reactor import VScheduledCall
+from versile.reactor import VReactorStopped, IVCoreReactor
+from versile.reactor import IVDescriptorReactor, IVTimeReactor
+from versile.reactor.io import VFIOLost
+from versile.reactor.log import VReactorLogger
+from versile.reactor.waitr import VFDWaitReactor, _soon_key
+
+__all__ = ['VAsyncioReactor']
+__all__ = _vexport(__all__)
+
+
+@implements(IVCoreReactor, IVDescriptorReactor, IVTimeReactor)
+class VAsyncioReactor(object):
+    """Reactor which runs its event handling on an :mod:`asyncio` loop.
+
+    :param loop:   event loop (if None a new event loop is created)
+    :type  loop:   :class:`asyncio.AbstractEventLoop`
+    :param daemon: if True a reactor thread is run as a daemonic thread
+    :type  daemon: bool
+
+    Descriptor events are handled with the loop's
+    :meth:`asyncio.AbstractEventLoop.add_reader` and
+    :meth:`asyncio.AbstractEventLoop.add_writer`\ , and scheduled calls
+    are registered as loop timers. Calls made from the loop's thread
+    are performed directly, and calls made from other threads are
+    passed to the loop with
+    :meth:`asyncio.AbstractEventLoop.call_soon_threadsafe`\ .
+
+    The reactor can be used similar to other reactors by calling
+    :meth:`run` or :meth:`start`\ . If *loop* is already running when
+    :meth:`start` is called, then the reactor attaches to the running
+    loop instead of starting a thread, allowing the reactor to share
+    an event loop with other :mod:`asyncio` services. Below is an
+    example of setting up a link from a coroutine::
+
+        reactor = VAsyncioReactor(asyncio.get_running_loop())
+        reactor.start()
+        link = VLinkAgent.from_socket(sock, reactor=reactor)
+
+    :meth:`stop` detaches the reactor from an attached loop, or stops
+    the loop if it was started by :meth:`run`\ .
+
+    """
+
+    def __init__(self, loop=None, daemon=False):
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self.__owns_loop = True
+        else:
+            self.__owns_loop = False
+        self.__loop = loop
+        self.__daemon = daemon
+
+        self.__readers, self.__writers = dict(), dict()     # obj -> fd
+        self.__read_fds, self.__write_fds = dict(), dict()  # fd -> obj
+
+        self.__finished = False
+        self.__running = False
+        self.__attached = False
+        self.__thread = None
+
+        self.__calls = dict()           # id(call) -> (call, timer handle)
+        self.__grouped_calls = dict()   # callgroup -> set of id(call)
+        self.__soon_keys = set()        # pending call_soon() callbacks
+
+        self.__core_log = VLogger()
+        self.__logger = VReactorLogger(self)
+        self.__logger.add_watcher(self.__core_log)
+        # Reactor-only proxy logger which adds a prefix
+        self.__rlog = self.__core_log.create_proxy_logger(prefix='Reactor')
+
+    def run(self):
+        """See :meth:`versile.reactor.IVCoreReactor.run`\ .
+
+        Runs the event loop until the reactor is stopped.
+
+        """
+        if self.__finished or self.__running:
+            raise RuntimeError('Can only start reactor once')
+        self.__running = True
+        self.__thread = threading.current_thread()
+        if self.__owns_loop:
+            asyncio.set_event_loop(self.__loop)
+        self.started()
+
+        try:
+            self.__loop.run_forever()
+        finally:
+            self.__finish()
+            if self.__owns_loop:
+                self.__loop.close()
+
+    def start(self):
+        """Starts the reactor.
+
+        If the reactor's event loop is running, the reactor attaches
+        to the loop. Otherwise, :meth:`run` is executed in a new
+        thread.
+
+        """
+        if self.__finished or self.__running:
+            raise RuntimeError('Can only start reactor once')
+        if self.__loop.is_running():
+            self.__running = True
+            self.__attached = True
+            if self.__is_loop_thread():
+                self.__attach()
+            else:
+                attached = threading.Event()
+                def _attach():
+                    try:
+                        self.__attach()
+                    finally:
+                        attached.set()
+                self.__loop.call_soon_threadsafe(_attach)
+                attached.wait()
+        else:
+            thread = threading.Thread(target=self.run)
+            thread.name = 'VAsyncioReactor-' + thread.name.split('-')[1]
+            if self.__daemon:
+                thread.daemon = True
+            self.__thread = thread
+            thread.start()
+
+    def started(self):
+        """See :meth:`versile.reactor.IVCoreReactor.started`\ .
+
+        If a default log watcher has been set with
+        :meth:`versile.reactor.waitr.VFDWaitReactor.set_default_log_watcher`
+        then the default watcher is added to this reactor's logger.
+
+        """
+        if hasattr(VFDWaitReactor, '_default_log_watcher'):
+            self.__core_log.add_watcher(VFDWaitReactor._default_log_watcher)
+
+    def stop(self):
+        """See :meth:`versile.reactor.IVCoreReactor.stop`\ ."""
+        if self.__finished or not self.__running:
+            return
+        if self.__is_reactor_thread():
+            self.__stop()
+        else:
+            self.__threadsafe(self.__stop)
+
+    def add_reader(self, reader, internal=False):
+        """See :meth:`versile.reactor.IVDescriptorReactor.add_reader`\ ."""
+        if self.__finished:
+            raise VReactorStopped('Reactor was stopped.')
+        elif internal or self.__is_reactor_thread():
+            if reader in self.__readers:
+                return
+            try:
+                fd = reader.fileno()
+                self.__loop.add_reader(fd, self.__do_read, reader)
+            except (IOError, OSError, ValueError) as e:
+                _v_silent(e) # Ignoring for now
+            else:
+                self.__readers[reader] = fd
+                self.__read_fds[fd] = reader
+        else:
+            self.__threadsafe(self.add_reader, reader, True)
+
+    def add_writer(self, writer, internal=False):
+        """See :meth:`versile.reactor.IVDescriptorReactor.add_writer`\ ."""
+        if self.__finished:
+            raise VReactorStopped('Reactor was stopped.')
+        elif internal or self.__is_reactor_thread():
+            if writer in self.__writers:
+                return
+            try:
+                fd = writer.fileno()
+                self.__loop.add_writer(fd, self.__do_write, writer)
+            except (IOError, OSError, ValueError) as e:
+                _v_silent(e) # Ignoring for now
+            else:
+                self.__writers[writer] = fd
+                self.__write_fds[fd] = writer
+        else:
+            self.__threadsafe(self.add_writer, writer, True)
+
+    def remove_reader(self, reader, internal=False):
+        """See :meth:`versile.reactor.IVDescriptorReactor.remove_reader`\ ."""
+        if internal or self.__is_reactor_thread():
+            fd = self.__readers.pop(reader, None)
+            if fd is not None:
+                self.__remove_fd(reader, fd, self.__read_fds,
+                                 self.__loop.remove_reader)
+        else:
+            self.__threadsafe(self.remove_reader, reader, True)
+
+    def remove_writer(self, writer, internal=False):
+        """See :meth:`versile.reactor.IVDescriptorReactor.remove_writer`\ ."""
+        if internal or self.__is_reactor_thread():
+            fd = self.__writers.pop(writer, None)
+            if fd is not None:
+                self.__remove_fd(writer, fd, self.__write_fds,
+                                 self.__loop.remove_writer)
+        else:
+            self.__threadsafe(self.remove_writer, writer, True)
+
+    def remove_all(self):
+        """See :meth:`versile.reactor.IVDescriptorReactor.remove_all`\ .
+
+        Should only be called by the reactor thread.
+
+        """
+        for r in self.readers:
+            self.remove_reader(r)
+        for w in self.writers:
+            self.remove_writer(w)
+
+    @property
+    def readers(self):
+        """See :attr:`versile.reactor.IVDescriptorReactor.readers`\ .
+
+        Should only be called by the reactor thread.
+
+        """
+        return set(self.__readers)
+
+    @property
+    def writers(self):
+        """See :attr:`versile.reactor.IVDescriptorReactor.writers`\ .
+
+        Should only be called by the reactor thread.
+
+        """
+        return set(self.__writers)
+
+    @property
+    def log(self):
+        """See :attr:`versile.reactor.IVCoreReactor.log`\ ."""
+        return self.__logger
+
+    @property
+    def loop(self):
+        """The reactor's :mod:`asyncio` event loop."""
+        return self.__loop
+
+    def time(self):
+        """See :meth:`versile.reactor.IVTimeReactor.time`"""
+        return time.time()
+
+    def execute(self, callback, *args, **kargs):
+        """See :meth:`versile.reactor.IVTimeReactor.execute`\ ."""
+        if self.__is_reactor_thread():
+            return callback(*args, **kargs)
+        else:
+            return self.schedule(0.0, callback, *args, **kargs)
+
+    def schedule(self, delay_time, callback, *args, **kargs):
+        """See :meth:`versile.reactor.IVTimeReactor.schedule`"""
+        return VScheduledCall(self, delay_time, None, callback,
+                              True, *args, **kargs)
+
+    def call_soon(self, callback, *args, **kargs):
+        """See :meth:`versile.reactor.IVTimeReactor.call_soon`\ .
+
+        Calls are passed to the event loop with
+        :meth:`asyncio.AbstractEventLoop.call_soon`\ .
+
+        """
+        if self.__finished:
+            return
+        if self.__is_reactor_thread():
+            self.__call_soon(callback, args, kargs)
+        else:
+            self.__threadsafe(self.__call_soon, callback, args, kargs)
+
+    def cg_schedule(self, delay_time, callgroup, callback, *args, **kargs):
+        """See :meth:`versile.reactor.IVTimeReactor.cg_schedule`"""
+        return VScheduledCall(self, delay_time, callgroup, callback,
+                              True, *args, **kargs)
+
+    def call_when_running(self, callback, *args, **kargs):
+        """See :meth:`versile.reactor.IVCoreReactor.call_when_running`"""
+        return self.schedule(0.0, callback, *args, **kargs)
+
+    def add_call(self, call, internal=False):
+        """See :meth:`versile.reactor.IVTimeReactor.add_call`\ ."""
+        if not call.active or self.__finished:
+            return
+        if internal or self.__is_reactor_thread():
+            key = id(call)
+            entry = self.__calls.pop(key, None)
+            if entry:
+                entry[1].cancel()
+            delay = max(call.scheduled_time - time.time(), 0.0)
+            handle = self.__loop.call_later(delay, self.__execute_call, call)
+            self.__calls[key] = (call, handle)
+
+            callgroup = call.callgroup
+            if callgroup:
+                group = self.__grouped_calls.get(callgroup, None)
+                if not group:
+                    group = set()
+                    self.__grouped_calls[callgroup] = group
+                group.add(key)
+        else:
+            self.__threadsafe(self.add_call, call, True)
+
+    def remove_call(self, call, internal=False):
+        """See :meth:`versile.reactor.IVTimeReactor.remove_call`\ ."""
+        if internal or self.__is_reactor_thread():
+            self.__remove_call(call)
+        else:
+            self.__threadsafe(self.remove_call, call, True)
+
+    def cg_remove_calls(self, callgroup):
+        """See :meth:`versile.reactor.IVTimeReactor.cg_remove_calls`\ ."""
+        if self.__is_reactor_thread():
+            group = self.__grouped_calls.get(callgroup, None)
+            if group:
+                for key in copy.copy(group):
+                    entry = self.__calls.get(key, None)
+                    if entry:
+                        self.__remove_call(entry[0])
+        else:
+            self.__threadsafe(self.cg_remove_calls, callgroup)
+
+    def __do_read(self, reader):
+        if reader in self.__readers:
+            try:
+                reader.do_read()
+            except:
+                # Should never happen if compliant do_read
+                self.__rlog.log_trace(lvl=self.log.ERROR)
+                self.__rlog.info('do_read() exception, aborting')
+                self.remove_reader(reader, internal=True)
+                reader.close_input(VFIOLost())
+
+    def __do_write(self, writer):
+        if writer in self.__writers:
+            try:
+                writer.do_write()
+            except:
+                # Should never happen if compliant do_write
+                self.__rlog.log_trace(lvl=self.log.ERROR)
+                self.__rlog.info('do_write() exception, aborting')
+                self.remove_writer(writer, internal=True)
+                writer.close_output(VFIOLost())
+
+    def __execute_call(self, call):
+        self.__calls.pop(id(call), None)
+        self.__discard_grouped(call)
+        try:
+            call.execute()
+        except Exception as e:
+            self.__rlog.error('Scheduled call failed')
+            self.__rlog.log_trace(lvl=self.log.ERROR)
+
+    def __call_soon(self, callback, args, kargs):
+        if self.__finished:
+            return
+        if args or kargs:
+            key = None
+        else:
+            key = _soon_key(callback)
+            if key in self.__soon_keys:
+                return
+            self.__soon_keys.add(key)
+        self.__loop.call_soon(self.__execute_soon, key, callback, args, kargs)
+
+    def __execute_soon(self, key, callback, args, kargs):
+        if key is not None:
+            self.__soon_keys.discard(key)
+        if self.__finished:
+            return
+        try:
+            callback(*args, **kargs)
+        except Exception as e:
+            self.__rlog.error('Queued call failed')
+            self.__rlog.log_trace(lvl=self.log.ERROR)
+
+    def __remove_call(self, call):
+        entry = self.__calls.pop(id(call), None)
+        if entry:
+            entry[1].cancel()
+            self.__discard_grouped(call)
+
+    def __discard_grouped(self, call):
+        callgroup = call.callgroup
+        if callgroup:
+            group = self.__grouped_calls.get(callgroup, None)
+            if group:
+                group.discard(id(call))
+                if not group:
+                    self.__grouped_calls.pop(callgroup)
+
+    def __remove_fd(self, obj, fd, fds, loop_remove):
+        # Descriptor numbers may be reused after a descriptor is
+        # closed, so only unregister if the number still maps to obj
+        if fds.get(fd, None) is not obj:
+            return
+        fds.pop(fd)
+        try:
+            loop_remove(fd)
+        except Exception as e:
+            _v_silent(e)
+
+    def __attach(self):
+        self.__thread = threading.current_thread()
+        self.started()
+
+    def __stop(self):
+        if self.__finished:
+            return
+        if self.__attached:
+            self.__finish()
+        else:
+            self.__loop.stop()
+
+    def __finish(self):
+        self.__finished = True
+        self.__thread = None
+        for fd in list(self.__read_fds):
+            try:
+                self.__loop.remove_reader(fd)
+            except Exception as e:
+                _v_silent(e)
+        for fd in list(self.__write_fds):
+            try:
+                self.__loop.remove_writer(fd)
+            except Exception as e:
+                _v_silent(e)
+        for call, handle in self.__calls.values():
+            handle.cancel()
+        self.__readers.clear()
+        self.__writers.clear()
+        self.__read_fds.clear()
+        self.__write_fds.clear()
+        self.__calls.clear()
+        self.__grouped_calls.clear()
+        self.__soon_keys.clear()
+
+    def __threadsafe(self, callback, *args):
+        """Passes a call to the event loop from another thread."""
+        try:
+            self.__loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError as e:
+            # Loop was closed
+            _v_silent(e)
+
+    def __is_reactor_thread(self):
+        """Checks if running thread is the reactor thread.
+
+        :returns: True if same, or if reactor not running
+
+        """
+        return self.__thread in (None, threading.current_thread())
+
+    def __is_loop_thread(self):
+        try:
+            return asyncio.get_running_loop() is self.__loop
+        except (AttributeError, RuntimeError):
+            return False
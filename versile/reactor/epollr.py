@@ -25,7 +25,9 @@ from __future__ import print_function, unicode_literals
 
 from select import epoll # Raises ImportError if no select.poll
 import errno
+import itertools
 import select
+import weakref
 
 from collections import deque
 
@@ -39,6 +41,7 @@ _POLLIN  = select.EPOLLIN
 _POLLOUT = select.EPOLLOUT
 _POLLERR = select.EPOLLERR
 _POLLHUP = select.EPOLLHUP
+_POLLET  = select.EPOLLET
 
 
 class VEpollReactor(VFDWaitReactor):
@@ -51,10 +54,41 @@ class VEpollReactor(VFDWaitReactor):
 
     Only available on systems that support :func:`select.epoll`\ .
 
+    :param daemon:         if True run reactor thread as a daemonic thread
+    :type  daemon:         bool
+    :param edge_triggered: if True enable edge-triggered mode
+    :type  edge_triggered: bool
+    :param max_events:     max events per poll (if -1 no limit)
+    :type  max_events:     int
+
+    By default descriptors are monitored with level-triggered
+    notification, and descriptors are modified on the epoll object
+    whenever reading or writing is started or stopped.
+
+    If *edge_triggered* is set, then descriptors of readers and
+    writers which support edge-triggered I/O are registered once for
+    both input and output with edge-triggered notification, and
+    starting or stopping reading or writing does not modify the epoll
+    object. Instead the reactor tracks which descriptors are ready
+    and dispatches directly to the handlers' do_read() and do_write()
+    methods, which are looked up once when the handler is registered.
+
+    A handler supports edge-triggered I/O if it has an attribute
+    '_fd_edge_io' which is True. Its do_read() and do_write() methods
+    must return True if they may be able to read or write more data
+    without blocking, and otherwise either read or write until the
+    operation would block, or stop reading or writing. When reading
+    or writing is started, the reactor assumes the handler is ready
+    and calls the handler. Other handlers are monitored with
+    level-triggered notification.
+
+    *max_events* limits the number of events which are returned by
+    one call to :meth:`select.epoll.poll`\ . Events which are not
+    returned are returned by later calls.
+
     """
-    # The reactor uses level-based epoll triggering
 
-    def __init__(self, daemon=False):
+    def __init__(self, daemon=False, edge_triggered=False, max_events=-1):
         super(VEpollReactor, self).__init__(daemon=daemon)
         self.__poll = epoll()
         self.__rfd = set()
@@ -62,21 +96,51 @@ class VEpollReactor(VFDWaitReactor):
         self.__robj = dict() # fd -> obj
         self.__wobj = dict() # fd -> obj
 
+        self.__edge_triggered = edge_triggered
+        self.__max_events = max_events
+        self.__efd = set()    # edge-triggered registered fds
+        self.__eobj = dict()  # fd -> weakref to obj if edge-triggered
+        self.__rcall = dict() # fd -> (obj, obj.do_read, fd) if edge-triggered
+        self.__wcall = dict() # fd -> (obj, obj.do_write, fd) if edge-triggered
+        self.__r_ready = set()
+        self.__w_ready = set()
+
     def _fd_wait(self, timeout):
-        if timeout is None:
+        if self.__r_ready or self.__w_ready:
+            timeout = 0
+        elif timeout is None:
             timeout = -1
 
         y_events = deque()
         try:
-            p_events = self.__poll.poll(timeout)
+            p_events = self.__poll.poll(timeout, self.__max_events)
         except IOError as e:
             # Return if interrupted by signal handler, not catching can
             # interfere e.g. with interactive use in a python interpreter
             if e.errno == errno.EINTR:
-                return deque()
+                p_events = ()
+            else:
+                raise e
         except Exception as e:
             raise e
+        _efd = self.__efd
         for fd, event in p_events:
+            if fd in _efd:
+                if event & _POLLERR:
+                    # Ignored if fd is registered but not monitored
+                    f_obj = self.__robj.get(fd, None)
+                    if f_obj is None:
+                        f_obj = self.__wobj.get(fd, None)
+                    if f_obj is not None:
+                        y_events.append((self._FD_WRITE_ERROR, f_obj))
+                    continue
+                # Hangup is passed as readiness so handlers detect it
+                if event & (_POLLIN | _POLLHUP) and fd in self.__rfd:
+                    self.__r_ready.add(fd)
+                if event & (_POLLOUT | _POLLHUP) and fd in self.__wfd:
+                    self.__w_ready.add(fd)
+                continue
+
             _rd_event = event & _POLLIN
             _wr_event = event & _POLLOUT
             _err_event = event & _POLLERR
@@ -103,8 +167,87 @@ class VEpollReactor(VFDWaitReactor):
                     if obj is None:
                         obj = fd
                     y_events.append((self._FD_WRITE, f_obj))
+
+        if self.__r_ready or self.__w_ready:
+            reads, self.__r_ready = self.__r_ready, set()
+            writes, self.__w_ready = self.__w_ready, set()
+            return itertools.chain(y_events,
+                                   self.__edge_events(reads, writes))
         return y_events
 
+    def _fd_ready(self, event, entry):
+        fd = entry[2]
+        if event == self._FD_READ_CALL:
+            if self.__rcall.get(fd, None) is entry:
+                self.__r_ready.add(fd)
+        elif self.__wcall.get(fd, None) is entry:
+            self.__w_ready.add(fd)
+
+    @property
+    def edge_triggered(self):
+        """True if the reactor uses edge-triggered mode (bool)."""
+        return self.__edge_triggered
+
+    @property
+    def max_events(self):
+        """Max events per poll, or -1 if no limit (int)."""
+        return self.__max_events
+
+    def __edge_events(self, reads, writes):
+        # Handlers are looked up when dispatched, as an earlier
+        # handler may have removed a reader or writer
+        _FD_WRITE_CALL, _wcall = self._FD_WRITE_CALL, self.__wcall
+        for fd in writes:
+            entry = _wcall.get(fd, None)
+            if entry is not None:
+                yield (_FD_WRITE_CALL, entry)
+        _FD_READ_CALL, _rcall = self._FD_READ_CALL, self.__rcall
+        for fd in reads:
+            entry = _rcall.get(fd, None)
+            if entry is not None:
+                yield (_FD_READ_CALL, entry)
+
+    def __edge_add(self, fd, f_obj):
+        """Returns True if fd is handled in edge-triggered mode.
+
+        Registers the descriptor if not already registered.
+        Edge-triggered descriptors remain registered after reading
+        and writing was stopped, until the descriptor is reused by
+        another object.
+
+        """
+        if fd in self.__efd:
+            if self.__eobj[fd]() is f_obj:
+                return True
+            # Registration of a descriptor which was closed
+            self.__edge_discard(fd)
+        if (not self.__edge_triggered or f_obj is None
+            or not getattr(f_obj, '_fd_edge_io', False)
+            or fd in self.__rfd or fd in self.__wfd):
+            return False
+        mask = _POLLIN | _POLLOUT | _POLLERR | _POLLET
+        try:
+            try:
+                self.__poll.register(fd, mask)
+            except IOError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+                self.__poll.modify(fd, mask)
+        except Exception as e:
+            raise IOError('Failed to update poll object')
+        self.__efd.add(fd)
+        self.__eobj[fd] = weakref.ref(f_obj)
+        return True
+
+    def __edge_discard(self, fd):
+        """Unregisters an edge-triggered descriptor."""
+        self.__efd.discard(fd)
+        self.__eobj.pop(fd, None)
+        try:
+            self.__poll.unregister(fd)
+        except IOError as e:
+            _v_silent(e)
+
     def _add_read_fd(self, fd):
         if not isinstance(fd, int):
             fd, f_obj = fd.fileno(), fd
@@ -115,6 +258,13 @@ class VEpollReactor(VFDWaitReactor):
         if fd in self.__rfd:
             return
 
+        if self.__edge_add(fd, f_obj):
+            self.__rfd.add(fd)
+            self.__robj[fd] = f_obj
+            self.__rcall[fd] = (f_obj, f_obj.do_read, fd)
+            self.__r_ready.add(fd)
+            return
+
         if fd in self.__wfd:
             registered = True
             mask = _POLLIN | _POLLOUT | _POLLERR
@@ -143,6 +293,13 @@ class VEpollReactor(VFDWaitReactor):
         if fd in self.__wfd:
             return
 
+        if self.__edge_add(fd, f_obj):
+            self.__wfd.add(fd)
+            self.__wobj[fd] = f_obj
+            self.__wcall[fd] = (f_obj, f_obj.do_write, fd)
+            self.__w_ready.add(fd)
+            return
+
         if fd in self.__rfd:
             registered = True
             mask = _POLLIN | _POLLOUT | _POLLERR
@@ -179,6 +336,13 @@ class VEpollReactor(VFDWaitReactor):
         if fd not in self.__rfd:
             return
 
+        if fd in self.__efd:
+            self.__rfd.discard(fd)
+            self.__robj.pop(fd, None)
+            self.__rcall.pop(fd, None)
+            self.__r_ready.discard(fd)
+            return
+
         try:
             if fd in self.__wfd:
                 self.__poll.modify(fd, _POLLOUT | _POLLERR)
@@ -212,6 +376,13 @@ class VEpollReactor(VFDWaitReactor):
         if fd not in self.__wfd:
             return
 
+        if fd in self.__efd:
+            self.__wfd.discard(fd)
+            self.__wobj.pop(fd, None)
+            self.__wcall.pop(fd, None)
+            self.__w_ready.discard(fd)
+            return
+
         try:
             if fd in self.__rfd:
                 self.__poll.modify(fd, _POLLIN | _POLLERR)
@@ -233,6 +404,12 @@ class VEpollReactor(VFDWaitReactor):
         self.__wfd.clear()
         self.__robj.clear()
         self.__wobj.clear()
+        self.__efd.clear()
+        self.__eobj.clear()
+        self.__rcall.clear()
+        self.__wcall.clear()
+        self.__r_ready.clear()
+        self.__w_ready.clear()
 
     def __purge_old_fd_obj(self, fd_obj):
         for f, o in self.__robj.items():
@@ -253,6 +430,18 @@ class VEpollReactor(VFDWaitReactor):
         if old_rd_fd is None and old_wr_fd is None:
             return
 
+        # Descriptors may have been edge-triggered
+        for old_fd in old_rd_fd, old_wr_fd:
+            if old_fd is not None:
+                self.__efd.discard(old_fd)
+                self.__eobj.pop(old_fd, None)
+        if old_rd_fd is not None:
+            self.__rcall.pop(old_rd_fd, None)
+            self.__r_ready.discard(old_rd_fd)
+        if old_wr_fd is not None:
+            self.__wcall.pop(old_wr_fd, None)
+            self.__w_ready.discard(old_wr_fd)
+
         # Unregister file descriptor from poll object
         if old_rd_fd is not None:
             self.__rfd.discard(old_rd_fd)
@@ -20,6 +20,7 @@
 from __future__ import print_function, unicode_literals
 
 import collections
+import os
 from threading import Lock
 import weakref
 
@@ -44,6 +45,18 @@ __all__ = ['IVByteConsumer', 'IVByteHandle', 'IVByteHandleIO',
            'VNoHalfClose', 'VIOTimeout', 'VByteIOPair']
 __all__ = _vexport(__all__)
 
+# Max number of chunks passed to one gather write
+try:
+    _IOV_MAX = os.sysconf(str('SC_IOV_MAX'))
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+if _IOV_MAX <= 0:
+    _IOV_MAX = 16
+
+# Max bytes of received data which consumers copy when buffering it,
+# so a small remainder does not keep a receive pool block referenced
+_COMPACT_MAX = 0x1000
+
 
 class IVByteHandle(VInterface):
     """Base interface for byte I/O which can be driven by a reactor."""
@@ -989,7 +1002,7 @@ class VByteProducer(object):
         if self.__bp_consumer:
             max_prod = self.__lim(self.__bp_produced, self.__bp_produce_lim)
             if max_prod or (self.__bp_eod and not self.__bp_sent_eod):
-                self.reactor.schedule(0.0, self.__bp_produce)
+                self.reactor.call_soon(self.__bp_produce)
 
     def _consumer_attached(self):
         """Called after a consumer was attached.
@@ -1036,12 +1049,12 @@ class VByteProducer(object):
             if (not self.__bp_produce_lim is None
                 and not self.__bp_produce_lim < 0):
                 self.__bp_produce_lim = limit
-                self.reactor.schedule(0.0, self.__bp_produce)
+                self.reactor.call_soon(self.__bp_produce)
         else:
             if (self.__bp_produce_lim is not None
                 and 0 <= self.__bp_produce_lim < limit):
                 self.__bp_produce_lim = limit
-                self.reactor.schedule(0.0, self.__bp_produce)
+                self.reactor.call_soon(self.__bp_produce)
 
     def _bp_abort(self):
         if not self.__bp_aborted:
@@ -1204,7 +1217,7 @@ class VByteWriter(VByteProducer):
             self.__write_buffer.append(data)
             if not self.__write_triggered:
                 self.__write_triggered = True
-                self.reactor.schedule(0.0, self.__trigger_write)
+                self.reactor.call_soon(self.__trigger_write)
         finally:
             self.__writer_lock.release()
 
@@ -1223,7 +1236,7 @@ class VByteWriter(VByteProducer):
                 self.__write_eod_clean = clean
             if not self.__write_triggered:
                 self.__write_triggered = True
-                self.reactor.schedule(0.0, self.__trigger_write)
+                self.reactor.call_soon(self.__trigger_write)
         finally:
             self.__writer_lock.release()
 
@@ -1235,7 +1248,7 @@ class VByteWriter(VByteProducer):
         reactor thread.
 
         """
-        self.reactor.schedule(0.0, self._bp_abort)
+        self.reactor.call_soon(self._bp_abort)
 
     @final
     def _produce(self, max_len):
@@ -1248,8 +1261,8 @@ class VByteWriter(VByteProducer):
         try:
             data = self.__write_buffer.pop(max_len)
             if self.__write_eod and not self.__write_buffer:
-                self.reactor.schedule(0.0, self._end_produce,
-                                      self.__write_eod_clean)
+                self.reactor.call_soon(self._end_produce,
+                                       self.__write_eod_clean)
             return data
         finally:
             self.__writer_lock.release()
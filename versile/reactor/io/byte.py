@@ -35,6 +35,7 @@ from versile.reactor.io import IVConsumer, IVByteConsumer
 from versile.reactor.io import IVProducer, IVByteProducer
 from versile.reactor.io import VIOControl, VIOClosed, VIOError
 from versile.reactor.io import VIOMissingControl, VIOTimeout
+from versile.reactor.io import _COMPACT_MAX
 
 __all__ = ['VByteChannel']
 __all__ = _vexport(__all__)
@@ -119,7 +120,7 @@ class VByteChannel(object):
                     # Trigger updating can_produce in reactor thread
                     if not self.__bc_scheduled_lim_update:
                         self.__bc_scheduled_lim_update = True
-                        self.reactor.schedule(0.0, self.__bc_lim_update)
+                        self.reactor.call_soon(self.__bc_lim_update)
 
                     return result
                 elif self.__bc_aborted:
@@ -173,7 +174,7 @@ class VByteChannel(object):
                     # Trigger reactor production
                     if not self.__bp_scheduled_produce:
                         self.__bp_scheduled_produce = True
-                        self.reactor.schedule(0.0, self.__bp_do_produce)
+                        self.reactor.call_soon(self.__bp_do_produce)
 
                     return len(write_data)
 
@@ -257,6 +258,7 @@ class VByteChannel(object):
             buf_len = len(self.__bc_rbuf)
             self.__bc_rbuf.append_list(data.pop_list(max_cons))
             self.__bc_consumed += len(self.__bc_rbuf) - buf_len
+            self.__bc_rbuf.compact(_COMPACT_MAX)
 
             # Update consume limit
             max_add = self.__lim(len(self.__bc_rbuf), self.__bc_rbuf_len)
@@ -336,14 +338,14 @@ class VByteChannel(object):
                 self.__bp_produce_lim = limit
                 if not self.__bp_scheduled_produce:
                     self.__bp_scheduled_produce = True
-                    self.reactor.schedule(0.0, self.__bp_do_produce)
+                    self.reactor.call_soon(self.__bp_do_produce)
         else:
             if (self.__bp_produce_lim is not None
                 and 0 <= self.__bp_produce_lim < limit):
                 self.__bp_produce_lim = limit
                 if not self.__bp_scheduled_produce:
                     self.__bp_scheduled_produce = True
-                    self.reactor.schedule(0.0, self.__bp_do_produce)
+                    self.reactor.call_soon(self.__bp_do_produce)
 
     def _bp_abort(self):
         if not self.__bp_aborted:
@@ -472,7 +474,7 @@ class VByteChannel(object):
             if self.__bp_wbuf and self.__bp_produce_lim != old_lim:
                 if not self.__bp_scheduled_produce:
                     self.__bp_scheduled_produce = True
-                    self.reactor.schedule(0.0, self.__bp_do_produce)
+                    self.reactor.call_soon(self.__bp_do_produce)
 
     @classmethod
     def __lim(self, base, *lims):
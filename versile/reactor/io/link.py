@@ -627,6 +627,34 @@ class VLinkAgent(VLink, VEntityWAgent):
         finally:
             self.__send_msg_lock.release()
 
+    def _send_call_msgs(self, messages):
+        """Dispatch a set of call messages to the link peer.
+
+        See :meth:`versile.orb.link.VLink._send_call_msgs`\ .
+
+        """
+        calls = []
+        send_data = []
+        self.__send_msg_lock.acquire()
+        try:
+            for msg_code, payload, checks, noreturn in messages:
+                msg_id = self._msg_id_provider.get_id()
+                if noreturn:
+                    calls.append(None)
+                else:
+                    calls.append(self._create_ref_call(msg_id, checks=checks))
+                send_data.append(VTuple(VInteger(msg_id), VInteger(msg_code),
+                                        payload))
+            try:
+                self.write(send_data)
+            except Exception as e:
+                raise VLinkError('Could not send messages')
+            if self._keep_alive_send:
+                self._keep_alive_s_t = time.time()
+            return calls
+        finally:
+            self.__send_msg_lock.release()
+
     def _data_received(self, data):
         if not self._active:
             # Link no longer active - handle silently by performing
@@ -667,6 +695,10 @@ class VLinkAgent(VLink, VEntityWAgent):
         if self._active and not self._closing:
             self.reactor.schedule(delay/1000., self._handle_keep_alive_recv)
 
+    def _schedule_deref_send(self, delay):
+        if self._active:
+            self.reactor.schedule(delay/1000., self._handle_deref_send)
+
 
 class VLinkAgentConfig(VLinkConfig):
     """Configuration settings for a :class:`VLinkAgent`\ .
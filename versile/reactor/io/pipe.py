@@ -21,23 +21,25 @@ from __future__ import print_function, unicode_literals
 
 import errno
 import fcntl
+import io
 import os
 import sys
 import weakref
 
 from versile.internal import _b2s, _s2b, _vplatform, _vexport, _v_silent
-from versile.internal import _pyver
+from versile.internal import _pyver, _vmemoryview
 from versile.common.iface import implements, abstract, final, peer
 from versile.common.log import VLogger
 from versile.common.peer import VPipePeer
-from versile.common.util import VByteBuffer
+from versile.common.util import VByteBlockPool, VByteBuffer, _join_bytes
 from versile.reactor import IVReactorObject
-from versile.reactor.io import VIOClosed
+from versile.reactor.io import VByteIOPair, VIOClosed
 from versile.reactor.io import VIOCompleted, VIOLost, VIOError, VIOException
 from versile.reactor.io import VFIOCompleted, VFIOLost, IVByteIO
 from versile.reactor.io import IVSelectable, IVSelectableIO, IVByteInput
 from versile.reactor.io import IVByteProducer, IVByteConsumer
 from versile.reactor.io import VHalfClose, VNoHalfClose
+from versile.reactor.io import _COMPACT_MAX, _IOV_MAX
 from versile.reactor.io import VIOControl, VIOMissingControl
 from versile.reactor.io.descriptor import IVDescriptor
 
@@ -163,11 +165,17 @@ class VPipeReader(VPipeBase):
 
     """
 
+    _pipe_readinto = _vmemoryview
+    """If True :meth:`read_views` reads into pooled blocks."""
+
     def __init__(self, reactor, fd, hc_pol=None, close_cback=None):
         s_init = super(VPipeReader, self).__init__
         s_init(reactor=reactor, fd=fd, hc_pol=hc_pol, close_cback=close_cback)
         self._in_closed = False
         self._in_closed_reason = None
+        self._pipe_block_pool = None # Lazy-set pool for read_views()
+        self._pipe_file = None       # Lazy-set file object for read_views()
+        self._pipe_read_exc = None   # Exception for next read_views()
 
     def set_pipe_peer(self, peer):
         if peer is not None and not isinstance(peer, VPipeWriter):
@@ -184,6 +192,7 @@ class VPipeReader(VPipeBase):
                 _v_silent(e)
             finally:
                 self._fd = -1
+                self._pipe_file = None
                 self._in_closed = True
                 self._in_closed_reason = reason
             self._input_was_closed(reason)
@@ -217,23 +226,85 @@ class VPipeReader(VPipeBase):
 
     def read_some(self, max_len):
         """See :meth:`versile.reactor.io.IVByteInput.read_some`"""
+        data = self.__read(os.read, self._fd, max_len)
+        if data is None:
+            return b''
+        elif _pyver == 2:
+            return _s2b(data)
+        return data
+
+    def read_views(self, max_len):
+        """Perform non-blocking read into pooled receive blocks.
+
+        :param max_len: max bytes to read
+        :type  max_len: int
+        :returns:       data read
+        :rtype:         list<:class:`memoryview`\ >
+        :raises:        :exc:`versile.reactor.io.VIOException`
+
+        Similar to :meth:`read_some`\ , except data is read with
+        :meth:`io.FileIO.readinto` into blocks of the reactor's
+        :class:`versile.common.util.VByteBlockPool`\ , see
+        :meth:`versile.reactor.io.sock.VSocket.read_views`\ .
+
+        If :attr:`_pipe_readinto` is not set then data is read with
+        :meth:`read_some`\ , and is returned as a list of bytes.
+
+        """
+        if self._pipe_read_exc is not None:
+            exc, self._pipe_read_exc = self._pipe_read_exc, None
+            raise exc
+        if not self._pipe_readinto:
+            data = self.read_some(max_len)
+            return [data] if data else []
+        pool = self._pipe_block_pool
+        if pool is None:
+            pool = VByteBlockPool.reactor_pool(self.reactor)
+            self._pipe_block_pool = pool
+        if self._pipe_file is None and self._fd >= 0:
+            self._pipe_file = io.FileIO(self._fd, 'r', closefd=False)
+        chunks = []
+        while max_len > 0:
+            view = pool.reserve(max_len)
+            try:
+                num_read = self.__read(self.__readinto, view)
+            except VIOException as e:
+                # Data already read is returned, and the exception is
+                # raised by the next read
+                if chunks:
+                    self._pipe_read_exc = e
+                    break
+                raise
+            if num_read is None:
+                break
+            chunks.append(pool.commit(num_read))
+            if num_read < len(view):
+                break
+            max_len -= num_read
+        return chunks
+
+    def __readinto(self, view):
+        # Returns None if no data could be read without blocking
+        return self._pipe_file.readinto(view)
+
+    def __read(self, read_func, *args):
+        # Reads from pipe with read_func, returning None if no data
+        # could be read without blocking
         if self._in_closed:
             if isinstance(self._in_closed_reason, VFIOCompleted):
                 raise VIOCompleted()
             else:
                 raise VIOLost()
         try:
-            data = os.read(self._fd, max_len)
-            if _pyver == 2:
-                data = _s2b(data)
-        except OSError as e:
+            data = read_func(*args)
+        except (IOError, OSError) as e:
             if e.errno in _errno_block:
-                return b''
+                return None
             else:
                 self.log.debug('Read got errno %s' % e.errno)
                 raise VIOError('Pipe read error')
         else:
-            if data:
+            if data is None or data:
                 return data
             else:
                 self.log.debug('Pipe read error')
@@ -269,6 +340,9 @@ class VPipeWriter(VPipeBase):
 
     """
 
+    _pipe_gather = hasattr(os, 'writev')
+    """If True use :func:`os.writev` for gather writes."""
+
     def __init__(self, reactor, fd, hc_pol=None, close_cback=None):
         s_init = super(VPipeWriter, self).__init__
         s_init(reactor=reactor, fd=fd, hc_pol=hc_pol, close_cback=close_cback)
@@ -323,15 +397,41 @@ class VPipeWriter(VPipeBase):
 
     def write_some(self, data):
         """See :meth:`versile.reactor.io.IVByteOutput.write_some`\ ."""
+        if _pyver == 2:
+            data = _b2s(data)
+        return self.__write(os.write, data)
+
+    def write_list(self, chunks):
+        """Perform non-blocking gather write of a list of chunks.
+
+        :param chunks: data to write
+        :type  chunks: list(bytes)
+        :returns:      number of bytes written
+        :raises:       :exc:`versile.reactor.io.VIOException`
+
+        Similar to :meth:`write_some`\ , except the data to write is
+        the concatenation of *chunks*\ , which may also be
+        :class:`memoryview` objects. If :attr:`_pipe_gather` is set
+        then the chunks are written without joining them with a
+        single :func:`os.writev` call, otherwise they are joined and
+        written with :meth:`write_some`\ .
+
+        """
+        if len(chunks) == 1:
+            return self.write_some(chunks[0])
+        elif not self._pipe_gather:
+            return self.write_some(_join_bytes(chunks))
+        return self.__write(os.writev, chunks[:_IOV_MAX])
+
+    def __write(self, write_func, data):
+        # Writes data to the pipe with os.write or os.writev
         if self._out_closed:
             if isinstance(self._out_closed_reason, VFIOCompleted):
                 raise VIOCompleted()
             else:
                 raise VIOLost()
         try:
-            if _pyver == 2:
-                data = _b2s(data)
-            num_written = os.write(self._fd, data)
+            num_written = write_func(self._fd, data)
         except OSError as e:
             if e.errno in _errno_block:
                 return 0
@@ -369,6 +469,9 @@ class VPipeWriter(VPipeBase):
 class _VAgentReader(VPipeReader):
     """Pipe reader for a :class:`VPipeAgent`\ ."""
 
+    # Supports edge-triggered I/O, see versile.reactor.epollr
+    _fd_edge_io = True
+
     def __init__(self, agent, reactor, fd, hc_pol=None, close_cback=None):
         s_init = super(_VAgentReader, self).__init__
         s_init(reactor=reactor, fd=fd, hc_pol=hc_pol, close_cback=close_cback)
@@ -377,7 +480,7 @@ class _VAgentReader(VPipeReader):
     def do_read(self):
         """See :meth:`versile.reactor.io.IVByteHandleInput.do_read`\ ."""
         if self.__agent:
-            self.__agent()._do_read()
+            return self.__agent()._do_read()
 
     def _input_was_closed(self, reason):
         try:
@@ -389,6 +492,9 @@ class _VAgentReader(VPipeReader):
 class _VAgentWriter(VPipeWriter):
     """Pipe writer for a :class:`VPipeAgent`\ ."""
 
+    # Supports edge-triggered I/O, see versile.reactor.epollr
+    _fd_edge_io = True
+
     def __init__(self, agent, reactor, fd, hc_pol=None, close_cback=None):
         s_init = super(_VAgentWriter, self).__init__
         s_init(reactor=reactor, fd=fd, hc_pol=hc_pol, close_cback=close_cback)
@@ -397,7 +503,7 @@ class _VAgentWriter(VPipeWriter):
     def do_write(self):
         """See :meth:`versile.reactor.io.IVByteHandleOutput.do_write`\ ."""
         if self.__agent:
-            self.__agent()._do_write()
+            return self.__agent()._do_write()
 
     def _output_was_closed(self, reason):
         try:
@@ -445,7 +551,7 @@ class VPipeAgent(object):
 
         self._max_read = max_read
         self._max_write = max_write
-        self._wbuf = VByteBuffer()
+        self._wbuf = VByteBuffer(views=True)
         if wbuf_len is None:
             wbuf_len = max_write
         self._wbuf_len = wbuf_len
@@ -525,9 +631,9 @@ class VPipeAgent(object):
             max_cons = min(max_cons, clim)
 
         was_empty = not self._wbuf
-        indata = buf.pop(max_cons)
-        self._wbuf.append(indata)
-        self._ci_consumed += len(indata)
+        old_len = len(self._wbuf)
+        self._wbuf.append_list(buf.pop_list(max_cons))
+        self._ci_consumed += len(self._wbuf) - old_len
         if was_empty:
             self._writer.start_writing(internal=True)
         return self._ci_lim_sent
@@ -591,9 +697,9 @@ class VPipeAgent(object):
 
     def _do_write(self):
         if self._wbuf:
-            data = self._wbuf.peek(self._max_write)
+            chunks = self._wbuf.peek_list(self._max_write)
             try:
-                num_written = self._writer.write_some(data)
+                num_written = self._writer.write_list(chunks)
             except VIOException:
                 self._c_abort()
             else:
@@ -607,6 +713,9 @@ class VPipeAgent(object):
                     self._writer.stop_writing()
                     if self._ci_eod:
                         self._c_abort()
+                elif num_written > 0:
+                    # Pipe may accept more data without blocking
+                    return True
         else:
             self._writer.stop_writing()
 
@@ -706,13 +815,20 @@ class VPipeAgent(object):
             self._reader.stop_reading()
             return
         try:
-            data = self._reader.read_some(max_read)
+            chunks = self._reader.read_views(max_read)
         except Exception as e:
             self._p_abort()
         else:
-            self._pi_buffer.append(data)
-            if self._pi_buffer:
-                self.pi_prod_lim = self._pi_consumer.consume(self._pi_buffer)
+            buf = self._pi_buffer
+            buf_len = len(buf)
+            buf.append_list(chunks)
+            num_read = len(buf) - buf_len
+            if buf:
+                self.pi_prod_lim = self._pi_consumer.consume(buf)
+                buf.compact(_COMPACT_MAX)
+            # After reading data, more data or end-of-input may be
+            # pending even if the read was short
+            return num_read > 0
 
     def _input_was_closed(self, reason):
         if self._pi_consumer:
@@ -21,11 +21,13 @@
 from __future__ import print_function, unicode_literals
 
 import datetime
+import multiprocessing
 import socket
 
 from versile.internal import _vexport
 from versile.common.iface import abstract
-from versile.common.util import VNamedTemporaryFile
+from versile.common.processor import VProcessor
+from versile.common.util import VNamedTemporaryFile, VNoResult
 from versile.crypto import VCrypto
 from versile.crypto.auth import VAuth
 from versile.crypto.rand import VUrandom
@@ -34,6 +36,7 @@ from versile.crypto.x509.cert import VX509Name
 from versile.crypto.x509.cert import VX509CertificationRequest
 from versile.orb.entity import VObject
 from versile.orb.service import VService, VServiceConfig
+from versile.orb.service import VServiceController, VServiceNode
 from versile.reactor.io import VIOCompleted, VFIOLost
 from versile.reactor.io.vec import VEntitySerializerConfig
 from versile.reactor.io.link import VLinkAgent, VLinkAgentConfig
@@ -46,8 +49,8 @@ from versile.reactor.io.vop import VOPServerBridge
 from versile.reactor.quick import VReactor
 
 __all__ = ['VReactorService', 'VLinkAgentFactory', 'VOPService',
-           'VReactorServiceConfig', 'VOPServiceConfig',
-           'VOPInsecureServiceConfig']
+           'VMultiProcessService', 'VReactorServiceConfig',
+           'VOPServiceConfig', 'VOPInsecureServiceConfig']
 __all__ = _vexport(__all__)
 
 
@@ -102,7 +105,7 @@ class VReactorService(VService):
             bound = listening = False
 
         if self._node:
-            cntled = True
+            cntled = self._node.controlled
             a_back = self._node.accepted
             c_back = self._node.closed
         else:
@@ -224,10 +227,10 @@ class VOPService(VReactorService):
 
     @classmethod
     def create_socket(cls, interface='', port=4433, bind=True, listen=10,
-                      reuse=True):
+                      reuse=True, reuse_port=False):
         s_func = VReactorService.create_socket
         return s_func(interface=interface, port=port, bind=bind, listen=listen,
-                      reuse=reuse)
+                      reuse=reuse, reuse_port=reuse_port)
 
     def _create_byte_agent_factory(self):
         Cls = _VOPByteAgentFactory
@@ -239,6 +242,197 @@ class VOPService(VReactorService):
                    buf_size=self._buf_size)
 
 
+class VMultiProcessService(object):
+    """Runs a listening service on a set of worker processes.
+
+    :param service_factory: factory for worker process services
+    :type  service_factory: callable
+    :param workers:         number of worker processes (or None)
+    :type  workers:         int
+    :param sock:            bound listening socket (or None)
+    :type  sock:            :class:`socket.socket`
+    :param iface:           interface to listen on
+    :type  iface:           unicode
+    :param port:            port to listen on
+    :type  port:            int
+    :param reuse_port:      if True workers listen on SO_REUSEPORT sockets
+    :type  reuse_port:      bool
+    :param controller:      controller for worker services (or None)
+    :type  controller:      :class:`versile.orb.service.VServiceController`
+    :param processor:       processor for controller links (or None)
+    :type  processor:       :class:`versile.common.processor.VProcessor`
+    :param reactor:         reactor for controller links (or None)
+
+    Each worker process runs its own service with its own reactor and
+    processor, which allows a service to scale across multiple CPU
+    cores. *service_factory* is called in each worker process as
+    service_factory(sock=sock, node=node) and should return a (not
+    started) :class:`versile.orb.service.VService` which listens on
+    *sock* and is registered with *node*\ , e.g.::
+
+        def factory(sock, node):
+            return VOPService(lambda: Echoer(), auth=None, key=keypair,
+                              sock=sock, node=node)
+        service = VMultiProcessService(factory, workers=4)
+        service.start()
+
+    *workers* defaults to the number of CPUs. Each worker service is
+    registered with a :class:`versile.orb.service.VServiceNode` which
+    is linked to *controller* in this process, and the controller
+    keeps track of the number of active clients of each worker, see
+    :attr:`clients`\ . If *controller* is None then a
+    :class:`versile.orb.service.VServiceController` is created.
+
+    By default, all workers listen on the same listening socket, and
+    the controller authorizes which worker accepts the next client
+    connection. If *sock* is None then a socket is created and bound
+    to *iface* and *port*\ .
+
+    If *reuse_port* is True then each worker binds its own listening
+    socket to *iface* and *port* with SO_REUSEPORT set, and the
+    operating system distributes connections between workers. Worker
+    nodes then report clients to the controller without the
+    controller authorizing connections, so any client limits set on
+    the controller are not enforced.
+
+    Workers are started with :mod:`multiprocessing` and rely on
+    passing open sockets to the new processes, so this class is only
+    available on Unix-based systems. Worker processes are started
+    before any threads are started for controller links, however
+    :meth:`start` should be called before the program starts other
+    threads.
+
+    """
+
+    def __init__(self, service_factory, workers=None, sock=None, iface='',
+                 port=4433, reuse_port=False, controller=None,
+                 processor=None, reactor=None):
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers < 1:
+            raise ValueError('Requires at least one worker')
+        if reuse_port:
+            if sock is not None:
+                raise ValueError('Cannot set socket when reusing port')
+            # Validate that the platform supports SO_REUSEPORT
+            VService.create_socket(bind=False, reuse_port=True).close()
+        if controller is None:
+            controller = VServiceController()
+        self._factory = service_factory
+        self._workers = workers
+        self._sock = sock
+        self._iface = iface
+        self._port = port
+        self._reuse_port = reuse_port
+        self._controller = controller
+        self._processor = processor
+        self._reactor = reactor
+        self._owns_processor = processor is None
+        self._owns_reactor = reactor is None
+
+        self._processes = []
+        self._links = []
+        self._nodes = []
+        self._started = False
+
+    def start(self):
+        """Starts the worker processes and their services.
+
+        This method should only be called once.
+
+        """
+        if self._started:
+            raise RuntimeError('Service already started')
+        self._started = True
+
+        sock = self._sock
+        if not self._reuse_port and sock is None:
+            sock = VService.create_socket(interface=self._iface,
+                                          port=self._port)
+
+        # Start all worker processes before any link threads are started
+        pairs = [VClientSocketAgent.create_native_pair()
+                 for i in xrange(self._workers)]
+        for s_sock, c_sock in pairs:
+            close_socks = [_s for _pair in pairs for _s in _pair
+                           if _s is not c_sock]
+            args = (self._factory, sock, c_sock, close_socks, self._iface,
+                    self._port)
+            process = multiprocessing.Process(target=_service_worker,
+                                              args=args)
+            process.daemon = True
+            process.start()
+            self._processes.append(process)
+        for s_sock, c_sock in pairs:
+            c_sock.close()
+        if sock is not None and self._sock is None:
+            sock.close()
+
+        if self._owns_processor:
+            self._processor = VProcessor(workers=5)
+        if self._owns_reactor:
+            self._reactor = VReactor()
+            self._reactor.start()
+        for s_sock, c_sock in pairs:
+            link = VLinkAgent.from_socket(sock=s_sock, gw=self._controller,
+                                          processor=self._processor,
+                                          reactor=self._reactor,
+                                          internal=True)
+            node = link.peer_gw()
+            self._links.append(link)
+            self._nodes.append(node)
+            self._controller.add_node(node)
+
+    def stop(self, stop_links=True, force=False, timeout=None):
+        """Stops worker services and waits for worker processes to end.
+
+        :param stop_links: if True then stop active links of workers
+        :type  stop_links: bool
+        :param force:      if True and stop_links is True, force shutdown
+        :type  force:      bool
+        :param timeout:    seconds to wait for each worker (or None)
+        :type  timeout:    float
+
+        Stops services of all nodes registered with the controller,
+        see :meth:`versile.orb.service.VServiceController.stop`\ .
+
+        """
+        self._controller.stop(stop_links=stop_links, force=force)
+        self.join(timeout)
+        for link in self._links:
+            link.shutdown()
+        if self._owns_processor and self._processor:
+            self._processor.stop()
+        if self._owns_reactor and self._reactor:
+            self._reactor.stop()
+
+    def join(self, timeout=None):
+        """Waits for worker processes to end.
+
+        :param timeout: seconds to wait for each worker (or None)
+        :type  timeout: float
+
+        """
+        for process in self._processes:
+            process.join(timeout)
+
+    @property
+    def controller(self):
+        """Controller for the worker services."""
+        return self._controller
+
+    @property
+    def processes(self):
+        """List of worker processes."""
+        return list(self._processes)
+
+    @property
+    def clients(self):
+        """List of the number of active clients of each worker."""
+        clients = self._controller.clients
+        return [clients.get(node, 0) for node in self._nodes]
+
+
 class VLinkAgentFactory(object):
     """Factory for creating link objects.
 
@@ -456,3 +650,29 @@ class _VOPByteAgentFactory(_ByteAgentFactory):
         vop = Cls(reactor=self._reactor, vec=vec_io, vts=vts_factory,
                   tls=tls_factory, insecure=allow_insecure)
         return vop.external_io
+
+
+def _service_worker(factory, sock, cntl_sock, close_socks, iface, port):
+    """Runs a service in a worker process of a VMultiProcessService."""
+    for _sock in close_socks:
+        _sock.close()
+    if sock is None:
+        sock = VService.create_socket(interface=iface, port=port,
+                                      reuse_port=True)
+        node = VServiceNode(controlled=False)
+    else:
+        node = VServiceNode()
+    service = factory(sock=sock, node=node)
+    link = VLinkAgent.from_socket(sock=cntl_sock, gw=node, internal=True)
+
+    # Run until the service is stopped or the controller link is lost
+    while True:
+        try:
+            service.wait(timeout=1.0, stopped=True)
+        except VNoResult:
+            if link.closed:
+                service.stop(stop_links=True)
+                break
+        else:
+            break
+    link.shutdown()
@@ -24,11 +24,12 @@ import sys
 import weakref
 
 from versile.internal import _b2s, _s2b, _vplatform, _vexport, _v_silent
-from versile.internal import _pyver
+from versile.internal import _pyver, _vmemoryview
 from versile.common.iface import implements, abstract, final, peer
 from versile.common.log import VLogger
 from versile.common.peer import VSocketPeer
-from versile.common.util import VByteBuffer
+from versile.common.util import VByteBlockPool, VUnlockedByteBuffer
+from versile.common.util import _join_bytes
 from versile.reactor import IVReactorObject
 from versile.reactor.io import VByteIOPair, VIOClosed
 from versile.reactor.io import VIOCompleted, VIOLost, VIOError, VIOException
@@ -36,6 +37,7 @@ from versile.reactor.io import VFIOCompleted, VFIOLost, IVByteIO
 from versile.reactor.io import IVSelectable, IVSelectableIO, IVByteInput
 from versile.reactor.io import IVByteProducer, IVByteConsumer
 from versile.reactor.io import VHalfClose, VNoHalfClose
+from versile.reactor.io import _COMPACT_MAX, _IOV_MAX
 from versile.reactor.io import VIOControl, VIOMissingControl
 from versile.reactor.io.descriptor import IVDescriptor
 
@@ -288,6 +290,22 @@ class VSocket(VSocketBase):
 
     """
 
+    _sock_gather = hasattr(socket.socket, 'sendmsg')
+    """If True use :meth:`socket.socket.sendmsg` for gather writes."""
+
+    _sock_recv_into = _vmemoryview
+    """If True :meth:`read_views` receives into pooled blocks."""
+
+    _fd_edge_io = False
+    """If True the socket supports edge-triggered I/O.
+
+    See :class:`versile.reactor.epollr.VEpollReactor`\ . If set then
+    :meth:`active_do_read` and :meth:`active_do_write` must return
+    True if they may be able to read or write more data without
+    blocking.
+
+    """
+
     def __init__(self, reactor, sock=None, hc_pol=None, close_cback=None):
         super_init = super(VSocket, self).__init__
         super_init(reactor=reactor, sock=sock, hc_pol=hc_pol,
@@ -301,6 +319,8 @@ class VSocket(VSocketBase):
         self._sock_verified  = False # True if data has been sent or received
         self._was_connected  = False # Has socket had a 'connected' status
         self._sock_peer = None       # Socket peer for connected client socket
+        self._sock_block_pool = None # Lazy-set pool for read_views()
+        self._sock_read_exc = None   # Exception for next read_views()
 
     def _set_sock_enabled(self):
         """Enables socket monitoring by reacttor.
@@ -424,7 +444,8 @@ class VSocket(VSocketBase):
         """Perform read operation when active.
 
         Similar to :meth:`do_read` and called by :meth:`do_read` when
-        socket status is 'active'.
+        socket status is 'active'. The return value is returned by
+        :meth:`do_read`\ , see :attr:`_fd_edge_io`\ .
 
         Abstract method, derived classes must override.
 
@@ -436,7 +457,8 @@ class VSocket(VSocketBase):
         """Perform write operation when active.
 
         Similar to :meth:`do_write` and called by :meth:`do_write`
-        when socket status is 'active'.
+        when socket status is 'active'. The return value is returned
+        by :meth:`do_write`\ , see :attr:`_fd_edge_io`\ .
 
         Abstract method, derived classes must override.
 
@@ -523,8 +545,9 @@ class VSocket(VSocketBase):
                         self._sock_activated()
                     else:
                         self.close_io(VFIOLost())
+                return True
             else:
-                self.active_do_read()
+                return self.active_do_read()
         except VIOCompleted as e:
             self.close_input(VFIOCompleted(e))
         except VIOLost as e:
@@ -532,6 +555,69 @@ class VSocket(VSocketBase):
 
     def read_some(self, max_len):
         """See :meth:`versile.reactor.io.IVByteInput.read_some`"""
+        data = self.__read('recv', max_len)
+        if data is None:
+            return b''
+        elif _pyver == 2:
+            return _s2b(data)
+        return data
+
+    def read_views(self, max_len):
+        """Perform non-blocking read into pooled receive blocks.
+
+        :param max_len: max bytes to read
+        :type  max_len: int
+        :returns:       data read
+        :rtype:         list<:class:`memoryview`\ >
+        :raises:        :exc:`versile.reactor.io.VIOException`
+
+        Similar to :meth:`read_some`\ , except data is received with
+        :meth:`socket.socket.recv_into` into blocks of the reactor's
+        :class:`versile.common.util.VByteBlockPool`\ , and is returned
+        as a list of :class:`memoryview` chunks of those blocks
+        without copying. Returns an empty list if no data could be
+        read without blocking.
+
+        If a read fails after some data was read, the data is returned
+        and the exception is raised by the next call.
+
+        If :attr:`_sock_recv_into` is not set then data is read with
+        :meth:`read_some`\ , and is returned as a list of bytes.
+
+        """
+        if self._sock_read_exc is not None:
+            exc, self._sock_read_exc = self._sock_read_exc, None
+            raise exc
+        if not self._sock_recv_into:
+            data = self.read_some(max_len)
+            return [data] if data else []
+        pool = self._sock_block_pool
+        if pool is None:
+            pool = VByteBlockPool.reactor_pool(self.reactor)
+            self._sock_block_pool = pool
+        chunks = []
+        while max_len > 0:
+            view = pool.reserve(max_len)
+            try:
+                num_read = self.__read('recv_into', view)
+            except VIOException as e:
+                # Data already read is returned, and the exception is
+                # raised by the next read
+                if chunks:
+                    self._sock_read_exc = e
+                    break
+                raise
+            if num_read is None:
+                break
+            chunks.append(pool.commit(num_read))
+            if num_read < len(view):
+                break
+            max_len -= num_read
+        return chunks
+
+    def __read(self, method, arg):
+        # Reads from socket with socket method 'method', returning
+        # None if no data could be read without blocking
         if not self.was_connected:
             raise VIOError('Socket was not connected')
         if self._sock_in_closed:
@@ -542,13 +628,10 @@ class VSocket(VSocketBase):
         if not self.sock:
             raise VIOError('No socket')
         try:
-            if _pyver == 2:
-                data = _s2b(self.sock.recv(max_len))
-            else:
-                data = self.sock.recv(max_len)
+            data = getattr(self.sock, method)(arg)
         except IOError as e:
             if e.errno in _errno_block:
-                return b''
+                return None
             elif (e.errno in (errno.EPIPE, errno.ENOTCONN)
                   and not self._sock_verified):
                     # ISSUE - these have been seen to be raised after
@@ -557,7 +640,7 @@ class VSocket(VSocketBase):
                     # 'resumed'. For now we log a message and resume.
                     self.log.debug('Ignoring post-connect read errno %s'
                                   % e.errno)
-                    return b''
+                    return None
             else:
                 self.log.debug('Read got errno %s' % e.errno)
                 raise VIOError('Socket read error, errno %s' % e.errno)
@@ -595,8 +678,9 @@ class VSocket(VSocketBase):
                         # ISSUE - current handling of this exc causes
                         # reactor to loop until getpeername resolves
                         self.log.debug('getpeername failed errno %s' % e.errno)
-                        return
+                        return True
                 self._set_sock_connected()
+                return True
             elif not self._sock_active:
                 if self._sock_do_activation_write():
                     if self._sock_conclude_activation():
@@ -604,8 +688,9 @@ class VSocket(VSocketBase):
                         self._sock_activated()
                     else:
                         self.close_io(VFIOLost())
+                return True
             else:
-                self.active_do_write()
+                return self.active_do_write()
         except VIOCompleted as e:
             self.close_input(VFIOCompleted(e))
         except VIOLost as e:
@@ -613,6 +698,34 @@ class VSocket(VSocketBase):
 
     def write_some(self, data):
         """See :meth:`versile.reactor.io.IVByteOutput.write_some`\ ."""
+        if _pyver == 2:
+            data = _b2s(data)
+        return self.__write('send', data)
+
+    def write_list(self, chunks):
+        """Perform non-blocking gather write of a list of chunks.
+
+        :param chunks: data to write
+        :type  chunks: list(bytes)
+        :returns:      number of bytes written
+        :raises:       :exc:`versile.reactor.io.VIOException`
+
+        Similar to :meth:`write_some`\ , except the data to write is
+        the concatenation of *chunks*\ , which may also be
+        :class:`memoryview` objects. If :attr:`_sock_gather` is set
+        then the chunks are passed to the socket without joining them
+        in a single :meth:`socket.socket.sendmsg` call, otherwise they
+        are joined and written with :meth:`write_some`\ .
+
+        """
+        if len(chunks) == 1:
+            return self.write_some(chunks[0])
+        elif not self._sock_gather:
+            return self.write_some(_join_bytes(chunks))
+        return self.__write('sendmsg', chunks[:_IOV_MAX])
+
+    def __write(self, method, data):
+        # Writes data to socket with socket method 'method'
         if not self.was_connected:
             raise VIOError('Socket not connected')
         if self._sock_out_closed:
@@ -623,10 +736,7 @@ class VSocket(VSocketBase):
         if not self.sock:
             raise VIOError('No socket')
         try:
-            if _pyver == 2:
-                num_written = self.sock.send(_b2s(data))
-            else:
-                num_written = self.sock.send(data)
+            num_written = getattr(self.sock, method)(data)
         except IOError as e:
             if e.errno in _errno_block:
                 return 0
@@ -854,6 +964,7 @@ class VListeningSocket(VSocket):
         """
         if not self._can_accept:
             self.stop_reading()
+            return
         try:
             sock, address = self.sock.accept()
         except Exception as e:
@@ -959,13 +1070,18 @@ class VClientSocketAgent(VClientSocket):
 
     If *wbuf_len* is None then *max_write* is used as the buffer size.
 
+    The socket supports edge-triggered I/O, see :attr:`_fd_edge_io`\ .
+
     """
+
+    _fd_edge_io = True
+
     def __init__(self, reactor, sock=None, hc_pol=None, close_cback=None,
                  connected=False, max_read=0x4000, max_write=0x4000,
                  wbuf_len=None):
         self._max_read = max_read
         self._max_write = max_write
-        self._wbuf = VByteBuffer()
+        self._wbuf = VUnlockedByteBuffer(views=True)
         if wbuf_len is None:
             wbuf_len = max_write
         self._wbuf_len = wbuf_len
@@ -983,7 +1099,7 @@ class VClientSocketAgent(VClientSocket):
         self._pi_consumer = None
         self._pi_produced = 0
         self._pi_prod_lim = 0
-        self._pi_buffer = VByteBuffer()
+        self._pi_buffer = VUnlockedByteBuffer()
         self._pi_aborted = False
 
         # Parent __init__ must be called after local attributes are
@@ -1080,9 +1196,9 @@ class VClientSocketAgent(VClientSocket):
             max_cons = min(max_cons, clim)
 
         was_empty = not self._wbuf
-        indata = buf.pop(max_cons)
-        self._wbuf.append(indata)
-        self._ci_consumed += len(indata)
+        old_len = len(self._wbuf)
+        self._wbuf.append_list(buf.pop_list(max_cons))
+        self._ci_consumed += len(self._wbuf) - old_len
         if was_empty:
             self.start_writing(internal=True)
         return self._ci_lim_sent
@@ -1124,7 +1240,7 @@ class VClientSocketAgent(VClientSocket):
 
         self._ci_producer = producer
         if self._sock_out_closed:
-            self.reactor.schedule(0.0, self._c_abort, True)
+            self.reactor.call_soon(self._c_abort, True)
         else:
             self._ci_consumed = self._ci_lim_sent = 0
             producer.attach(self.byte_consume)
@@ -1150,9 +1266,9 @@ class VClientSocketAgent(VClientSocket):
 
     def active_do_write(self):
         if self._wbuf:
-            data = self._wbuf.peek(self._max_write)
+            chunks = self._wbuf.peek_list(self._max_write)
             try:
-                num_written = self.write_some(data)
+                num_written = self.write_list(chunks)
             except VIOException:
                 self._c_abort()
             else:
@@ -1166,6 +1282,9 @@ class VClientSocketAgent(VClientSocket):
                     self.stop_writing()
                     if self._ci_eod:
                         self._c_abort()
+                elif num_written > 0:
+                    # Socket may accept more data without blocking
+                    return True
         else:
             self.stop_writing()
 
@@ -1249,7 +1368,7 @@ class VClientSocketAgent(VClientSocket):
 
         # If closed, pass notification
         if self._sock_in_closed:
-            self.reactor.schedule(0.0, self._p_abort, True)
+            self.reactor.call_soon(self._p_abort, True)
 
     def _p_detach(self, rthread=False):
         # Ensure 'detach' is performed in reactor thread
@@ -1275,13 +1394,20 @@ class VClientSocketAgent(VClientSocket):
             self.stop_reading()
             return
         try:
-            data = self.read_some(max_read)
+            chunks = self.read_views(max_read)
         except Exception as e:
             self._p_abort()
         else:
-            self._pi_buffer.append(data)
-            if self._pi_buffer:
-                self.pi_prod_lim = self._pi_consumer.consume(self._pi_buffer)
+            buf = self._pi_buffer
+            buf_len = len(buf)
+            buf.append_list(chunks)
+            num_read = len(buf) - buf_len
+            if buf:
+                self.pi_prod_lim = self._pi_consumer.consume(buf)
+                buf.compact(_COMPACT_MAX)
+            # After reading data, more data or end-of-input may be
+            # pending even if the read was short
+            return num_read > 0
 
     def _input_was_closed(self, reason):
         if self._pi_consumer:
@@ -110,6 +110,14 @@ class VTLSClientBase(object):
     CERT_REQUIRED = ssl.CERT_REQUIRED
     """Peer certificates and certificate validation required."""
 
+    # TLS sockets do not support sendmsg() or recv_into(), gather
+    # writes are joined and reads use read_some(). Edge-triggered I/O
+    # is not supported as the TLS layer may hold data which was
+    # already read from the socket
+    _sock_gather = False
+    _sock_recv_into = False
+    _fd_edge_io = False
+
     def read_some(self, max_len):
         """See :meth:`versile.reactor.io.IVByteInput.read_some`.
 
@@ -24,11 +24,11 @@ from threading import Lock
 import weakref
 
 from versile.internal import _b2s, _s2b, _bfmt, _ssplit, _vexport, _pyver
-from versile.internal import _b_ord, _b_chr
+from versile.internal import _b_ord, _b_chr, _vmemoryview
 from versile.common.iface import implements, abstract, final, peer, multiface
 from versile.common.iface import VInterface
 from versile.common.log import VLogger
-from versile.common.util import VByteBuffer, VConfig
+from versile.common.util import VUnlockedByteBuffer, VConfig
 from versile.orb.entity import VEntity, VString, VEntityReaderError
 from versile.reactor import IVReactorObject
 from versile.reactor.io import VByteIOPair
@@ -36,6 +36,7 @@ from versile.reactor.io import IVConsumer, IVByteConsumer
 from versile.reactor.io import IVProducer, IVByteProducer
 from versile.reactor.io import VIOControl, VIOClosed, VIOError
 from versile.reactor.io import VIOMissingControl
+from versile.reactor.io import _COMPACT_MAX
 
 __all__ = ['IVEntityConsumer', 'IVEntityProducer', 'IVEntityWriter',
            'VEntityAgent', 'VEntityConsumer', 'VEntityProducer',
@@ -174,6 +175,10 @@ class VEntitySerializer(object):
         else:
             self.__ctx = weakref.ref(ctx)
 
+        if conf.bytes_threshold is not None:
+            ctx.bytes_threshold = conf.bytes_threshold
+            ctx.bytes_sink = conf.bytes_sink
+
         self.__handshaking = conf.handshake
         if self.__handshaking:
             self.__HANDSHAKE_MAXLEN = 32
@@ -182,9 +187,9 @@ class VEntitySerializer(object):
             if ctx.str_encoding:
                 _hbytes = b''.join((b'VEC_DRAFT-0.8-', ctx.str_encoding,
                                     b'\n'))
-                self.__handshake_send = VByteBuffer(_hbytes)
             else:
-                self.__handshake_send = VByteBuffer(b'VEC_DRAFT-0.8\n')
+                _hbytes = b'VEC_DRAFT-0.8\n'
+            self.__handshake_send = VUnlockedByteBuffer(_hbytes)
         else:
             self.__handshake_send = None
 
@@ -195,7 +200,7 @@ class VEntitySerializer(object):
         self.__bc_producer = None
         self.__bc_eod = False
         self.__bc_eod_clean = None
-        self.__bc_rbuf = VByteBuffer()
+        self.__bc_rbuf = VUnlockedByteBuffer()
         self.__bc_rbuf_len = conf.rbuf_len
         self.__bc_reader = None
         self.__bc_aborted = False
@@ -203,9 +208,9 @@ class VEntitySerializer(object):
         self.__bp_produced = 0
         self.__bp_produce_lim = 0
         self.__bp_consumer = None
-        self.__bp_wbuf = VByteBuffer()
+        self.__bp_wbuf = VUnlockedByteBuffer(views=True)
         self.__bp_max_write = conf.max_write
-        self.__bp_writer = None
+        self.__bp_pending = VUnlockedByteBuffer(views=True)
         self.__bp_sent_eod = False
 
         self.__ec_consumed = 0
@@ -322,6 +327,11 @@ class VEntitySerializer(object):
         if not self.__handshaking:
             while self.__bc_rbuf:
                 if not self.__bc_reader:
+                    # Fast path for complete entities held in the buffer
+                    if _vmemoryview:
+                        self.__bc_decode_bytes()
+                        if not self.__bc_rbuf:
+                            break
                     context = self.__ctx_ref
                     self.__bc_reader = VEntity._v_reader(context=context)
                 try:
@@ -336,6 +346,7 @@ class VEntitySerializer(object):
                         self.__ep_queue.append(self.__bc_reader.result())
                         self.__bc_reader = None
             self.__ep_produce()
+        self.__bc_rbuf.compact(_COMPACT_MAX)
 
         # Update and return consume limit
         max_add = self.__lim(len(self.__bc_rbuf), self.__bc_rbuf_len)
@@ -417,12 +428,12 @@ class VEntitySerializer(object):
             if (not self.__bp_produce_lim is None
                 and not self.__bp_produce_lim < 0):
                 self.__bp_produce_lim = limit
-                self.reactor.schedule(0.0, self.__bp_do_produce)
+                self.reactor.call_soon(self.__bp_do_produce)
         else:
             if (self.__bp_produce_lim is not None
                 and 0 <= self.__bp_produce_lim < limit):
                 self.__bp_produce_lim = limit
-                self.reactor.schedule(0.0, self.__bp_do_produce)
+                self.reactor.call_soon(self.__bp_do_produce)
 
     def _bp_abort(self):
         self._ec_abort()
@@ -506,6 +517,7 @@ class VEntitySerializer(object):
             self.__ec_aborted = True
             self.__ec_eod = True
             self.__bp_wbuf.remove()
+            self.__bp_pending.remove()
             self.__ec_queue.clear()
             if self.__bp_consumer:
                 self.__bp_consumer.abort()
@@ -558,12 +570,12 @@ class VEntitySerializer(object):
             if (not self.__ep_produce_lim is None
                 and not self.__ep_produce_lim < 0):
                 self.__ep_produce_lim = limit
-                self.reactor.schedule(0.0, self.__ep_produce)
+                self.reactor.call_soon(self.__ep_produce)
         else:
             if (self.__ep_produce_lim is not None
                 and 0 <= self.__ep_produce_lim < limit):
                 self.__ep_produce_lim = limit
-                self.reactor.schedule(0.0, self.__ep_produce)
+                self.reactor.call_soon(self.__ep_produce)
 
     def _ep_abort(self):
         self._bc_abort()
@@ -723,22 +735,19 @@ class VEntitySerializer(object):
         if self.__handshaking:
             return
 
-        if not (self.__bp_writer or self.__ec_queue or self.__bp_wbuf):
+        if not (self.__bp_pending or self.__ec_queue or self.__bp_wbuf):
             return
 
         max_write = self.__lim(self.__bp_produced, self.__bp_produce_lim)
         bytes_left = self.__lim(0, max_write, self.__bp_max_write)
-        entity_was_popped = False
-        while bytes_left != 0 and (self.__bp_writer or self.__ec_queue):
-            if not self.__bp_writer:
-                entity = self.__ec_queue.popleft()
-                entity_was_popped = True
-                self.__bp_writer = entity._v_writer(self.__ctx_ref)
-            data = self.__bp_writer.write(bytes_left)
-            self.__bp_wbuf.append(data)
-            bytes_left -= len(data)
-            if self.__bp_writer.done():
-                self.__bp_writer = None
+        while bytes_left != 0 and (self.__bp_pending or self.__ec_queue):
+            if self.__bp_pending:
+                data = self.__bp_pending.pop_list(bytes_left)
+                old_len = len(self.__bp_wbuf)
+                self.__bp_wbuf.append_list(data)
+                bytes_left -= len(self.__bp_wbuf) - old_len
+            else:
+                bytes_left -= self.__bp_write_batch(bytes_left)
         buf_len = len(self.__bp_wbuf)
         new_lim = self.__bp_consumer.consume(self.__bp_wbuf)
         self.__bp_produced += buf_len - len(self.__bp_wbuf)
@@ -746,7 +755,7 @@ class VEntitySerializer(object):
 
         # If produce limit was updated, schedule another 'produce' batch
         if self.__bp_produce_lim != old_lim:
-            self.reactor.schedule(0.0, self.__bp_do_produce)
+            self.reactor.call_soon(self.__bp_do_produce)
 
         # If entity consume limit changed, notify producer
         if self.__ec_producer:
@@ -757,7 +766,68 @@ class VEntitySerializer(object):
             else:
                 self.__ec_consume_lim = -1
             if self.__ec_consume_lim != old_lim:
-                self.reactor.schedule(0.0, self.__ec_send_limit)
+                self.reactor.call_soon(self.__ec_send_limit)
+
+    def __bp_write_batch(self, max_write):
+        """Serializes queued entities into a single write buffer chunk.
+
+        :param max_write: max bytes to write, or <0 if no limit
+        :type  max_write: int
+        :returns:         number of bytes added to the write buffer
+        :rtype:           int
+
+        Entities are popped from the entity queue and their encoded
+        data is written to one contiguous bytearray which is appended
+        to the write buffer. If an entity's encoding does not fit
+        within *max_write* its data is held as pending data which is
+        written incrementally by later produce operations.
+
+        """
+        batch = bytearray()
+        queue, context = self.__ec_queue, self.__ctx_ref
+        while queue:
+            chunks = queue.popleft()._v_write_chunks(context)
+            if max_write >= 0:
+                size = len(batch)
+                for chunk in chunks:
+                    size += len(chunk)
+                if size > max_write:
+                    self.__bp_pending.append_list(chunks)
+                    break
+            for chunk in chunks:
+                batch.extend(chunk)
+            if len(batch) == max_write:
+                break
+        if batch:
+            self.__bp_wbuf.append(batch)
+        return len(batch)
+
+    def __bc_decode_bytes(self):
+        """Decodes complete entities held in the read buffer.
+
+        Decoding is performed with :meth:`VEntity._v_decode_bytes`\ ,
+        stopping at the first entity which is not fully buffered.
+
+        """
+        chunks = self.__bc_rbuf.peek_list()
+        if len(chunks) == 1:
+            data = memoryview(chunks[0])
+        else:
+            data = memoryview(self.__bc_rbuf.peek())
+        context = self.__ctx_ref
+        pos, end = 0, len(data)
+        while pos < end:
+            try:
+                entity, num_read = VEntity._v_decode_bytes(data[pos:], context)
+            except VEntityReaderError:
+                raise VIOError('VEntity reader error - malformed data')
+            if not num_read:
+                break
+            if self._msg_max is not None and 0 <= self._msg_max < num_read:
+                raise VIOError('Byte consumer message limit exceeded')
+            self.__ep_queue.append(entity)
+            pos += num_read
+        self.__bc_rbuf.remove(pos)
 
     def __ec_send_limit(self):
         if self.__ec_producer:
@@ -787,7 +857,7 @@ class VEntitySerializer(object):
                 self.__ep_produced += len(prod)
                 self.__ep_produce_lim = new_lim
                 if self.__ep_produce_lim != old_lim:
-                    self.reactor.schedule(0.0, self.__ep_produce)
+                    self.reactor.call_soon(self.__ep_produce)
 
             # Check if bc consume limit changed, if so trigger a can_produce
             if self.__bc_producer:
@@ -798,7 +868,7 @@ class VEntitySerializer(object):
                 else:
                     self.__bc_consume_lim = -1
                 if self.__bc_consume_lim != old_lim:
-                    self.reactor.schedule(0.0, self.__bc_send_limit)
+                    self.reactor.call_soon(self.__bc_send_limit)
 
         # If end-of-data was reached, notify connected consumer
         if self.__ep_eod and self.__ep_consumer:
@@ -860,7 +930,7 @@ class VEntitySerializer(object):
             else:
                 self.__handshaking = False
                 self.__handshake_data = None
-                self.reactor.schedule(0.0, self.__bp_do_produce)
+                self.reactor.call_soon(self.__bp_do_produce)
 
     @classmethod
     def __lim(self, base, *lims):
@@ -877,7 +947,7 @@ class VEntitySerializer(object):
     @property
     def __bp_eod(self):
         return (self.__ec_eod and not self.__ec_queue
-                and not self.__bp_writer and not self.__bp_wbuf)
+                and not self.__bp_pending and not self.__bp_wbuf)
 
     @property
     def __ep_eod(self):
@@ -1223,7 +1293,7 @@ class VEntityProducer(object):
         if self.__ep_consumer:
             max_prod = self.__lim(self.__ep_produced, self.__ep_produce_lim)
             if max_prod or (self.__ep_eod and not self.__ep_sent_eod):
-                self.reactor.schedule(0.0, self.__ep_produce)
+                self.reactor.call_soon(self.__ep_produce)
 
     def _consumer_attached(self):
         """Called after a consumer was attached.
@@ -1270,12 +1340,12 @@ class VEntityProducer(object):
             if (not self.__ep_produce_lim is None
                 and not self.__ep_produce_lim < 0):
                 self.__ep_produce_lim = limit
-                self.reactor.schedule(0.0, self.__ep_produce)
+                self.reactor.call_soon(self.__ep_produce)
         else:
             if (self.__ep_produce_lim is not None
                 and 0 <= self.__ep_produce_lim < limit):
                 self.__ep_produce_lim = limit
-                self.reactor.schedule(0.0, self.__ep_produce)
+                self.reactor.call_soon(self.__ep_produce)
 
     def _ep_abort(self):
         if not self.__ep_aborted:
@@ -1449,7 +1519,7 @@ class VEntityWriter(VEntityProducer):
                 self.__write_buffer.append(entity)
             if not self.__write_triggered:
                 self.__write_triggered = True
-                self.reactor.schedule(0.0, self.__trigger_write)
+                self.reactor.call_soon(self.__trigger_write)
         finally:
             self.__writer_lock.release()
 
@@ -1468,7 +1538,7 @@ class VEntityWriter(VEntityProducer):
                 self.__write_eod_clean = clean
             if not self.__write_triggered:
                 self.__write_triggered = True
-                self.reactor.schedule(0.0, self.__trigger_write)
+                self.reactor.call_soon(self.__trigger_write)
         finally:
             self.__writer_lock.release()
 
@@ -1480,7 +1550,7 @@ class VEntityWriter(VEntityProducer):
         reactor thread.
 
         """
-        self.reactor.schedule(0.0, self._ep_abort)
+        self.reactor.call_soon(self._ep_abort)
 
     @final
     def _produce(self, max_len):
@@ -1498,8 +1568,8 @@ class VEntityWriter(VEntityProducer):
                     # Popped one VEntity -> reduce max_len by one
                     max_len -= 1
             if self.__write_eod and not self.__write_buffer:
-                self.reactor.schedule(0.0, self._end_produce,
-                                      self.__write_eod_clean)
+                self.reactor.call_soon(self._end_produce,
+                                       self.__write_eod_clean)
             return tuple(result)
         finally:
             self.__writer_lock.release()
@@ -1675,6 +1745,10 @@ class VEntitySerializerConfig(VConfig):
     :type  msg_max:   int
     :param ebuf_len:  max number of entities to hold in entity input buffer
     :type  ebuf_len:  int
+    :param bytes_threshold: min VBytes payload length for streamed decoding
+    :type  bytes_threshold: int
+    :param bytes_sink:      sink factory for streamed VBytes decoding
+    :type  bytes_sink:      callable
 
     If *handshake* is True then a standard :term:`VP` VEntity Channel
     protocol handshake is performed on the byte interface before
@@ -1689,12 +1763,23 @@ class VEntitySerializerConfig(VConfig):
         If *msg_max* is not set then a peer will be able to send messages of
         unlimited length, which may exhaust available resources.
 
+    If *bytes_threshold* is set then received
+    :class:`versile.orb.entity.VBytes` payloads of at least that
+    length are streamed to a sink as they arrive instead of being
+    accumulated in memory, and *bytes_threshold* and *bytes_sink* are
+    set on the serializer's I/O context. See
+    :attr:`versile.orb.entity.VIOContext.bytes_threshold` and
+    :class:`versile.orb.entity.VBytesSink`\ . Streamed messages are
+    still subject to the *msg_max* limit.
+
     """
     def __init__(self, weakctx=False, handshake=True, rbuf_len=0x4000,
-                 max_write=0x4000, msg_max=101*1024**2, ebuf_len=3):
+                 max_write=0x4000, msg_max=101*1024**2, ebuf_len=3,
+                 bytes_threshold=None, bytes_sink=None):
         s_init = super(VEntitySerializerConfig, self).__init__
         s_init(weakctx=weakctx, handshake=handshake, rbuf_len=rbuf_len,
-               max_write=max_write, msg_max=msg_max, ebuf_len=ebuf_len)
+               max_write=max_write, msg_max=msg_max, ebuf_len=ebuf_len,
+               bytes_threshold=bytes_threshold, bytes_sink=bytes_sink)
 
 
 @implements(IVByteConsumer)
@@ -798,7 +798,7 @@ class VOPServerBridge(VOPBridge):
 
             # Initiate production
             if self._ep_prod_lim != 0:
-                self.reactor.schedule(0, self._handshake_can_produce)
+                self.reactor.call_soon(self._handshake_can_produce)
 
     def _handshake_can_produce(self):
         if (not self._handshaking or self._handshake_error
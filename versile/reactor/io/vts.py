@@ -24,7 +24,8 @@ from versile.internal import _b2s, _s2b, _ssplit, _vexport, _b_ord, _b_chr
 from versile.internal import _pyver
 from versile.common.iface import implements, abstract, peer
 from versile.common.log import VLogger
-from versile.common.util import VByteBuffer, VConfig, bytes_to_posint
+from versile.common.util import VUnlockedByteBuffer, VConfig
+from versile.common.util import bytes_to_posint
 from versile.crypto import VCrypto, VCryptoException
 from versile.crypto.rand import VUrandom, VConstantGenerator
 from versile.crypto.rand import VPseudoRandomHMAC
@@ -35,6 +36,7 @@ from versile.reactor import IVReactorObject
 from versile.reactor.io import VByteIOPair
 from versile.reactor.io import IVByteConsumer, IVByteProducer
 from versile.reactor.io import VIOControl, VIOMissingControl, VIOError
+from versile.reactor.io import _COMPACT_MAX
 
 __all__ = ['VSecure', 'VSecureClient', 'VSecureConfig', 'VSecureServer']
 __all__ = _vexport(__all__)
@@ -164,7 +166,7 @@ class VSecure(object):
         self.__PROTO_MAXLEN = 32
         self.__proto_data = []
         self.__proto_len = 0
-        self.__proto_send = VByteBuffer(b'VTS_DRAFT-0.8\n')
+        self.__proto_send = VUnlockedByteBuffer(b'VTS_DRAFT-0.8\n')
         self._can_send_proto = False
 
         self._handshaking = None
@@ -179,14 +181,14 @@ class VSecure(object):
         self.__pc_eod = False
         self.__pc_eod_clean = None
         self.__pc_aborted = False
-        self.__pc_rbuf = VByteBuffer()
+        self.__pc_rbuf = VUnlockedByteBuffer()
         self.__pc_rbuf_len = conf.rbuf_len
 
         self.__pp_consumer = None
         self.__pp_produced = 0
         self.__pp_produce_lim = 0
         self.__pp_closed = False
-        self.__pp_wbuf = VByteBuffer()
+        self.__pp_wbuf = VUnlockedByteBuffer()
         self.__pp_max_write = conf.max_write
         self.__pp_sent_eod = False
 
@@ -196,14 +198,14 @@ class VSecure(object):
         self.__cc_eod = False
         self.__cc_eod_clean = None
         self.__cc_aborted = False
-        self.__cc_rbuf = VByteBuffer()
+        self.__cc_rbuf = VUnlockedByteBuffer()
         self.__cc_rbuf_len = conf.rbuf_len
 
         self.__cp_consumer = None
         self.__cp_produced = 0
         self.__cp_produce_lim = 0
         self.__cp_closed = False
-        self.__cp_wbuf = VByteBuffer()
+        self.__cp_wbuf = VUnlockedByteBuffer(views=True)
         self.__cp_max_write = conf.max_write
         self.__cp_sent_eod = False
 
@@ -401,12 +403,12 @@ class VSecure(object):
             if (not self.__pp_produce_lim is None
                 and not self.__pp_produce_lim < 0):
                 self.__pp_produce_lim = limit
-                self.reactor.schedule(0.0, self.__pp_do_produce)
+                self.reactor.call_soon(self.__pp_do_produce)
         else:
             if (self.__pp_produce_lim is not None
                 and 0 <= self.__pp_produce_lim < limit):
                 self.__pp_produce_lim = limit
-                self.reactor.schedule(0.0, self.__pp_do_produce)
+                self.reactor.call_soon(self.__pp_do_produce)
 
     def _pp_abort(self):
         self._cc_abort()
@@ -485,7 +487,7 @@ class VSecure(object):
                 if self._handshake_reader.done():
                     result = self._handshake_reader.result()._v_native()
                     self._handshake_reader = None
-                    self.reactor.schedule(0.0, self._handshake_handler, result)
+                    self.reactor.call_soon(self._handshake_handler, result)
 
         # Handshake is now supposed to be completed
         if not self._handshaking and self.__have_protocol:
@@ -496,16 +498,17 @@ class VSecure(object):
                     decrypted = self._msg_decrypter.done()
                 except VCryptoException:
                     # Critical error, aborting the cc interface
-                    self.reactor.schedule(0.0, self._cc_abort)
+                    self.reactor.call_soon(self._cc_abort)
                     raise VIOError('Ciphertext decryption error')
                 else:
                     if decrypted:
                         self.__pp_wbuf.append(self._msg_decrypter.result())
                         self._msg_decrypter.reset()
+        self.__cc_rbuf.compact(_COMPACT_MAX)
 
         # Run produce/update cycle
         if cipher_produce:
-            self.reactor.schedule(0.0, self._cp_do_produce)
+            self.reactor.call_soon(self._cp_do_produce)
         if plain_produce:
             self.__pp_do_produce()
 
@@ -583,12 +586,12 @@ class VSecure(object):
             if (not self.__cp_produce_lim is None
                 and not self.__cp_produce_lim < 0):
                 self.__cp_produce_lim = limit
-                self.reactor.schedule(0.0, self._cp_do_produce)
+                self.reactor.call_soon(self._cp_do_produce)
         else:
             if (self.__cp_produce_lim is not None
                 and 0 <= self.__cp_produce_lim < limit):
                 self.__cp_produce_lim = limit
-                self.reactor.schedule(0.0, self._cp_do_produce)
+                self.reactor.call_soon(self._cp_do_produce)
 
     def _cp_abort(self):
         self._pc_abort()
@@ -672,8 +675,8 @@ class VSecure(object):
                             else:
                                 if not result:
                                     # Connection not authorized, abort
-                                    self.reactor.schedule(0.0, self._pc_abort)
-                                    self.reactor.schedule(0.0, self._pp_abort)
+                                    self.reactor.call_soon(self._pc_abort)
+                                    self.reactor.call_soon(self._pp_abort)
                     self.__vts.reactor.schedule(0.0, notify)
         return _Control(self)
 
@@ -752,7 +755,7 @@ class VSecure(object):
             old_lim = self.__pc_consume_lim
             self.__pc_update_lim()
             if self.__pc_consume_lim != old_lim:
-                self.reactor.schedule(0.0, self.__pc_send_limit)
+                self.reactor.call_soon(self.__pc_send_limit)
 
     def __pc_update_lim(self):
         if self.__pc_producer and not self.__pc_eod:
@@ -795,14 +798,14 @@ class VSecure(object):
 
             # If produce limit was updated, schedule another 'produce' batch
             if self.__pp_produce_lim != old_lim:
-                self.reactor.schedule(0.0, self.__pp_do_produce)
+                self.reactor.call_soon(self.__pp_do_produce)
 
             # Plaintext produce may have enabled consuming more ciphertext
             if self.__cc_producer and not self.__cc_eod:
                 old_lim = self.__cc_consume_lim
                 self.__cc_update_lim()
                 if self.__cc_consume_lim != old_lim:
-                    self.reactor.schedule(0.0, self.__cc_send_limit)
+                    self.reactor.call_soon(self.__cc_send_limit)
 
     def __cc_update_lim(self):
         if self.__cc_producer and not self.__cc_eod:
@@ -907,7 +910,7 @@ class VSecure(object):
                 old_lim = self.__pc_consume_lim
                 self.__pc_update_lim()
                 if self.__pc_consume_lim != old_lim:
-                    self.reactor.schedule(0.0, self.__pc_send_limit)
+                    self.reactor.call_soon(self.__pc_send_limit)
 
     def _error_dismantle(self):
         """Can use for critical errors to shut down and dismantle."""
@@ -1062,14 +1065,14 @@ class VSecure(object):
         entity_data = _dec.result()
 
         try:
-            reader = VEntity._v_reader(VIOContext())
-            num_read = reader.read(entity_data)
+            _decode = VEntity._v_decode_bytes
+            entity, num_read = _decode(entity_data, VIOContext())
         except:
             raise VCryptoException('Could not convert to VEntity')
         else:
-            if not (reader.done() and num_read == len(entity_data)):
+            if entity is None or num_read != len(entity_data):
                 raise VCryptoException('Could not convert to VEntity')
-        return reader.result()._v_native()
+        return entity._v_native()
 
     def _asymm_enc_entity(self, entity, key):
         """Creates an asymmetric cipher encrypted message
@@ -1110,14 +1113,14 @@ class VSecure(object):
             raise VCryptoException('Data package did not decrypt cleanly')
         entity_data = dec.result()
         try:
-            reader = VEntity._v_reader(VIOContext())
-            num_read = reader.read(entity_data)
+            _decode = VEntity._v_decode_bytes
+            entity, num_read = _decode(entity_data, VIOContext())
         except:
             raise VCryptoException('Data did not decrypt as a VEntity')
         else:
-            if not (reader.done() and num_read == len(entity_data)):
+            if entity is None or num_read != len(entity_data):
                 raise VCryptoException('Data did not decrypt as a VEntity')
-        return reader.result()._v_native()
+        return entity._v_native()
 
     def _gen_msg_enc(self, key, key_iv, key_mac):
         cipher = self._crypto.block_cipher(self._cipher_name)
@@ -1169,7 +1172,7 @@ class VSecure(object):
                     raise VIOError('Protocol version %s not supported'
                                    % '.'.join([str(v) for v in version]))
             except VIOError as e:
-                self.reactor.schedule(0.0, self._error_dismantle)
+                self.reactor.call_soon(self._error_dismantle)
                 raise e
             else:
                 #self._logger.debug('Received protocol hello')
@@ -1228,7 +1231,7 @@ class VSecureClient(VSecure):
         self._handshake_reader = VEntity._v_reader(VIOContext())
         self._handshake_writer = writer
         self._handshake_handler = self._send_pubkey
-        self.reactor.schedule(0.0, self._cp_do_produce)
+        self.reactor.call_soon(self._cp_do_produce)
 
     # VTS protocol step 4: client sends public key and secret1
     def _send_pubkey(self, data):
@@ -1377,9 +1380,9 @@ class VSecureClient(VSecure):
                 self._msg_encrypter = self._gen_msg_enc(c_key, c_iv, c_mac)
                 self._msg_decrypter = self._gen_msg_dec(s_key, s_iv, s_mac)
                 self._end_handshaking = True
-            self.reactor.schedule(0.0, self._cp_do_produce)
+            self.reactor.call_soon(self._cp_do_produce)
         except VIOError as e:
-            self.reactor.schedule(0.0, self._error_dismantle)
+            self.reactor.call_soon(self._error_dismantle)
             raise e
 
     # VTS protocol step 6: client receives secret2
@@ -1417,9 +1420,9 @@ class VSecureClient(VSecure):
             self._handshaking = False
             # Handshaking complete, set/update plaintext prod limit
             self._enable_plaintext()
-            self.reactor.schedule(0.0, self._cp_do_produce)
+            self.reactor.call_soon(self._cp_do_produce)
         except VIOError as e:
-            self.reactor.schedule(0.0, self._error_dismantle)
+            self.reactor.call_soon(self._error_dismantle)
             raise e
 
 
@@ -1530,9 +1533,9 @@ class VSecureServer(VSecure):
             self._handshake_writer = writer
             self._handshake_handler = self._get_pubkey
             self._handshake_reader = VEntity._v_reader(VIOContext())
-            self.reactor.schedule(0.0, self._cp_do_produce)
+            self.reactor.call_soon(self._cp_do_produce)
         except VIOError as e:
-            self.reactor.schedule(0.0, self._error_dismantle)
+            self.reactor.call_soon(self._error_dismantle)
             raise e
 
     # VTS protocol step 5: server sends secret2
@@ -1664,9 +1667,9 @@ class VSecureServer(VSecure):
             self._msg_encrypter = self._gen_msg_enc(s_key, s_iv, s_mac)
             self._msg_decrypter = self._gen_msg_dec(c_key, c_iv, c_mac)
 
-            self.reactor.schedule(0.0, self._cp_do_produce)
+            self.reactor.call_soon(self._cp_do_produce)
         except VIOError as e:
-            self.reactor.schedule(0.0, self._error_dismantle)
+            self.reactor.call_soon(self._error_dismantle)
             raise e
 
 
@@ -31,7 +31,7 @@ from versile.internal import _pyver
 from versile.common.iface import implements, abstract, final, peer
 from versile.common.log import VLogger
 from versile.common.peer import VSocketPeer
-from versile.common.util import VByteBuffer, VResult
+from versile.common.util import VUnlockedByteBuffer, VResult
 from versile.common.util import posint_to_netbytes, netbytes_to_posint
 from versile.crypto.local import VLocalCrypto
 from versile.crypto.rand import VUrandom
@@ -180,7 +180,7 @@ class VUDPTransport():
         self._out_closed = False          # If True transport output is closed
         self._out_sent_close = False      # If True sent output 'close' to peer
 
-        self._sbuf = VByteBuffer()
+        self._sbuf = VUnlockedByteBuffer()
         self._sbuf_len = buf_len          # Max buffered send data w/in-flight
         self._sbuf_pos = 0                # Stream pos of send buffer start
         self._send_lim = HSHAKE_WIN       # End of peer's advertised window
@@ -192,7 +192,7 @@ class VUDPTransport():
 
         self._num_dup_ack = 0             # Number consecutive duplicate ack
 
-        self._rbuf = VByteBuffer()        # Receive data buffer
+        self._rbuf = VUnlockedByteBuffer()  # Receive data buffer
         self._rbuf_len = buf_len          # Max buffered read data
         self._rbuf_spos = 0               # Stream pos of recv buffer start
         self._recv_queue = dict()         # stream_pos -> data
@@ -230,14 +230,14 @@ class VUDPTransport():
         self._pi_consumer = None
         self._pi_produced = 0
         self._pi_prod_lim = 0
-        self._pi_buffer = VByteBuffer()
+        self._pi_buffer = VUnlockedByteBuffer()
         self._pi_aborted = False
 
         _hash_cls = VLocalCrypto().sha1
         self._hmac_fun = _hash_cls.hmac
         self._hmac_len = _hash_cls.digest_size()
 
-        self.__tmp_buf = VByteBuffer()
+        self.__tmp_buf = VUnlockedByteBuffer()
 
         # Set up a convenience logger
         self.__logger = VLogger(prefix='VUDP')
@@ -1165,7 +1165,7 @@ class VUDPTransport():
 
         if limit_changed:
             # Limits changed, trigger a (possible) produce operation
-            self.reactor.schedule(0.0, self.__do_produce)
+            self.reactor.call_soon(self.__do_produce)
 
     def _p_abort(self):
         if not self._pi_aborted:
@@ -1320,7 +1320,7 @@ class VUDPTransport():
 
             # If more data can be produced, schedule another iteration
             if self._rbuf and not 0 <= self._pi_prod_lim <= self._pi_produced:
-                self.reactor.schedule(0.0, self.__do_produce)
+                self.reactor.call_soon(self.__do_produce)
 
     def __fail(self, msg=None):
         """Fails a connection"""
@@ -67,6 +67,15 @@ else:
     _reactors.append('VEpollReactor')
     _r_cls = VEpollReactor
 
+# Not used as default reactor, as it is intended for sharing an event
+# loop with other asyncio services
+try:
+    from versile.reactor.asyncior import VAsyncioReactor
+except ImportError as e:
+    _v_silent(e)
+else:
+    _reactors.append('VAsyncioReactor')
+
 if _r_cls:
     VReactor = _r_cls
     _reactors.append('VReactor')
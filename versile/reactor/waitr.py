@@ -22,6 +22,7 @@ from __future__ import print_function, unicode_literals
 from collections import deque
 import copy
 import heapq
+import itertools
 import os
 import sys
 import threading
@@ -68,8 +69,8 @@ class VFDWaitReactor(threading.Thread):
     """
 
     # Internal message codes for message-driven actions
-    (__ADD_READER, __REMOVE_READER, __ADD_WRITER,
-     __REMOVE_WRITER, __STOP, __ADD_CALL, __REMOVE_CALL) = range(7)
+    (__ADD_READER, __REMOVE_READER, __ADD_WRITER, __REMOVE_WRITER,
+     __STOP, __ADD_CALL, __REMOVE_CALL, __CALL_SOON) = range(8)
 
     # Internal codes for internal I/O wait function
     _FD_READ = 1
@@ -77,6 +78,8 @@ class VFDWaitReactor(threading.Thread):
     _FD_ERROR = 0
     _FD_READ_ERROR = -1
     _FD_WRITE_ERROR = -2
+    _FD_READ_CALL = 3
+    _FD_WRITE_CALL = 4
 
     def __init__(self, daemon=False):
         super(VFDWaitReactor, self).__init__()
@@ -102,11 +105,27 @@ class VFDWaitReactor(threading.Thread):
         # Locks __ctrl_msg_flag, __ctrl_queue, writing to __ctrl_w
         self.__ctrl_lock = threading.Lock()
 
+        # Scheduled calls are held in a heapq-ordered list of entries
+        # [scheduled_time, seq, call]. Removed calls are not deleted from
+        # the heap, instead the call of its entry is set to None, and the
+        # entry is discarded when it reaches the top of the heap.
         self.__scheduled_calls = []          # heapq-ordered list
+        self.__call_entries = {}             # id(call) -> heap entry
+        self.__call_seq = itertools.count()  # heap entry tie-breaker
+        self.__tombstones = 0                # num removed entries in heap
         self.__grouped_calls = {}
         self.__calls_lock = threading.Lock() # Locks scheduled/grouped calls
         self.__t_next_call = None            # Timestamp next call (or None)
 
+        # Calls queued with call_soon() are held as entries (key,
+        # callback, args, kargs), and keys of pending calls without
+        # arguments are held for coalescing. Only accessed by the
+        # reactor thread.
+        self.__soon_calls = deque()
+        self.__soon_keys = set()
+
+        self.__stats = None                  # Loop instrumentation (if any)
+
         self.__core_log = VLogger()
         self.__logger = VReactorLogger(self)
         self.__logger.add_watcher(self.__core_log)
@@ -144,7 +163,11 @@ class VFDWaitReactor(threading.Thread):
             self.__writers.clear()
             self.__ctrl_queue.clear()
             self.__scheduled_calls = []
+            self.__call_entries.clear()
+            self.__tombstones = 0
             self.__grouped_calls.clear()
+            self.__soon_calls.clear()
+            self.__soon_keys.clear()
             self._fd_done()
 
     @final
@@ -156,13 +179,52 @@ class VFDWaitReactor(threading.Thread):
         s_calls = deque()
         while True:
             t_next_call = self.__t_next_call
-            if t_next_call is not None:
+            if self.__soon_calls:
+                timeout = 0
+            elif t_next_call is not None:
                 timeout = max(t_next_call - time.time(), 0)
             else:
                 timeout = None
 
-            for event, fd in self._fd_wait(timeout):
-                if event == self._FD_ERROR:
+            # Instrumentation is only performed if stats is not None
+            stats = self.__stats
+            if stats is None:
+                fd_events = self._fd_wait(timeout)
+            else:
+                t_wait = time.time()
+                fd_events = self._fd_wait(timeout)
+                t_dispatch = time.time()
+                stats.waited(t_dispatch - t_wait,
+                             len(self.__scheduled_calls))
+
+            for event, fd in fd_events:
+                if stats is not None:
+                    t_event = time.time()
+                if event == self._FD_READ_CALL:
+                    reader = fd[0]
+                    try:
+                        if fd[1]():
+                            self._fd_ready(event, fd)
+                    except:
+                        # Should never happen if compliant do_read
+                        self.__rlog.log_trace(lvl=self.log.ERROR) #DBG
+                        self.__rlog.info('do_read() exception, aborting')
+                        self.remove_reader(reader, internal=True)
+                        reader.close_input(VFIOLost())
+                    reader = None
+                elif event == self._FD_WRITE_CALL:
+                    writer = fd[0]
+                    try:
+                        if fd[1]():
+                            self._fd_ready(event, fd)
+                    except:
+                        # Should never happen if compliant do_write
+                        self.__rlog.log_trace(lvl=self.log.ERROR) #DBG
+                        self.__rlog.info('do_write() exception, aborting')
+                        self.remove_writer(writer, internal=True)
+                        writer.close_output(VFIOLost())
+                    writer = None
+                elif event == self._FD_ERROR:
                     if fd in (self.__ctrl_r, self.__ctrl_w):
                         self.__rlog.critical('Reactor message pipe failed')
                         raise VReactorException('Reactor message pipe error')
@@ -234,6 +296,9 @@ class VFDWaitReactor(threading.Thread):
                             self.__rlog.info('do_write() exception, aborting')
                             self.remove_writer(fd, internal=True)
                             fd.close_output(VFIOLost())
+                if stats is not None:
+                    stats.handled(event, fd, time.time() - t_event)
+            fd_events = None
             if self.__ctrl_stop:
                 return
 
@@ -243,42 +308,63 @@ class VFDWaitReactor(threading.Thread):
                 try:
                     loop_time = time.time()
                     _sc = self.__scheduled_calls
+                    _entries = self.__call_entries
                     while _sc:
-                        call = _sc[0]
-                        if call.scheduled_time <= loop_time:
-                            call = heapq.heappop(_sc)
-                            s_calls.append(call)
-                        else:
+                        entry = _sc[0]
+                        if entry[0] > loop_time:
                             break
-                    _sc = None
-                    if s_calls:
-                        for call in s_calls:
-                            if call.callgroup:
-                                callgroup = call.callgroup
-                                group = self.__grouped_calls.get(callgroup,
-                                                                 None)
-                                if group:
-                                    group.discard(call)
-                                    if not group:
-                                        self.__grouped_calls.pop(callgroup)
-                        callgroup = None
-                        if self.__scheduled_calls:
-                            _t = self.__scheduled_calls[0].scheduled_time
-                            self.__t_next_call = _t
-                        else:
-                            self.__t_next_call = None
+                        heapq.heappop(_sc)
+                        call = entry[2]
+                        if call is None:
+                            self.__tombstones -= 1
+                            continue
+                        _entries.pop(id(call), None)
+                        s_calls.append(call)
+                        if call.callgroup:
+                            self.__discard_grouped(call)
+                    _sc = _entries = entry = None
+                    self.__update_next_call()
                 finally:
                     self.__calls_lock.release()
                 for call in s_calls:
+                    if stats is not None:
+                        t_call = time.time()
+                        callback = call.callback
                     try:
                         call.execute()
                     except Exception as e:
                         self.__rlog.error('Scheduled call failed')
                         self.__rlog.log_trace(lvl=self.log.ERROR)
+                    if stats is not None:
+                        stats.called(callback, time.time() - t_call)
                 s_calls.clear()
 
                 # Lose any loop variable references
-                call = fd = None
+                call = fd = callback = None
+
+            # Execute calls queued with call_soon(); calls queued while
+            # executing are executed in the next loop iteration
+            if self.__soon_calls:
+                soon_calls, self.__soon_calls = self.__soon_calls, deque()
+                _keys = self.__soon_keys
+                while soon_calls:
+                    key, callback, args, kargs = soon_calls.popleft()
+                    if key is not None:
+                        _keys.discard(key)
+                    if stats is not None:
+                        t_call = time.time()
+                    try:
+                        callback(*args, **kargs)
+                    except Exception as e:
+                        self.__rlog.error('Queued call failed')
+                        self.__rlog.log_trace(lvl=self.log.ERROR)
+                    if stats is not None:
+                        stats.called(callback, time.time() - t_call)
+                soon_calls = _keys = key = callback = args = kargs = None
+
+            if stats is not None:
+                stats.dispatched(time.time() - t_dispatch)
+                stats = None
 
     def started(self):
         """See :meth:`versile.reactor.IVCoreReactor.started`\ .
@@ -414,6 +500,14 @@ class VFDWaitReactor(threading.Thread):
         return VScheduledCall(self, delay_time, None, callback,
                               True, *args, **kargs)
 
+    @final
+    def call_soon(self, callback, *args, **kargs):
+        """See :meth:`versile.reactor.IVTimeReactor.call_soon`\ ."""
+        if self.__is_reactor_thread():
+            self.__call_soon(callback, args, kargs)
+        else:
+            self.__msg_call_soon(callback, args, kargs)
+
     @final
     def cg_schedule(self, delay_time, callgroup, callback, *args, **kargs):
         """See :meth:`versile.reactor.IVTimeReactor.cg_schedule`"""
@@ -434,7 +528,11 @@ class VFDWaitReactor(threading.Thread):
             # TROUBLESHOOT - see add_reader comments regarding 'internal'
             self.__calls_lock.acquire()
             try:
-                heapq.heappush(self.__scheduled_calls, call)
+                # Replace any entry already held for the call
+                self.__tombstone(call)
+                entry = [call.scheduled_time, next(self.__call_seq), call]
+                heapq.heappush(self.__scheduled_calls, entry)
+                self.__call_entries[id(call)] = entry
 
                 if call.callgroup:
                     callgroup = call.callgroup
@@ -444,12 +542,7 @@ class VFDWaitReactor(threading.Thread):
                         self.__grouped_calls[callgroup] = group
                     group.add(call)
 
-                # Update time of next call
-                if self.__scheduled_calls:
-                    _t = self.__scheduled_calls[0].scheduled_time
-                    self.__t_next_call = _t
-                else:
-                    self.__t_next_call = None
+                self.__update_next_call()
             finally:
                 self.__calls_lock.release()
         else:
@@ -479,6 +572,99 @@ class VFDWaitReactor(threading.Thread):
         finally:
             self.__calls_lock.release()
 
+    def enable_stats(self, slow_time=None):
+        """Enables instrumentation of the reactor's event loop.
+
+        :param slow_time: threshold for slow callbacks in seconds (or None)
+        :type  slow_time: float
+
+        When enabled, the reactor records the number of event loop
+        iterations, the time spent waiting for I/O events and the
+        time spent dispatching events and executing calls. It also
+        records the execution time of do_read() and do_write() calls
+        on readers and writers, and of scheduled calls and calls
+        queued with :meth:`call_soon`\ , aggregated by class and by
+        callback name. Metrics can be read with :meth:`stats`\ .
+
+        If *slow_time* is set, then a warning is logged on the
+        reactor's :attr:`log` for each handler call or callback which
+        executes for longer than *slow_time*\ .
+
+        Can be called from any thread, and instrumentation takes
+        effect from the next loop iteration. Calling this method when
+        instrumentation is enabled resets all metrics. When
+        instrumentation is disabled, the overhead on the event loop
+        is a single check per loop iteration and per event.
+
+        """
+        self.__stats = _VLoopStats(self.__logger, slow_time)
+
+    def disable_stats(self):
+        """Disables instrumentation of the reactor's event loop.
+
+        See :meth:`enable_stats`\ .
+
+        """
+        self.__stats = None
+
+    def stats(self, reset=False):
+        """Returns a snapshot of the reactor's event loop metrics.
+
+        :param reset: if True reset metrics after taking the snapshot
+        :type  reset: bool
+        :returns:     metrics (or None if instrumentation is disabled)
+        :rtype:       dict
+
+        The snapshot holds the following, with times in seconds:
+
+        +---------------+---------------------------------------------+
+        | Key           | Value                                       |
+        +===============+=============================================+
+        | elapsed       | time since metrics were enabled or reset    |
+        +---------------+---------------------------------------------+
+        | iterations    | number of event loop iterations             |
+        +---------------+---------------------------------------------+
+        | wait_time     | total time waiting for I/O events           |
+        +---------------+---------------------------------------------+
+        | dispatch_time | total time handling events and calls        |
+        +---------------+---------------------------------------------+
+        | events        | number of I/O events handled                |
+        +---------------+---------------------------------------------+
+        | calls         | number of executed calls                    |
+        +---------------+---------------------------------------------+
+        | slow          | number of calls which exceeded slow_time    |
+        +---------------+---------------------------------------------+
+        | heap_size     | scheduled call heap size at last iteration  |
+        +---------------+---------------------------------------------+
+        | heap_max      | max scheduled call heap size                |
+        +---------------+---------------------------------------------+
+        | handlers      | handler metrics by 'Class.method'           |
+        +---------------+---------------------------------------------+
+        | callbacks     | call metrics by callback name               |
+        +---------------+---------------------------------------------+
+
+        Handler and call metrics are dictionaries with keys 'count',
+        'time' and 'max' which hold the number of calls, the total
+        execution time and the longest execution time. The heap size
+        includes entries for removed calls which have not yet been
+        discarded. See :meth:`enable_stats`\ .
+
+        """
+        stats = self.__stats
+        if stats is None:
+            return None
+        return stats.snapshot(reset=reset)
+
+    @property
+    def scheduled_call_count(self):
+        """Number of calls which are currently scheduled (int)."""
+        return len(self.__call_entries)
+
+    @property
+    def callgroup_count(self):
+        """Number of call groups which have scheduled calls (int)."""
+        return len(self.__grouped_calls)
+
     @classmethod
     def set_default_log_watcher(cls, lvl=None, watcher=None):
         """Set a class default log watcher for reactor logging.
@@ -518,9 +704,32 @@ class VFDWaitReactor(threading.Thread):
         *event* is one of :attr:`_FD_READ`\ , :attr:`_FD_WRITE` or
         :attr:`_FD_ERROR`\ .
 
+        *event* may also be :attr:`_FD_READ_CALL` or
+        :attr:`_FD_WRITE_CALL`\ , in which case *fd* is a tuple whose
+        first two elements are a reader or writer and its bound
+        do_read() or do_write() method. The method is called without
+        checking whether the reader or writer is registered, so the
+        subsystem must only yield the event for registered handlers.
+        If the method returns True then :meth:`_fd_ready` is called
+        with the event and the tuple.
+
         """
         raise NotImplementedError()
 
+    def _fd_ready(self, event, entry):
+        """Called internally when a dispatched handler can do more I/O.
+
+        :param event: :attr:`_FD_READ_CALL` or :attr:`_FD_WRITE_CALL`
+        :param entry: the tuple yielded by :meth:`_fd_wait`
+
+        Called when a handler method dispatched by a
+        :attr:`_FD_READ_CALL` or :attr:`_FD_WRITE_CALL` event returns
+        True. Default does nothing, subsystems which yield such events
+        should override.
+
+        """
+        pass
+
     def _add_read_fd(self, fd):
         """Called internally to add a reader.
 
@@ -581,38 +790,78 @@ class VFDWaitReactor(threading.Thread):
         """
         return self.__thread in (None, threading.current_thread())
 
+    def __call_soon(self, callback, args, kargs):
+        """Queues a call_soon() call, should only be called by reactor."""
+        if args or kargs:
+            key = None
+        else:
+            key = _soon_key(callback)
+            if key in self.__soon_keys:
+                return
+            self.__soon_keys.add(key)
+        self.__soon_calls.append((key, callback, args, kargs))
+
     def __remove_call(self, call):
         """Removes a call.
 
         The method assumes the caller holds a lock on self.__calls_lock
 
         """
-        # This is an expensive operation as it requires full call heap
-        # normalization, however __remove_call is typically used
-        # infrequently, so a heap is used to optimize for adding and popping
-        scheduled_time = call.scheduled_time
-        _sc = self.__scheduled_calls
-        for pos in xrange(len(_sc)):
-            if _sc[pos] is call:
-                break
-        else:
+        if not self.__tombstone(call):
             return
+        if call.callgroup:
+            self.__discard_grouped(call)
+        self.__update_next_call()
+
+    def __tombstone(self, call):
+        """Marks a call's heap entry as removed.
+
+        :returns: True if the call had an entry
+
+        The method assumes the caller holds a lock on
+        self.__calls_lock. The heap is compacted if more than half
+        of its entries have been removed.
+
+        """
+        entry = self.__call_entries.pop(id(call), None)
+        if entry is None:
+            return False
+        entry[2] = None
+        self.__tombstones += 1
+
+        _sc = self.__scheduled_calls
+        if self.__tombstones > 64 and 2*self.__tombstones > len(_sc):
+            _sc = [e for e in _sc if e[2] is not None]
+            heapq.heapify(_sc)
+            self.__scheduled_calls = _sc
+            self.__tombstones = 0
+        return True
 
-        _sc = _sc.pop(pos)
-        heapy.heapify(_sc)
-        self.__scheduled_calls, _sc = _sc, None
+    def __discard_grouped(self, call):
+        """Removes a call from its call group.
 
+        The method assumes the caller holds a lock on self.__calls_lock
+
+        """
         callgroup = call.callgroup
-        if callgroup and callgroup in self.__grouped_calls:
-            group = self.__grouped_calls[callgroup]
+        group = self.__grouped_calls.get(callgroup, None)
+        if group:
             group.discard(call)
             if not group:
                 self.__grouped_calls.pop(callgroup)
-        self.__scheduled_calls.pop(pos)
 
-        # Update time of next call
-        if self.__scheduled_calls:
-            self.__t_next_call = self.__scheduled_calls[0].scheduled_time
+    def __update_next_call(self):
+        """Discards removed entries on heap top and sets next call time.
+
+        The method assumes the caller holds a lock on self.__calls_lock
+
+        """
+        _sc = self.__scheduled_calls
+        while _sc and _sc[0][2] is None:
+            heapq.heappop(_sc)
+            self.__tombstones -= 1
+        if _sc:
+            self.__t_next_call = _sc[0][0]
         else:
             self.__t_next_call = None
 
@@ -689,6 +938,10 @@ class VFDWaitReactor(threading.Thread):
         code, data = self.__REMOVE_CALL, call
         self.__msg_push(code, data)
 
+    def __msg_call_soon(self, callback, args, kargs):
+        code, data = self.__CALL_SOON, (callback, args, kargs)
+        self.__msg_push(code, data)
+
     def __msg_process(self, code, data):
         if code == self.__ADD_READER:
             self.add_reader(data, True)
@@ -704,6 +957,8 @@ class VFDWaitReactor(threading.Thread):
             self.add_call(data, True)
         elif code == self.__REMOVE_CALL:
             self.remove_call(data, True)
+        elif code == self.__CALL_SOON:
+            self.__call_soon(*data)
         else:
             raise RuntimeError('Unknown internal message code')
 
@@ -711,3 +966,134 @@ class VFDWaitReactor(threading.Thread):
         self.__thread = None
         self.__finished = True
         self.__ctrl_stop = True
+
+
+class _VLoopStats(object):
+    """Metrics for an instrumented reactor event loop.
+
+    Metrics are updated by the reactor thread, and snapshots can be
+    taken from any thread.
+
+    """
+
+    def __init__(self, log, slow_time):
+        self.__log = log
+        self.__slow_time = slow_time
+        self.__lock = threading.Lock()
+        self.__reset()
+
+    def waited(self, wait_time, heap_size):
+        with self.__lock:
+            self.__iterations += 1
+            self.__wait_time += wait_time
+            self.__heap_size = heap_size
+            if heap_size > self.__heap_max:
+                self.__heap_max = heap_size
+
+    def dispatched(self, dispatch_time):
+        with self.__lock:
+            self.__dispatch_time += dispatch_time
+
+    def handled(self, event, fd, duration):
+        if event in (VFDWaitReactor._FD_READ_CALL,
+                     VFDWaitReactor._FD_WRITE_CALL):
+            fd = fd[0]
+        if event in (VFDWaitReactor._FD_READ, VFDWaitReactor._FD_READ_CALL):
+            method = 'do_read'
+        elif event in (VFDWaitReactor._FD_WRITE,
+                       VFDWaitReactor._FD_WRITE_CALL):
+            method = 'do_write'
+        else:
+            method = 'error'
+        if isinstance(fd, int):
+            name = 'fd.' + method
+        else:
+            name = '%s.%s' % (type(fd).__name__, method)
+        with self.__lock:
+            self.__events += 1
+            self.__add(self.__handlers, name, duration)
+        self.__check_slow(name, duration)
+
+    def called(self, callback, duration):
+        name = self.__callback_name(callback)
+        with self.__lock:
+            self.__calls += 1
+            self.__add(self.__callbacks, name, duration)
+        self.__check_slow(name, duration)
+
+    def snapshot(self, reset=False):
+        with self.__lock:
+            result = dict(elapsed=time.time() - self.__start_time,
+                          iterations=self.__iterations,
+                          wait_time=self.__wait_time,
+                          dispatch_time=self.__dispatch_time,
+                          events=self.__events, calls=self.__calls,
+                          slow=self.__slow, heap_size=self.__heap_size,
+                          heap_max=self.__heap_max)
+            for key, metrics in (('handlers', self.__handlers),
+                                 ('callbacks', self.__callbacks)):
+                result[key] = dict((name, dict(count=m[0], time=m[1],
+                                               max=m[2]))
+                                   for name, m in metrics.items())
+            if reset:
+                self.__reset()
+        return result
+
+    def __reset(self):
+        self.__start_time = time.time()
+        self.__iterations = 0
+        self.__wait_time = self.__dispatch_time = 0.0
+        self.__events = self.__calls = self.__slow = 0
+        self.__heap_size = self.__heap_max = 0
+        self.__handlers = dict() # name -> [count, time, max]
+        self.__callbacks = dict() # name -> [count, time, max]
+
+    def __check_slow(self, name, duration):
+        slow_time = self.__slow_time
+        if slow_time is not None and duration > slow_time:
+            with self.__lock:
+                self.__slow += 1
+            self.__log.warn('Slow call %s took %.3f seconds'
+                            % (name, duration), prefix='Reactor')
+
+    @classmethod
+    def __add(cls, metrics, name, duration):
+        entry = metrics.get(name, None)
+        if entry is None:
+            metrics[name] = [1, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            if duration > entry[2]:
+                entry[2] = duration
+
+    @classmethod
+    def __callback_name(cls, callback):
+        if callback is None:
+            return 'None'
+        name = getattr(callback, '__name__', None)
+        if name is None:
+            return type(callback).__name__
+        obj = getattr(callback, '__self__', None)
+        if obj is not None:
+            if isinstance(obj, type):
+                name = '%s.%s' % (obj.__name__, name)
+            else:
+                name = '%s.%s' % (type(obj).__name__, name)
+        return name
+
+
+def _soon_key(callback):
+    """Returns a key for coalescing call_soon() calls to *callback*.
+
+    Bound methods are keyed on the identity of the bound object, so
+    calls to methods of distinct objects which compare equal are not
+    coalesced, and methods of unhashable objects can be queued. Other
+    callbacks are keyed on their identity. The key is only valid while
+    the queued call holds a reference to *callback*.
+
+    """
+    func = getattr(callback, '__func__', None)
+    if func is None:
+        return id(callback)
+    return (id(callback.__self__), func)